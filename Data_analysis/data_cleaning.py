@@ -2,14 +2,45 @@
 # This module handles all data preprocessing operations including cleaning, encoding, and splitting
 # It follows the Strategy pattern with abstract DataStrategy class and concrete implementations
 from abc import ABC
-from typing import Union
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import numpy as np
 import pandas as pd
+from pandas.util import hash_pandas_object
+import pyarrow as pa
+import pyarrow.compute as pc
 from sklearn.preprocessing import LabelEncoder
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from typing import Tuple
 from typing_extensions import Annotated
 
+# Raw columns removed by DataPreprocessing before cleaning
+DROPPED_COLUMNS = ['Index', 'Description', 'Ownership', 'overlooking','Car Parking','Dimensions','Plot Area','Super Area']
+
+# Categorical columns label encoded by DataPreprocessing; missing values in the
+# first five are replaced by 'Unknow', missing counts by the most frequent value
+CATEGORICAL_COLUMNS = ['Title','location','Transaction','Furnishing','facing','Status','Floor','Society']
+FILLED_COLUMNS = ['Title','location','Transaction','Furnishing','facing']
+MODE_FILLED_COLUMNS = ['Bathroom', 'Balcony']
+
+# Features selected by DataDivision for model training, in training order
+FEATURE_COLUMNS = ['Title', 'Bathroom', 'Carpet Area', 'location', 'Transaction', 'Furnishing', 'Balcony', 'facing',
+                   'Price (in rupees)', 'Status', 'Society', 'Floor']
+
+# Price bands in rupees (1 Lac = 100,000, 1 Cr = 10,000,000), used to stratify the
+# train/test split and to break down the evaluation metrics
+PRICE_BAND_EDGES = [2500000, 5000000, 10000000, 20000000]
+PRICE_BAND_LABELS = ['<25 Lac', '25-50 Lac', '50 Lac-1 Cr', '1-2 Cr', '>2 Cr']
+
+# Price strings as scraped: a number and an optional unit, e.g. '34.01 Lac', '1.2 Cr', '500000'
+PRICE_UNITS = {'Lac': 100000, 'Cr': 10000000}
+PRICE_PATTERN = r'^[0-9]*\.?[0-9]+ ?(?:Lac|Cr)?$'
+
+# Area strings as scraped: a number and an optional unit, e.g. '873 sqft', '946 sqm'
+# The unit is only stripped, not converted, as in the original cleaning code
+AREA_UNITS = ['sqft', 'sqm', 'sqyrd']
+AREA_PATTERN = r'^[0-9]*\.?[0-9]+ ?(?:sqft|sqm|sqyrd)?$'
+
 
 class DataStrategy(ABC):
     """
@@ -66,39 +97,36 @@ class DataPreprocessing(DataStrategy):
         """
         # Step 1: Remove columns that don't contribute to prediction
         # These columns either contain redundant information or are not useful for modeling
-        dataset.drop(['Index', 'Description', 'Ownership', 'overlooking','Car Parking','Dimensions','Plot Area','Super Area'], axis='columns', inplace=True)
+        # Datasets read with a column projection (e.g. from the columnar cache) may already lack them
+        dataset.drop(DROPPED_COLUMNS, axis='columns', inplace=True, errors='ignore')
         
         # Step 2: Handle missing values in categorical columns
         # Fill missing categorical values with 'Unknown' to preserve data
-        column = ['Title','location','Transaction','Furnishing','facing']
-        dataset[column] = dataset[column].fillna('Unknow')
+        column = FILLED_COLUMNS
+        for col in column:
+            dataset[col] = self.fill_unknown(dataset[col])
 
         # Step 3: Handle missing values in numerical columns
         # Use mode (most frequent value) to fill missing bathroom and balcony counts
         mode_bathroom = dataset['Bathroom'].mode()
         mode_balcony = dataset['Balcony'].mode()
+        # Kept in modes_ so new listings can be filled the same way (see IncrementalPreprocessing)
+        self.modes_ = {'Bathroom': mode_bathroom.tolist(), 'Balcony': mode_balcony.tolist()}
 
         dataset['Bathroom'] = dataset['Bathroom'].fillna(mode_bathroom)
         dataset['Balcony'] = dataset['Balcony'].fillna(mode_balcony)
 
         # Step 4: Remove duplicate rows to ensure data quality
         # Keep the first occurrence of any duplicate row
-        duplicates_row = dataset[dataset.duplicated(keep='first')]
-        duplicates_row.shape[0]  # Count of duplicates (for logging purposes)
-
         dataset.drop_duplicates(keep='first', inplace=True)
 
         # Step 5: Convert price strings to numerical values
         # Handle different price formats (Lac, Cr, plain numbers)
-        dataset['Amount(in rupees)'] = dataset['Amount(in rupees)'].apply(self.convert_price)
+        dataset['Amount(in rupees)'] = self.convert_prices(dataset['Amount(in rupees)'])
 
         # Step 6: Clean and convert area measurements to numerical format
         # Remove units (sqft, sqm, sqyrd) and convert to numeric
-        dataset['Carpet Area'] = dataset['Carpet Area'].astype(str)
-        dataset['Carpet Area'] = dataset['Carpet Area'].str.replace('sqft', '', regex=True)
-        dataset['Carpet Area'] = dataset['Carpet Area'].str.replace('sqm', '', regex=True)
-        dataset['Carpet Area'] = dataset['Carpet Area'].str.replace('sqyrd', '', regex=True)
-        dataset['Carpet Area'] = pd.to_numeric(dataset['Carpet Area'], errors='coerce')
+        dataset['Carpet Area'] = self.convert_areas(dataset['Carpet Area'])
 
         # Step 7: Ensure numerical columns are properly typed
         dataset['Bathroom'] = pd.to_numeric(dataset['Bathroom'], errors='coerce')
@@ -106,11 +134,14 @@ class DataPreprocessing(DataStrategy):
 
         # Step 8: Encode categorical variables using LabelEncoder
         # This converts text categories to numerical values for model training
+        # The fitted classes are kept in categories_ so serving can apply the same encoding
         label_encoder = LabelEncoder()
-        test_to_numeric = ['Title','location','Transaction','Furnishing','facing','Status','Floor','Society']
+        test_to_numeric = CATEGORICAL_COLUMNS
 
+        self.categories_ = {}
         for x in test_to_numeric:
             dataset[x] = label_encoder.fit_transform(dataset[x])
+            self.categories_[x] = label_encoder.classes_.tolist()
 
         # Step 9: Remove any remaining rows with missing values
         # This ensures the final dataset is complete and ready for training
@@ -149,16 +180,489 @@ class DataPreprocessing(DataStrategy):
             # Return None if conversion fails (will be handled by dropna later)
             return None
 
+    def fill_unknown(self, values: pd.Series) -> pd.Series:
+        """
+        Replace missing categorical values with 'Unknow'
+
+        Categorical columns (streamed or cached datasets) get 'Unknow' added
+        to their categories first.
+
+        Args:
+            values (pd.Series): Text or categorical column
+
+        Returns:
+            pd.Series: Column without missing values
+        """
+        if isinstance(values.dtype, pd.CategoricalDtype) and 'Unknow' not in values.cat.categories:
+            values = values.cat.add_categories('Unknow')
+        return values.fillna('Unknow')
+
+    def convert_prices(self, amounts: pd.Series) -> pd.Series:
+        """
+        Vectorized convert_price for a whole column
+
+        The column is handed to Arrow once: a single regex match checks the
+        '<number> <unit>' format, the unit is mapped to its multiplier and the
+        numbers are parsed in one cast. The few strings the pattern does not
+        cover (e.g. 'Call for Price') go through convert_price, so the result
+        is identical to applying it row by row. Missing values give NaN
+        instead of raising TypeError.
+
+        Args:
+            amounts (pd.Series): Price strings (e.g. '2.5 Lac', '1.2 Cr', '500000')
+
+        Returns:
+            pd.Series: Prices in rupees as float64, NaN where conversion fails
+        """
+        text = pa.array(amounts, type=pa.string(), from_pandas=True)
+        matched = pc.fill_null(pc.match_substring_regex(text, PRICE_PATTERN), False)
+
+        multiplier = np.ones(len(text))
+        for unit, factor in PRICE_UNITS.items():
+            multiplier[pc.fill_null(pc.ends_with(text, unit), False).to_numpy(zero_copy_only=False)] = factor
+
+        # For matched strings, trimming the unit letters and spaces leaves exactly the number
+        numbers = pc.if_else(matched, pc.utf8_rtrim(text, characters=' ' + ''.join(PRICE_UNITS)), None)
+        prices = pd.Series(pc.cast(numbers, pa.float64()).to_numpy(zero_copy_only=False) * multiplier,
+                           index=amounts.index, name=amounts.name)
+
+        unmatched = ~matched.to_numpy(zero_copy_only=False) & amounts.notna().to_numpy()
+        if unmatched.any():
+            prices[unmatched] = amounts[unmatched].map(self.convert_price).astype('float64')
+        return prices
+
+    def convert_areas(self, areas: pd.Series) -> pd.Series:
+        """
+        Strip the unit from area strings and convert them to numbers
+
+        One regex match and one Arrow cast replace the three str.replace passes
+        and pd.to_numeric. Strings the pattern does not cover have the units
+        removed and are parsed as before, and the integer dtype pd.to_numeric
+        gives to all-integer columns is kept, so the values and the dtype match
+        the original cleaning code.
+
+        Args:
+            areas (pd.Series): Area strings (e.g. '873 sqft', '946 sqm')
+
+        Returns:
+            pd.Series: Areas as numbers, NaN where conversion fails
+        """
+        strings = areas.astype(str)
+        text = pa.array(strings, type=pa.string(), from_pandas=True)
+        matched = pc.fill_null(pc.match_substring_regex(text, AREA_PATTERN), False)
+
+        numbers = pc.utf8_rtrim(text, characters=' ' + ''.join(AREA_UNITS))
+        result = pd.Series(pc.cast(pc.if_else(matched, numbers, None), pa.float64()).to_numpy(zero_copy_only=False),
+                           index=areas.index, name=areas.name)
+        integral = not pc.any(pc.match_substring(pc.filter(numbers, matched), '.')).as_py()
+
+        unmatched = ~matched.to_numpy(zero_copy_only=False)
+        if unmatched.any():
+            fallback = strings[unmatched]
+            for unit in AREA_UNITS:
+                fallback = fallback.str.replace(unit, '', regex=True)
+            fallback = pd.to_numeric(fallback, errors='coerce')
+            integral = integral and pd.api.types.is_integer_dtype(fallback)
+            result[unmatched] = fallback.astype('float64')
+        return result.astype('int64') if integral else result
 
 
+
+class LeanPreprocessing(DataStrategy):
+    """
+    Memory-lean variant of DataPreprocessing
+
+    Cleans the data as DataPreprocessing does, into a smaller frame and with
+    fewer passes over the data:
+    - categorical columns are encoded from pandas categoricals (sorted
+      categories and cat.codes, the codes LabelEncoder assigns) into the
+      smallest integer type, without writing 'Unknow' strings first
+    - duplicates are found in one pass, from one hash per row of the
+      encoded categories and the filled raw values
+    - duplicate and incomplete rows are dropped with a single row selection
+      at the end, instead of drop_duplicates and dropna each copying the frame
+    - numeric columns are downcast to the smallest type that keeps every
+      value exactly (the target stays float64)
+
+    It is a different cleaning, not a drop-in replacement: missing
+    Bathroom/Balcony counts are filled with the most frequent value, whereas
+    DataPreprocessing (like the chunked, cached and incremental cleanings)
+    passes Series.mode() to fillna, which aligns it on the row index and only
+    fills the first rows. The rows with missing counts that DataPreprocessing
+    drops are kept here, so the training set is larger. On data without
+    missing counts, both give the same rows and values. The input frame is
+    not modified.
+    """
+    def handle_data(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean and encode the raw house price data
+
+        Args:
+            dataset (pd.DataFrame): Raw house price dataset from CSV file
+
+        Returns:
+            pd.DataFrame: Cleaned and preprocessed dataset ready for model training
+        """
+        preprocessing = DataPreprocessing()
+        columns = [col for col in dataset.columns if col not in DROPPED_COLUMNS]
+
+        # Step 1: Fill missing counts with the most frequent value
+        modes = {col: dataset[col].mode() for col in MODE_FILLED_COLUMNS}
+        self.modes_ = {col: mode.tolist() for col, mode in modes.items()}
+        raw = {col: dataset[col] for col in columns}
+        for col, mode in modes.items():
+            if len(mode) and raw[col].isna().any():
+                raw[col] = raw[col].fillna(mode.iloc[0])
+
+        # Step 2: Encode categorical variables; missing values become 'Unknow' in FILLED_COLUMNS
+        # and the last code elsewhere, as with LabelEncoder
+        self.categories_ = {}
+        encoded = {}
+        for col in CATEGORICAL_COLUMNS:
+            encoded[col], self.categories_[col] = self.encode_categories(
+                raw[col], 'Unknow' if col in FILLED_COLUMNS else None)
+
+        # Step 3: Flag duplicate rows in one pass; equal codes mean equal filled values
+        key = pd.DataFrame({col: encoded.get(col, raw[col]) for col in columns}, copy=False)
+        keep = ~pd.Series(hash_pandas_object(key, index=False).to_numpy()).duplicated(keep='first').to_numpy()
+        del key
+
+        # Step 4: Convert prices, areas and counts to numbers
+        converted = {
+            'Amount(in rupees)': preprocessing.convert_prices(raw['Amount(in rupees)']),
+            'Carpet Area': preprocessing.convert_areas(raw['Carpet Area']),
+        }
+        for col in MODE_FILLED_COLUMNS:
+            converted[col] = pd.to_numeric(raw[col], errors='coerce')
+
+        # Step 5: Keep the first occurrence of every row, among rows without missing values
+        for col in columns:
+            if col not in encoded:
+                keep &= converted.get(col, raw[col]).notna().to_numpy()
+
+        # Step 6: Select the kept rows once, downcasting the numeric columns
+        result = {}
+        for col in columns:
+            if col in encoded:
+                result[col] = encoded[col][keep]
+            elif col in converted or pd.api.types.is_numeric_dtype(raw[col]):
+                values = converted.get(col, raw[col]).to_numpy()[keep]
+                result[col] = values if col == 'Amount(in rupees)' else self.downcast(values)
+            else:
+                result[col] = raw[col].to_numpy()[keep]
+        return pd.DataFrame(result, index=dataset.index[keep], copy=False)
+
+    @staticmethod
+    def encode_categories(values: pd.Series, fill: Optional[str] = None) -> Tuple[np.ndarray, list]:
+        """
+        Label codes of a column from its categorical representation
+
+        Args:
+            values (pd.Series): Text or categorical column
+            fill (Optional[str]): Category given to missing values; None gives them
+                the code after the last category
+
+        Returns:
+            Tuple[np.ndarray, list]: Codes in the smallest signed integer type, and the
+                sorted categories (without missing values)
+        """
+        categorical = pd.Categorical(values)
+        codes = categorical.codes
+        missing = codes < 0
+        # Categorical columns of cached datasets may list categories that no row uses
+        used = np.bincount(codes[~missing], minlength=len(categorical.categories)) > 0
+        classes = set(categorical.categories[used].tolist())
+        has_missing = bool(missing.any())
+        if fill is not None and has_missing:
+            classes.add(fill)
+        classes = sorted(classes)
+
+        position = {value: i for i, value in enumerate(classes)}
+        mapping = np.array([position.get(value, -1) for value in categorical.categories], dtype=np.int64)
+        n_codes = len(classes) + (has_missing and fill is None)
+        dtype = next(dtype for dtype in (np.int8, np.int16, np.int32, np.int64) if n_codes <= np.iinfo(dtype).max)
+        encoded = mapping[codes].astype(dtype)
+        if has_missing:
+            encoded[missing] = position[fill] if fill is not None else len(classes)
+        return encoded, classes
+
+    @staticmethod
+    def downcast(values: np.ndarray) -> np.ndarray:
+        """
+        Smallest numeric type holding every value exactly
+
+        Integral values become the smallest signed integer type that fits
+        them; other floats become float32 when no value changes.
+
+        Args:
+            values (np.ndarray): Numeric column without missing values
+
+        Returns:
+            np.ndarray: The values, in a smaller type when possible
+        """
+        if not len(values) or values.dtype.kind not in 'iuf':
+            return values
+        if values.dtype.kind == 'f':
+            if not np.isfinite(values).all() or not np.array_equal(values, np.trunc(values)):
+                single = values.astype(np.float32)
+                return single if np.array_equal(single, values, equal_nan=True) else values
+        low, high = values.min(), values.max()
+        for dtype in (np.int8, np.int16, np.int32, np.int64):
+            if np.iinfo(dtype).min <= low and high <= np.iinfo(dtype).max:
+                return values.astype(dtype)
+        return values
+
+
+class ChunkedPreprocessing(DataStrategy):
+    """
+    DataPreprocessing for a dataset read chunk by chunk
+
+    Each chunk is cleaned as soon as it is read, so only one chunk of raw
+    text is in memory at a time; cleaned chunks keep their categorical
+    columns as pandas categoricals until the end. The steps that depend on
+    the whole dataset are split so the result equals DataPreprocessing on
+    the full file:
+    - the Bathroom/Balcony modes come from a first pass over those two columns
+    - duplicates are found from a hash of each raw row, kept until all chunks are read
+    - label codes are assigned once every category has been seen
+    """
+    def handle_data(self, read_chunks: Callable[[Optional[List[str]]], Iterable[pd.DataFrame]]) -> pd.DataFrame:
+        """
+        Clean a chunked dataset
+
+        Args:
+            read_chunks (Callable): Returns a fresh iterator of raw chunks, restricted to
+                the given columns (or all kept columns for None); chunks must carry the
+                row numbers of the file as index, as pd.read_csv(chunksize=...) does
+
+        Returns:
+            pd.DataFrame: Cleaned and preprocessed dataset ready for model training
+        """
+        preprocessing = DataPreprocessing()
+
+        # Step 1: Compute the modes used to fill Bathroom and Balcony with a pass over those columns only
+        modes = self.column_modes(read_chunks(MODE_FILLED_COLUMNS), MODE_FILLED_COLUMNS)
+        self.modes_ = {col: mode.tolist() for col, mode in modes.items()}
+
+        cleaned = []
+        row_hashes = []
+        categories = {col: set() for col in CATEGORICAL_COLUMNS}
+        has_missing = {col: False for col in CATEGORICAL_COLUMNS}
+        for chunk in read_chunks(None):
+            # Steps 2-4 and 6: Fill missing values, hash the raw rows and convert the numeric columns
+            chunk, hashes = self.clean_chunk(chunk, modes, preprocessing)
+
+            # Step 5: Record the categories seen; LabelEncoder is fitted before rows with missing values are dropped
+            for col in CATEGORICAL_COLUMNS:
+                categories[col].update(chunk[col].dropna().unique().tolist())
+                has_missing[col] = has_missing[col] or bool(chunk[col].isna().any())
+
+            # Step 7: Remove rows with missing values (categorical columns are complete once encoded)
+            complete = self.complete_rows(chunk)
+            cleaned.append(chunk[complete])
+            row_hashes.append(hashes[complete])
+
+        if not cleaned:
+            return pd.DataFrame()
+
+        # Step 8: Keep the first occurrence of duplicate rows across all chunks
+        keep = ~pd.Series(np.concatenate(row_hashes)).duplicated(keep='first').to_numpy()
+        bounds = np.cumsum([0] + [len(chunk) for chunk in cleaned])
+
+        # Step 9: Encode categorical variables with the codes LabelEncoder would assign on the full
+        # dataset (categories sorted, missing values as the last class) and copy each chunk into
+        # preallocated columns, releasing it right away instead of concatenating all chunks at the end
+        classes = {col: sorted(values) for col, values in categories.items()}
+        # Kept like DataPreprocessing.categories_, without the missing-value class
+        self.categories_ = classes
+        total = int(keep.sum())
+        columns = {}
+        for col in cleaned[0].columns:
+            dtype = np.int64 if col in categories else np.result_type(*[chunk[col].dtype for chunk in cleaned])
+            columns[col] = np.empty(total, dtype=dtype)
+        index = np.empty(total, dtype=np.int64)
+
+        position = 0
+        for i in range(len(cleaned)):
+            chunk, cleaned[i] = cleaned[i], None
+            chunk = chunk[keep[bounds[i]:bounds[i + 1]]]
+            rows = slice(position, position + len(chunk))
+            for col, values in columns.items():
+                if col in categories:
+                    codes = pd.Categorical(chunk[col], categories=classes[col]).codes
+                    values[rows] = np.where(codes < 0, len(classes[col]), codes) if has_missing[col] else codes
+                else:
+                    values[rows] = chunk[col].to_numpy()
+            index[rows] = chunk.index.to_numpy()
+            position += len(chunk)
+
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    @staticmethod
+    def clean_chunk(chunk: pd.DataFrame, modes: Dict[str, pd.Series],
+                    preprocessing: DataPreprocessing) -> Tuple[pd.DataFrame, np.ndarray]:
+        """
+        Clean one raw chunk, keeping every row and the categorical columns as text
+
+        Args:
+            chunk (pd.DataFrame): Raw chunk as read from the CSV file
+            modes (Dict[str, pd.Series]): Fill values of the count columns (see column_modes)
+            preprocessing (DataPreprocessing): Provides the fill and conversion helpers
+
+        Returns:
+            Tuple[pd.DataFrame, np.ndarray]: Cleaned chunk and the hash of every raw row
+        """
+        chunk = chunk.drop(columns=[col for col in DROPPED_COLUMNS if col in chunk.columns])
+
+        # Step 2: Handle missing values in categorical columns
+        for col in FILLED_COLUMNS:
+            chunk[col] = preprocessing.fill_unknown(chunk[col])
+
+        # Step 3: Fill missing counts with the modes; like DataPreprocessing, the fill is aligned on the row index
+        for col in MODE_FILLED_COLUMNS:
+            chunk[col] = chunk[col].fillna(modes[col])
+
+        # Step 4: Hash the raw rows; duplicates are dropped once all chunks are read.
+        # Identical raw rows clean identically, so dropping them after cleaning gives the same rows
+        hashes = hash_pandas_object(chunk, index=False).to_numpy()
+
+        # Step 6: Convert prices, areas and counts to numbers
+        chunk['Amount(in rupees)'] = preprocessing.convert_prices(chunk['Amount(in rupees)'])
+        chunk['Carpet Area'] = preprocessing.convert_areas(chunk['Carpet Area'])
+        for col in MODE_FILLED_COLUMNS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('float64')
+        return chunk, hashes
+
+    @staticmethod
+    def complete_rows(chunk: pd.DataFrame) -> np.ndarray:
+        # Rows without missing values; categorical columns are complete once encoded
+        return chunk.drop(columns=CATEGORICAL_COLUMNS).notna().all(axis=1).to_numpy()
+
+    @staticmethod
+    def column_modes(chunks: Iterable[pd.DataFrame], columns: List[str]) -> Dict[str, pd.Series]:
+        """
+        Most frequent values of columns read in chunks
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Chunks containing the columns
+            columns (List[str]): Columns to compute the modes of
+
+        Returns:
+            Dict[str, pd.Series]: Per column, the sorted most frequent values, as Series.mode returns them
+        """
+        counts = {col: pd.Series(dtype='float64') for col in columns}
+        for chunk in chunks:
+            for col in columns:
+                counts[col] = counts[col].add(chunk[col].value_counts(), fill_value=0)
+        return {
+            col: pd.Series(sorted(count.index[count == count.max()]), dtype=object)
+            for col, count in counts.items()
+        }
+
+
+class IncrementalPreprocessing(DataStrategy):
+    """
+    DataPreprocessing for new listings, with the state fitted by a previous run
+
+    Missing counts are filled with the modes of the previous run instead of
+    modes of the new listings alone. Categorical columns are left as text:
+    the caller encodes them with the persisted categories, which only grow,
+    so codes seen by the existing model never change.
+    """
+    def __init__(self, modes: Dict[str, list]):
+        """
+        Initialize with the persisted fill values
+
+        Args:
+            modes (Dict[str, list]): Bathroom/Balcony modes of the previous run (DataPreprocessing.modes_)
+        """
+        self.modes = modes
+
+    def handle_data(self, dataset: pd.DataFrame) -> pd.DataFrame:
+        """
+        Clean new listings
+
+        Args:
+            dataset (pd.DataFrame): Raw listings, as read from the CSV file
+
+        Returns:
+            pd.DataFrame: Cleaned listings with numeric columns converted and categorical columns as text
+        """
+        preprocessing = DataPreprocessing()
+
+        # Step 1: Remove columns that don't contribute to prediction
+        dataset = dataset.drop(columns=[col for col in DROPPED_COLUMNS if col in dataset.columns])
+
+        # Step 2: Handle missing values in categorical columns
+        for col in FILLED_COLUMNS:
+            dataset[col] = preprocessing.fill_unknown(dataset[col])
+
+        # Step 3: Fill missing counts with the persisted modes, aligned on the row index like DataPreprocessing
+        for col in MODE_FILLED_COLUMNS:
+            dataset[col] = dataset[col].fillna(pd.Series(self.modes.get(col, []), dtype=object))
+
+        # Step 4: Remove duplicate rows
+        dataset = dataset.drop_duplicates(keep='first')
+
+        # Step 5-7: Convert prices, areas and counts to numbers
+        dataset['Amount(in rupees)'] = preprocessing.convert_prices(dataset['Amount(in rupees)'])
+        dataset['Carpet Area'] = preprocessing.convert_areas(dataset['Carpet Area'])
+        for col in MODE_FILLED_COLUMNS:
+            dataset[col] = pd.to_numeric(dataset[col], errors='coerce')
+
+        # Step 8: Remove rows with missing values; categorical columns may keep missing values,
+        # which the encoder turns into missing features
+        return dataset.dropna(subset=[col for col in dataset.columns if col not in CATEGORICAL_COLUMNS])
+
+
+
+# Preprocessing strategies selectable in clean_df; "lean" returns a smaller frame and, unlike "standard",
+# fills every missing Bathroom/Balcony count, so it keeps more rows (see LeanPreprocessing)
+PREPROCESSING_STRATEGIES = {
+    'standard': DataPreprocessing,
+    'lean': LeanPreprocessing,
+}
+
+
+def get_preprocessing(name: str) -> DataStrategy:
+    """
+    Create a registered preprocessing strategy
+
+    Args:
+        name (str): Key of the strategy in PREPROCESSING_STRATEGIES
+
+    Returns:
+        DataStrategy: Strategy ready for handle_data
+
+    Raises:
+        ValueError: If the name is not registered
+    """
+    if name not in PREPROCESSING_STRATEGIES:
+        raise ValueError(f"Unknown preprocessing '{name}', expected one of {sorted(PREPROCESSING_STRATEGIES)}")
+    return PREPROCESSING_STRATEGIES[name]()
+
 class DataDivision(DataStrategy):
     """
     Concrete implementation for splitting data into training and testing sets
     
     This class handles the division of the preprocessed dataset into training
     and testing subsets. It also applies feature scaling to ensure all features
-    are on the same scale for optimal model performance.
+    are on the same scale for optimal model performance. The rows are split
+    first and the scaler is fitted on the training rows only, so the test rows
+    do not leak into the scaling. Both sets are views of one float32 matrix,
+    filled a chunk of rows at a time, so no full float64 copy of the features
+    is made.
     """
+    def __init__(self, stratify: bool = False, chunk_rows: int = 65536):
+        """
+        Args:
+            stratify (bool): Keep the share of every price band (PRICE_BAND_EDGES) equal in
+                both sets; bands with fewer than two rows join the largest band
+            chunk_rows (int): Rows scaled at a time
+        """
+        self.stratify = stratify
+        self.chunk_rows = chunk_rows
+
     def handle_data(self,dataset : pd.DataFrame) -> Tuple[
     Annotated[pd.DataFrame,"X_train"],
     Annotated[pd.DataFrame,"X_test"],
@@ -171,40 +675,73 @@ class DataDivision(DataStrategy):
         This method performs the following operations:
         1. Select relevant features for model training
         2. Separate features (X) from target variable (y)
-        3. Apply StandardScaler to normalize features
-        4. Split data into training (67%) and testing (33%) sets
-        5. Return the four datasets needed for model training and evaluation
+        3. Split the row positions into training (67%) and testing (33%) sets
+        4. Fit StandardScaler on the training rows
+        5. Scale both sets into one float32 matrix and return the four datasets
+           needed for model training and evaluation
         
         Args:
             dataset (pd.DataFrame): Preprocessed dataset ready for splitting
         
         Returns:
             Tuple containing:
-            - X_train (pd.DataFrame): Scaled training features
-            - X_test (pd.DataFrame): Scaled testing features
+            - X_train (pd.DataFrame): Scaled training features (float32)
+            - X_test (pd.DataFrame): Scaled testing features (float32)
             - y_train (pd.Series): Training target variable (house prices)
             - y_test (pd.Series): Testing target variable (house prices)
         """
-        # Step 1: Select features for model training
+        # Step 1: Select features for model training, as one array per column (no copy)
         # These features were identified as most relevant for house price prediction
-        X = dataset[['Title', 'Bathroom', 'Carpet Area', 'location', 'Transaction', 'Furnishing', 'Balcony','facing','Price (in rupees)',
-             'Status','Society','Floor']]
-        
+        columns = [dataset[col].to_numpy() for col in FEATURE_COLUMNS]
+        self.feature_names_ = list(FEATURE_COLUMNS)
+
         # Step 2: Extract target variable (house prices)
         y = dataset['Amount(in rupees)']
 
-        # Step 3: Apply StandardScaler to normalize features
+        # Step 3: Split the row positions into training (67%) and testing (33%) sets
+        # The random_state ensures reproducible splits across different runs; without
+        # stratification the rows are the ones the split of the full data used to pick
+        bands = None
+        if self.stratify:
+            bands = np.digitize(y.to_numpy(dtype=np.float64), PRICE_BAND_EDGES)
+            counts = np.bincount(bands)
+            bands[counts[bands] < 2] = counts.argmax()
+        train, test = train_test_split(np.arange(len(dataset)), test_size=0.33, random_state=42, stratify=bands)
+
+        # Rows are gathered into one reusable float64 buffer, the precision the scaler works in;
+        # it holds one column after the other, so each column is copied contiguously
+        buffer = np.empty((len(columns), min(self.chunk_rows, len(dataset))))
+
+        def rows(positions: np.ndarray) -> np.ndarray:
+            block = buffer[:, :len(positions)]
+            for j, values in enumerate(columns):
+                block[j] = values[positions]
+            return block.T
+
+        # Step 4: Fit StandardScaler on the training rows, a chunk at a time in dataset order
         # This ensures all features are on the same scale (mean=0, std=1)
-        # Scaling is crucial for algorithms like Random Forest to perform optimally
+        # The fitted scaler is kept in scaler_ so serving can apply the same scaling
         scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
-
-        # Step 4: Convert scaled array back to DataFrame with original column names
-        # This maintains the feature names for easier interpretation
-        X = pd.DataFrame(X_scaled, columns=X.select_dtypes(include='number').columns)
+        is_train = np.zeros(len(dataset), dtype=bool)
+        is_train[train] = True
+        for start in range(0, len(dataset), self.chunk_rows):
+            positions = start + np.flatnonzero(is_train[start:start + self.chunk_rows])
+            if len(positions):
+                scaler.partial_fit(rows(positions))
+        self.scaler_ = scaler
 
-        # Step 5: Split data into training (67%) and testing (33%) sets
-        # The random_state ensures reproducible splits across different runs
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.33, random_state=42)
+        # Step 5: Scale the rows into one contiguous float32 matrix, training rows first
+        # The dataset is read in order and every scaled row is written to its place in the matrix
+        # Models fit on float32 (Random Forest converts to it), so no precision is lost for them
+        destination = np.empty(len(dataset), dtype=np.int64)
+        destination[np.concatenate([train, test])] = np.arange(len(dataset))
+        X = np.empty((len(dataset), len(columns)), dtype=np.float32)
+        for start in range(0, len(dataset), self.chunk_rows):
+            chunk = np.arange(start, min(start + self.chunk_rows, len(dataset)))
+            X[destination[chunk]] = scaler.transform(rows(chunk), copy=False)
 
-        return X_train, X_test, y_train, y_test
\ No newline at end of file
+        # X_train and X_test are views of X, indexed like their targets
+        y_train, y_test = y.iloc[train], y.iloc[test]
+        X_train = pd.DataFrame(X[:len(train)], columns=self.feature_names_, index=y_train.index, copy=False)
+        X_test = pd.DataFrame(X[len(train):], columns=self.feature_names_, index=y_test.index, copy=False)
+        return X_train, X_test, y_train, y_test
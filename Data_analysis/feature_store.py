@@ -0,0 +1,390 @@
+# Out-of-Core Feature Store Module
+# This module cleans, encodes, scales and splits a training CSV too large for memory, chunk by chunk,
+# into float32 feature blocks on disk, and trains one Random Forest on them: every block gets a
+# sub-forest fitted on its memory-mapped rows in a parallel worker, and the sub-forests are merged
+# into one ensemble. Memory is bounded by the chunk and block sizes instead of the number of rows
+import glob
+import json
+import logging
+import math
+import os
+from typing import Callable, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed, effective_n_jobs
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+from Data_analysis.data_cleaning import (
+    CATEGORICAL_COLUMNS,
+    FEATURE_COLUMNS,
+    FILLED_COLUMNS,
+    MODE_FILLED_COLUMNS,
+    ChunkedPreprocessing,
+    DataPreprocessing,
+)
+from Data_analysis.model_dev import RandomForestModel, merge_forests
+from serving.preprocessor import Preprocessor
+
+# Bump when the layout of the store files changes
+STORE_FORMAT_VERSION = 1
+
+# Manifest of a built store: shapes, blocks and the fitted preprocessor
+MANIFEST_FILE = 'store.json'
+
+# Share of the rows held out for evaluation, as in DataDivision
+TEST_SIZE = 0.33
+
+
+class FeatureStore:
+    """
+    Cleaned, encoded and scaled training data kept on disk in float32 blocks
+
+    build reproduces ChunkedPreprocessing followed by DataDivision without
+    ever holding the dataset in memory:
+    1. A pass over the categorical and count columns finds the label classes
+       and the fill values of the counts
+    2. A pass over the whole CSV cleans every chunk and appends its complete
+       rows (features, price and raw row hash) to staging files
+    3. Duplicate rows are found by partitioning the hashes into buckets on disk
+    4. A pass over the staging files draws the test rows and fits the scaler
+       on the kept training rows, as DataDivision does
+    5. A last pass scales the kept rows to float32 and appends them to the
+       test file or to one of the training blocks
+
+    Training rows are dealt to the blocks in turn, so each block is a sample
+    of the whole file even when the CSV is sorted (e.g. by location). Every
+    block becomes a sub-forest (see train_forest).
+    """
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): Directory of the store files
+        """
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def build(self, read_chunks: Callable[[Optional[List[str]]], Iterable[pd.DataFrame]],
+              block_rows: int = 1000000, chunk_rows: int = 100000, seed: int = 42) -> 'FeatureStore':
+        """
+        Clean and split a chunked dataset into the store
+
+        Args:
+            read_chunks (Callable): Returns a fresh iterator of raw chunks, as for ChunkedPreprocessing
+            block_rows (int): Most training rows per block, i.e. per sub-forest
+            chunk_rows (int): Rows read from the staging files at a time
+            seed (int): Seed of the train/test split
+
+        Returns:
+            FeatureStore: The store, with categories_, modes_, scaler_ and feature_names_ set
+                like ChunkedPreprocessing and DataDivision
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        preprocessing = DataPreprocessing()
+        n_features = len(FEATURE_COLUMNS)
+
+        # Step 1: Label classes and count modes from the columns they need
+        categories = {col: set() for col in CATEGORICAL_COLUMNS}
+
+        def record_categories(chunks):
+            for chunk in chunks:
+                for col in FILLED_COLUMNS:
+                    chunk[col] = preprocessing.fill_unknown(chunk[col])
+                for col in CATEGORICAL_COLUMNS:
+                    categories[col].update(chunk[col].dropna().unique().tolist())
+                yield chunk
+
+        modes = ChunkedPreprocessing.column_modes(
+            record_categories(read_chunks(CATEGORICAL_COLUMNS + MODE_FILLED_COLUMNS)), MODE_FILLED_COLUMNS)
+        self.modes_ = {col: mode.tolist() for col, mode in modes.items()}
+        self.categories_ = {col: sorted(values) for col, values in categories.items()}
+        self.feature_names_ = list(FEATURE_COLUMNS)
+
+        # Step 2: Clean every chunk and stage its complete rows, features encoded but not scaled
+        n_staged = 0
+        with open(self.path('staged.features.f64'), 'wb') as features, \
+                open(self.path('staged.target.f64'), 'wb') as target, \
+                open(self.path('staged.hashes.u64'), 'wb') as hashes:
+            for chunk in read_chunks(None):
+                chunk, row_hashes = ChunkedPreprocessing.clean_chunk(chunk, modes, preprocessing)
+                complete = ChunkedPreprocessing.complete_rows(chunk)
+                chunk = chunk[complete]
+                X = np.empty((len(chunk), n_features))
+                for j, col in enumerate(FEATURE_COLUMNS):
+                    if col in self.categories_:
+                        # Missing categories get the code after the last class, as LabelEncoder sorts NaN last
+                        codes = pd.Categorical(chunk[col], categories=self.categories_[col]).codes
+                        X[:, j] = np.where(codes < 0, len(self.categories_[col]), codes)
+                    else:
+                        X[:, j] = chunk[col].to_numpy(dtype=np.float64)
+                X.tofile(features)
+                chunk['Amount(in rupees)'].to_numpy(dtype=np.float64).tofile(target)
+                row_hashes[complete].astype(np.uint64).tofile(hashes)
+                n_staged += len(chunk)
+
+        # Step 3: Positions of the repeated rows; the first occurrence is kept
+        duplicates = self.duplicate_rows(self.path('staged.hashes.u64'), n_staged, chunk_rows)
+        os.remove(self.path('staged.hashes.u64'))
+
+        def staged_slices():
+            # Kept rows of the staging files, chunk_rows at a time, with their slice number
+            for number, start in enumerate(range(0, n_staged, chunk_rows)):
+                stop = min(start + chunk_rows, n_staged)
+                X = read_rows(self.path('staged.features.f64'), np.float64, n_features, start, stop)
+                y = read_rows(self.path('staged.target.f64'), np.float64, 1, start, stop)[:, 0]
+                repeated = duplicates[np.searchsorted(duplicates, start):np.searchsorted(duplicates, stop)]
+                keep = np.ones(stop - start, dtype=bool)
+                keep[repeated - start] = False
+                yield number, X[keep], y[keep]
+
+        def test_rows(number: int, n_rows: int) -> np.ndarray:
+            # Same draw in steps 4 and 5: the generator is seeded with the slice number
+            return np.random.default_rng([seed, number]).random(n_rows) < TEST_SIZE
+
+        # Step 4: Draw the test rows and fit the scaler on the training rows
+        scaler = StandardScaler()
+        n_train = n_test = 0
+        for number, X, y in staged_slices():
+            test = test_rows(number, len(X))
+            if (~test).any():
+                scaler.partial_fit(X[~test])
+            n_test += int(test.sum())
+            n_train += len(X) - int(test.sum())
+        if n_train == 0:
+            raise ValueError('No training rows left after cleaning')
+        self.scaler_ = scaler
+
+        # Step 5: Scale to float32 and deal the training rows to the blocks in turn
+        n_blocks = max(1, math.ceil(n_train / block_rows))
+        for stale in glob.glob(self.path('block_*')):
+            os.remove(stale)
+        block_sizes = np.zeros(n_blocks, dtype=np.int64)
+        position = 0
+        with open(self.path('test.features.f32'), 'wb') as test_features, \
+                open(self.path('test.target.f64'), 'wb') as test_target:
+            for number, X, y in staged_slices():
+                X = scaler.transform(X).astype(np.float32)
+                test = test_rows(number, len(X))
+                X[test].tofile(test_features)
+                y[test].tofile(test_target)
+                block = (position + np.arange(len(X) - int(test.sum()))) % n_blocks
+                position += len(block)
+                X_train, y_train = X[~test], y[~test]
+                for b in np.unique(block):
+                    rows = block == b
+                    with open(self.block_path(b, 'features.f32'), 'ab') as f:
+                        X_train[rows].tofile(f)
+                    with open(self.block_path(b, 'target.f64'), 'ab') as f:
+                        y_train[rows].tofile(f)
+                    block_sizes[b] += int(rows.sum())
+        os.remove(self.path('staged.features.f64'))
+        os.remove(self.path('staged.target.f64'))
+
+        # The manifest is written last: a store without it is incomplete
+        self.manifest = {
+            'format_version': STORE_FORMAT_VERSION,
+            'feature_names': self.feature_names_,
+            'block_rows': block_sizes.tolist(),
+            'test_rows': n_test,
+            'preprocessor': Preprocessor.from_fitted(self.categories_, scaler, self.feature_names_,
+                                                     self.modes_).to_dict(),
+        }
+        with open(self.path(MANIFEST_FILE + '.tmp'), 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(self.path(MANIFEST_FILE + '.tmp'), self.path(MANIFEST_FILE))
+        logging.info(f'Feature store {self.directory}: {n_staged - len(duplicates)} rows, '
+                     f'{n_train} for training in {n_blocks} blocks, {n_test} for testing')
+        return self
+
+    @classmethod
+    def load(cls, directory: str) -> 'FeatureStore':
+        """
+        Open a store written by build
+
+        Args:
+            directory (str): Directory of the store files
+
+        Returns:
+            FeatureStore: Store ready for block and test_sample
+
+        Raises:
+            ValueError: If the store is missing or was written in another format
+        """
+        store = cls(directory)
+        if not os.path.exists(store.path(MANIFEST_FILE)):
+            raise ValueError(f'No feature store in {directory}')
+        with open(store.path(MANIFEST_FILE)) as f:
+            store.manifest = json.load(f)
+        if store.manifest.get('format_version') != STORE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported feature store version {store.manifest.get('format_version')}")
+        store.feature_names_ = store.manifest['feature_names']
+        return store
+
+    @property
+    def n_blocks(self) -> int:
+        return len(self.manifest['block_rows'])
+
+    def block_path(self, block: int, kind: str) -> str:
+        return self.path(f'block_{block:05d}.{kind}')
+
+    def block(self, block: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Memory-map the training rows of one block
+
+        Args:
+            block (int): Block number
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Read-only float32 features (rows x features) and float64 prices
+        """
+        n_rows = self.manifest['block_rows'][block]
+        X = np.memmap(self.block_path(block, 'features.f32'), dtype=np.float32, mode='r',
+                      shape=(n_rows, len(self.feature_names_)))
+        y = np.memmap(self.block_path(block, 'target.f64'), dtype=np.float64, mode='r', shape=(n_rows,))
+        return X, y
+
+    def test_sample(self, max_rows: int = 0, seed: int = 42) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Load the test rows, or an evenly drawn sample of them
+
+        Args:
+            max_rows (int): Most rows returned, 0 for all of them
+            seed (int): Seed of the sample
+
+        Returns:
+            Tuple[pd.DataFrame, pd.Series]: Test features (float64, like DataDivision) and prices
+        """
+        n_rows = self.manifest['test_rows']
+        X = np.memmap(self.path('test.features.f32'), dtype=np.float32, mode='r',
+                      shape=(n_rows, len(self.feature_names_))) if n_rows else np.empty((0, len(self.feature_names_)))
+        y = np.memmap(self.path('test.target.f64'), dtype=np.float64, mode='r', shape=(n_rows,)) if n_rows else np.empty(0)
+        rows = np.arange(n_rows)
+        if 0 < max_rows < n_rows:
+            rows = np.sort(np.random.default_rng(seed).choice(n_rows, max_rows, replace=False))
+        return (pd.DataFrame(X[rows].astype(np.float64), columns=self.feature_names_),
+                pd.Series(y[rows], name='Amount(in rupees)'))
+
+    def duplicate_rows(self, hashes_path: str, n_rows: int, chunk_rows: int) -> np.ndarray:
+        """
+        Positions of the rows whose hash appeared at an earlier position
+
+        The hashes are split on their leading bits into bucket files of
+        about chunk_rows entries each, then every bucket is deduplicated in
+        memory; only the positions of the repeated rows are kept.
+
+        Args:
+            hashes_path (str): File of uint64 row hashes
+            n_rows (int): Number of hashes in the file
+            chunk_rows (int): Hashes read at a time, and the target size of a bucket
+
+        Returns:
+            np.ndarray: Sorted positions of the repeated rows
+        """
+        bits = min(8, max(0, math.ceil(math.log2(max(1, n_rows / chunk_rows)))))
+        entry = np.dtype([('hash', np.uint64), ('position', np.int64)])
+        buckets = [self.path(f'staged.bucket_{b:03d}') for b in range(2 ** bits)]
+        for bucket in buckets:
+            open(bucket, 'wb').close()
+        for start in range(0, n_rows, chunk_rows):
+            stop = min(start + chunk_rows, n_rows)
+            entries = np.empty(stop - start, dtype=entry)
+            entries['hash'] = read_rows(hashes_path, np.uint64, 1, start, stop)[:, 0]
+            entries['position'] = np.arange(start, stop)
+            number = (entries['hash'] >> np.uint64(64 - bits)).astype(np.int64) if bits else np.zeros(len(entries), int)
+            order = np.argsort(number, kind='stable')
+            bounds = np.searchsorted(number[order], np.arange(len(buckets) + 1))
+            for b, bucket in enumerate(buckets):
+                if bounds[b + 1] > bounds[b]:
+                    with open(bucket, 'ab') as f:
+                        entries[order[bounds[b]:bounds[b + 1]]].tofile(f)
+
+        repeated = []
+        for bucket in buckets:
+            # Positions were appended in increasing order, so the first occurrence comes first
+            entries = np.fromfile(bucket, dtype=entry)
+            repeated.append(entries['position'][pd.Series(entries['hash']).duplicated(keep='first').to_numpy()])
+            os.remove(bucket)
+        return np.sort(np.concatenate(repeated))
+
+
+def read_rows(path: str, dtype, n_columns: int, start: int, stop: int) -> np.ndarray:
+    """
+    Read rows start to stop of a raw row-major matrix file, without mapping the rest
+
+    Args:
+        path (str): File written with ndarray.tofile
+        dtype: Element type
+        n_columns (int): Values per row
+        start (int): First row
+        stop (int): Row after the last
+
+    Returns:
+        np.ndarray: Array of shape (stop - start, n_columns)
+    """
+    itemsize = np.dtype(dtype).itemsize
+    values = np.fromfile(path, dtype=dtype, count=(stop - start) * n_columns, offset=start * n_columns * itemsize)
+    return values.reshape(stop - start, n_columns)
+
+
+def fit_block(directory: str, block: int, params: dict) -> RandomForestRegressor:
+    """
+    Fit the sub-forest of one block, in a worker process
+
+    The worker opens the store itself, so only the directory and the block
+    number are sent to it; the block's features are memory-mapped.
+
+    Args:
+        directory (str): Directory of the store
+        block (int): Block number
+        params (dict): RandomForestRegressor hyperparameters of this sub-forest
+
+    Returns:
+        RandomForestRegressor: Sub-forest fitted on the block
+    """
+    store = FeatureStore.load(directory)
+    X, y = store.block(block)
+    forest = RandomForestRegressor(**params)
+    forest.fit(pd.DataFrame(X, columns=store.feature_names_, copy=False), y)
+    return forest
+
+
+def train_forest(directory: str, params: Optional[dict] = None) -> RandomForestRegressor:
+    """
+    Train a Random Forest on a feature store, one sub-forest per block
+
+    The n_estimators trees are shared out between the blocks (at least one
+    each) and every sub-forest is fitted in its own worker on its block;
+    n_jobs sets the number of workers, so peak memory is about n_jobs
+    blocks. With a single block, the forest is fitted on all cores exactly
+    as RandomForestModel.train would fit it on the training rows.
+
+    Args:
+        directory (str): Directory of a store written by FeatureStore.build
+        params (Optional[dict]): Hyperparameters overriding the RandomForestModel defaults
+
+    Returns:
+        RandomForestRegressor: Merged forest, predicting the mean of all trees
+    """
+    store = FeatureStore.load(directory)
+    params = RandomForestModel(**(params or {})).params
+    n_estimators = params.get('n_estimators', RandomForestRegressor().n_estimators)
+    n_blocks = store.n_blocks
+    if n_blocks > n_estimators:
+        logging.warning(f'{n_blocks} blocks for {n_estimators} trees: fitting one tree per block')
+
+    # Trees per block, and the seed of each sub-forest derived from the configured one
+    trees = [len(part) for part in np.array_split(np.arange(max(n_estimators, n_blocks)), n_blocks)]
+    seed = params.get('random_state')
+    workers = min(n_blocks, effective_n_jobs(params.get('n_jobs')))
+    sub_params = [{
+        **params,
+        'n_estimators': trees[block],
+        'random_state': seed + block if isinstance(seed, int) else seed,
+        'n_jobs': params.get('n_jobs') if n_blocks == 1 else 1,
+    } for block in range(n_blocks)]
+
+    logging.info(f'Training {n_blocks} sub-forests of {trees[0]} trees with {workers} workers')
+    forests = Parallel(n_jobs=workers)(
+        delayed(fit_block)(directory, block, sub_params[block]) for block in range(n_blocks))
+    return merge_forests(forests, n_jobs=params.get('n_jobs'))
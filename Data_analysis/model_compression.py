@@ -0,0 +1,237 @@
+# Model Compression Module
+# This module shrinks a trained random forest for serving: trees are cut at a maximum depth,
+# redundant trees are dropped and the flat export can store thresholds and leaf values as float32
+# Compressed forests are ordinary RandomForestRegressor objects, so model.pkl and forest.bin work as before
+import copy
+import os
+import tempfile
+import time
+from typing import List, Optional
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from serving.forest import FlatForest, export_forest
+
+
+class CompressionVariant:
+    """
+    One way of compressing a forest, written as a specification string
+
+    The specification is a comma-separated list of settings, e.g.
+    "depth=12,trees=40,float32"; "full" is the uncompressed forest.
+    - depth=N: cut every tree at depth N (deeper nodes are merged into their ancestor)
+    - trees=N: keep the N trees that best reproduce the predictions of the whole forest
+    - float32: store thresholds and leaf values of the flat forest as float32
+    """
+    def __init__(self, spec: str):
+        """
+        Parse a variant specification
+
+        Args:
+            spec (str): Specification string
+
+        Raises:
+            ValueError: If a setting is not recognized
+        """
+        self.spec = spec
+        self.max_depth = None
+        self.n_trees = None
+        self.float32 = False
+        for setting in filter(None, (part.strip() for part in spec.split(','))):
+            key, _, value = setting.partition('=')
+            if key == 'depth':
+                self.max_depth = int(value)
+            elif key == 'trees':
+                self.n_trees = int(value)
+            elif key == 'float32' and not value:
+                self.float32 = True
+            elif key != 'full':
+                raise ValueError(f"Unknown compression setting '{setting}' in '{spec}'")
+
+    def apply(self, model: RandomForestRegressor, X_reference: pd.DataFrame) -> RandomForestRegressor:
+        """
+        Compress a fitted forest
+
+        Args:
+            model (RandomForestRegressor): Fitted forest, left unchanged
+            X_reference (pd.DataFrame): Rows used to choose the trees to keep (training rows)
+
+        Returns:
+            RandomForestRegressor: Compressed forest (the model itself when nothing is compressed)
+        """
+        if self.max_depth is not None:
+            model = cap_depth(model, self.max_depth)
+        if self.n_trees is not None and self.n_trees < len(model.estimators_):
+            model = select_trees(model, X_reference, self.n_trees)
+        return model
+
+
+def truncate_tree(tree, max_depth: int):
+    """
+    Copy of a fitted sklearn tree structure cut at max_depth
+
+    Nodes at max_depth become leaves. Regression trees store at every node
+    the mean target of its training samples, so the new leaves predict
+    exactly what a tree grown with max_depth would.
+
+    Args:
+        tree: sklearn.tree._tree.Tree of a fitted regressor
+        max_depth (int): Maximum depth of the copy
+
+    Returns:
+        sklearn.tree._tree.Tree: Truncated tree
+    """
+    state = tree.__getstate__()
+    nodes, values = state['nodes'], state['values']
+    left, right = nodes['left_child'], nodes['right_child']
+
+    # Depth of every node, one level at a time (children always have larger ids than their parent)
+    depth = np.zeros(len(nodes), dtype=np.int64)
+    level = np.array([0])
+    while level.size:
+        internal = level[left[level] >= 0]
+        children = np.concatenate([left[internal], right[internal]])
+        depth[children] = depth[np.concatenate([internal, internal])] + 1
+        level = children
+
+    keep = depth <= max_depth
+    new_id = np.cumsum(keep) - 1
+    nodes = nodes[keep].copy()
+    cut = (depth[keep] == max_depth) | (nodes['left_child'] < 0)
+    nodes['left_child'] = np.where(cut, -1, new_id[np.maximum(nodes['left_child'], 0)])
+    nodes['right_child'] = np.where(cut, -1, new_id[np.maximum(nodes['right_child'], 0)])
+    nodes['feature'][cut] = -2
+    nodes['threshold'][cut] = -2.0
+
+    # Rebuild a Tree through its pickling protocol, which is stable across sklearn versions
+    cls, args = tree.__reduce__()[:2]
+    truncated = cls(*args)
+    truncated.__setstate__({
+        'max_depth': int(min(state['max_depth'], max_depth)),
+        'node_count': int(keep.sum()),
+        'nodes': nodes,
+        'values': np.ascontiguousarray(values[keep]),
+    })
+    return truncated
+
+
+def cap_depth(model: RandomForestRegressor, max_depth: int) -> RandomForestRegressor:
+    """
+    Forest with every tree cut at max_depth
+
+    Args:
+        model (RandomForestRegressor): Fitted forest, left unchanged
+        max_depth (int): Maximum depth of the trees
+
+    Returns:
+        RandomForestRegressor: Forest of truncated trees
+    """
+    estimators = []
+    for estimator in model.estimators_:
+        estimator = copy.copy(estimator)
+        estimator.tree_ = truncate_tree(estimator.tree_, max_depth)
+        estimators.append(estimator)
+    compressed = copy.copy(model)
+    compressed.estimators_ = estimators
+    return compressed
+
+
+def select_trees(model: RandomForestRegressor, X_reference: pd.DataFrame, n_trees: int) -> RandomForestRegressor:
+    """
+    Forest of the n_trees trees that best reproduce the whole forest
+
+    Trees are added greedily: at each step, the tree whose addition brings
+    the mean of the selected trees closest (in squared error) to the
+    prediction of the whole forest on the reference rows. Trees that only
+    repeat what the selected ones already say are left out. No labels are
+    needed, so the test set stays untouched.
+
+    Args:
+        model (RandomForestRegressor): Fitted forest, left unchanged
+        X_reference (pd.DataFrame): Reference rows, e.g. a sample of the training data
+        n_trees (int): Trees to keep
+
+    Returns:
+        RandomForestRegressor: Forest of the selected trees
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        export_forest(model, os.path.join(directory, 'forest'))
+        per_tree = FlatForest.load(os.path.join(directory, 'forest'), mmap=False).predict_per_tree(X_reference)
+    target = per_tree.mean(axis=1)
+
+    selected = []
+    total = np.zeros(len(per_tree))
+    available = np.ones(per_tree.shape[1], dtype=bool)
+    for k in range(1, n_trees + 1):
+        # Squared error of the mean of the selected trees plus each candidate
+        errors = (((total[:, None] + per_tree) / k - target[:, None]) ** 2).sum(axis=0)
+        errors[~available] = np.inf
+        best = int(np.argmin(errors))
+        selected.append(best)
+        available[best] = False
+        total += per_tree[:, best]
+
+    compressed = copy.copy(model)
+    compressed.estimators_ = [model.estimators_[i] for i in sorted(selected)]
+    compressed.n_estimators = n_trees
+    return compressed
+
+
+def forest_report(model: RandomForestRegressor, float32: bool, X_test: pd.DataFrame,
+                  latency_rows: int = 200, batch_rows: int = 1000) -> dict:
+    """
+    Size and latency of a forest as served, and its predictions on the test set
+
+    The forest is exported to a temporary directory and loaded as the API
+    loads it; latencies are medians of repeated FlatForest.predict calls.
+
+    Args:
+        model (RandomForestRegressor): Forest to measure
+        float32 (bool): Export thresholds and leaf values as float32
+        X_test (pd.DataFrame): Test features
+        latency_rows (int): Single-row predictions timed
+        batch_rows (int): Rows of the timed batch prediction
+
+    Returns:
+        dict: n_trees, n_nodes, pickle_mb, flat_mb, single_row_us, batch_ms and
+            predictions (the flat forest predictions on X_test)
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_path = os.path.join(directory, 'model.pkl')
+        joblib.dump(model, pickle_path)
+        forest_path = os.path.join(directory, 'forest')
+        export_forest(model, forest_path, float32=float32)
+        flat_bytes = os.path.getsize(forest_path + '.bin') + os.path.getsize(forest_path + '.json')
+
+        forest = FlatForest.load(forest_path, mmap=False)
+        X = np.ascontiguousarray(X_test[forest.feature_names_in_], dtype=np.float32)
+        predictions = forest.predict(X)
+
+        single = []
+        for i in range(min(latency_rows, len(X))):
+            start = time.perf_counter()
+            forest.predict(X[i:i + 1])
+            single.append(time.perf_counter() - start)
+        batch = X[:batch_rows]
+        timings = []
+        for _ in range(5):
+            start = time.perf_counter()
+            forest.predict(batch)
+            timings.append(time.perf_counter() - start)
+
+        return {
+            'n_trees': len(model.estimators_),
+            'n_nodes': int(sum(estimator.tree_.node_count for estimator in model.estimators_)),
+            'pickle_mb': os.path.getsize(pickle_path) / 2 ** 20,
+            'flat_mb': flat_bytes / 2 ** 20,
+            'single_row_us': float(np.median(single) * 1e6),
+            'batch_ms': float(np.median(timings) * 1e3),
+            'predictions': predictions,
+        }
+
+
+def parse_variants(specs: Optional[List[str]]) -> List[CompressionVariant]:
+    # The uncompressed forest always comes first: it is the reference of the accuracy deltas
+    variants = [CompressionVariant(spec) for spec in (specs or [])]
+    return [CompressionVariant('full')] + [variant for variant in variants if variant.spec != 'full']
@@ -1,8 +1,11 @@
 # Model Development Module
-# This module contains the model training implementation using Random Forest Regressor
-# It follows the Strategy pattern with an abstract Model class and concrete RandomForestModel implementation
+# This module contains the model training implementations and the registry used to select one by name
+# It follows the Strategy pattern with an abstract Model class and concrete implementations
+# (RandomForestModel, HistGradientBoostingModel) whose hyperparameters come from the pipeline configuration
 import logging
+from typing import List, Optional
 import pandas as pd
+from sklearn.ensemble import HistGradientBoostingRegressor
 from sklearn.ensemble import RandomForestRegressor
 
 class Model:
@@ -12,7 +15,23 @@ class Model:
     This class follows the Strategy pattern, allowing different model types
     to be easily swapped in and out of the pipeline. All concrete model
     implementations must inherit from this class and implement the train method.
+    Hyperparameters given at construction override the defaults of the
+    concrete class and are passed to the underlying estimator.
     """
+    # Hyperparameters used when the configuration does not set them
+    default_params = {}
+    # scikit-learn class of the trained model, used to find the Model that can update it
+    estimator = None
+
+    def __init__(self, **params):
+        """
+        Initialize the model with hyperparameters
+
+        Args:
+            **params: Keyword arguments of the underlying scikit-learn estimator
+        """
+        self.params = {**self.default_params, **params}
+
     def train(self):
         """
         Abstract method that must be implemented by concrete model classes
@@ -22,6 +41,24 @@ class Model:
         """
         pass
 
+    @staticmethod
+    def update(model, X_new: pd.DataFrame, y_new: pd.Series, n_new: int):
+        """
+        Extend a trained model with new estimators fitted on new data
+
+        Implemented by the models that support incremental retraining.
+
+        Args:
+            model: Model returned by train (or by a previous update)
+            X_new (pd.DataFrame): New training features, encoded and scaled like the original ones
+            y_new (pd.Series): New target values
+            n_new (int): Estimators (trees, boosting iterations) to add
+
+        Returns:
+            The updated model
+        """
+        raise NotImplementedError(f'{type(model).__name__} cannot be updated incrementally')
+
 
 class RandomForestModel(Model):
     """
@@ -31,14 +68,22 @@ class RandomForestModel(Model):
     decision trees during training and outputs the mean prediction of the
     individual trees. This approach helps reduce overfitting and provides
     good performance for regression tasks like house price prediction.
+
+    Trees are fitted on all cores by default (n_jobs=-1). The random state
+    of every tree is drawn before fitting starts, so the trained forest is
+    the same whatever n_jobs is.
     """
+    default_params = {'random_state': 42, 'n_jobs': -1}
+    estimator = RandomForestRegressor
+
     def train(self,X_train : pd.DataFrame,y_train : pd.Series) -> RandomForestRegressor:
         """
         Train a Random Forest Regressor on the provided training data
         
-        This method initializes a Random Forest model with default hyperparameters
-        and fits it to the training data. The random_state is set to 42 for
-        reproducibility across different runs.
+        This method initializes a Random Forest model with the configured
+        hyperparameters (scikit-learn defaults otherwise) and fits it to the
+        training data. The random_state is set to 42 for reproducibility
+        across different runs.
         
         Args:
             X_train (pd.DataFrame): Training features (scaled and encoded)
@@ -52,15 +97,176 @@ class RandomForestModel(Model):
         """
         try:
             # Initialize Random Forest Regressor with fixed random state for reproducibility
-            # Default hyperparameters are used, but these could be optimized through
-            # hyperparameter tuning in a production environment
-            rf_model = RandomForestRegressor(random_state=42)
+            # Hyperparameters not set in the configuration keep their scikit-learn defaults
+            rf_model = RandomForestRegressor(**self.params)
             
             # Fit the model to the training data
-            # This trains multiple decision trees and combines their predictions
+            # This trains multiple decision trees (in parallel with n_jobs) and combines their predictions
             rf_model.fit(X_train,y_train)
             
             return rf_model
         except Exception as e:
             logging.error(f'Error while training the Random Forest model: {e}')
-            raise e
\ No newline at end of file
+            raise e
+
+    @staticmethod
+    def update(model: RandomForestRegressor, X_new: pd.DataFrame, y_new: pd.Series,
+               n_new: int) -> RandomForestRegressor:
+        """
+        Add n_new trees fitted on the new data to a trained forest
+
+        The existing trees are kept as they are (warm_start), so the forest
+        predicts the mean of the old trees and of the trees grown on the new
+        listings. Listings removed from the data are not forgotten.
+
+        Args:
+            model (RandomForestRegressor): Trained forest, updated in place
+            X_new (pd.DataFrame): New training features
+            y_new (pd.Series): New target values
+            n_new (int): Trees to add
+
+        Returns:
+            RandomForestRegressor: The forest with its new trees
+        """
+        try:
+            # Saved models predict single-threaded (see steps/train_model.py): the new trees use all cores again
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new,
+                             n_jobs=RandomForestModel.default_params['n_jobs'])
+            model.fit(X_new, y_new)
+            # A later full fit should start from scratch
+            model.set_params(warm_start=False)
+            return model
+        except Exception as e:
+            logging.error(f'Error while updating the Random Forest model: {e}')
+            raise e
+
+
+class HistGradientBoostingModel(Model):
+    """
+    Concrete implementation of the Model interface using Histogram-based Gradient Boosting
+
+    Features are binned into at most 256 integer bins once, and every tree
+    is grown from per-bin gradient histograms computed on all cores with
+    OpenMP. On large training sets this is much faster than an exact random
+    forest and uses far less memory, since the trees stay shallow and no
+    bootstrap copies of the data are made.
+    """
+    default_params = {'random_state': 42}
+    estimator = HistGradientBoostingRegressor
+
+    def train(self, X_train: pd.DataFrame, y_train: pd.Series) -> HistGradientBoostingRegressor:
+        """
+        Train a Histogram-based Gradient Boosting Regressor on the provided training data
+
+        Args:
+            X_train (pd.DataFrame): Training features (scaled and encoded)
+            y_train (pd.Series): Training target variable (house prices)
+
+        Returns:
+            HistGradientBoostingRegressor: Trained model ready for predictions
+
+        Raises:
+            Exception: If there's an error during model training
+        """
+        try:
+            hgb_model = HistGradientBoostingRegressor(**self.params)
+            hgb_model.fit(X_train, y_train)
+            return hgb_model
+        except Exception as e:
+            logging.error(f'Error while training the Histogram Gradient Boosting model: {e}')
+            raise e
+
+    @staticmethod
+    def update(model: HistGradientBoostingRegressor, X_new: pd.DataFrame, y_new: pd.Series,
+               n_new: int) -> HistGradientBoostingRegressor:
+        """
+        Continue boosting a trained model for n_new iterations on the new data
+
+        The new trees fit the residuals of the current model on the new
+        listings (warm_start); the trees already built are unchanged.
+
+        Args:
+            model (HistGradientBoostingRegressor): Trained model, updated in place
+            X_new (pd.DataFrame): New training features
+            y_new (pd.Series): New target values
+            n_new (int): Boosting iterations to add
+
+        Returns:
+            HistGradientBoostingRegressor: The model with its new trees
+        """
+        try:
+            model.set_params(warm_start=True, max_iter=model.n_iter_ + n_new)
+            model.fit(X_new, y_new)
+            model.set_params(warm_start=False)
+            return model
+        except Exception as e:
+            logging.error(f'Error while updating the Histogram Gradient Boosting model: {e}')
+            raise e
+
+
+# Models selectable by name in the pipeline configuration
+MODELS = {
+    'random_forest': RandomForestModel,
+    'hist_gradient_boosting': HistGradientBoostingModel,
+}
+
+
+def get_model(name: str, params: Optional[dict] = None) -> Model:
+    """
+    Create a registered model with its hyperparameters
+
+    Args:
+        name (str): Key of the model in MODELS
+        params (Optional[dict]): Hyperparameters overriding the model defaults
+
+    Returns:
+        Model: Model ready for train
+
+    Raises:
+        ValueError: If the name is not registered
+    """
+    if name not in MODELS:
+        raise ValueError(f"Unknown model '{name}', expected one of {sorted(MODELS)}")
+    return MODELS[name](**(params or {}))
+
+
+def merge_forests(forests: List[RandomForestRegressor], n_jobs: Optional[int] = None) -> RandomForestRegressor:
+    """
+    Merge forests fitted on the same features into one forest predicting the mean of all their trees
+
+    Args:
+        forests (List[RandomForestRegressor]): Fitted forests; the first one is extended in place
+        n_jobs (Optional[int]): n_jobs of the merged forest, used when it predicts
+
+    Returns:
+        RandomForestRegressor: Forest holding the trees of every forest
+    """
+    merged = forests[0]
+    for forest in forests[1:]:
+        if list(forest.feature_names_in_) != list(merged.feature_names_in_):
+            raise ValueError('Forests trained on different features cannot be merged')
+        merged.estimators_.extend(forest.estimators_)
+    merged.set_params(n_estimators=len(merged.estimators_), n_jobs=n_jobs)
+    return merged
+
+
+def update_model(model, X_new: pd.DataFrame, y_new: pd.Series, n_new: int):
+    """
+    Add n_new estimators fitted on new data to a trained model of a registered class
+
+    Args:
+        model: Trained scikit-learn model
+        X_new (pd.DataFrame): New training features
+        y_new (pd.Series): New target values
+        n_new (int): Estimators to add
+
+    Returns:
+        The updated model
+
+    Raises:
+        ValueError: If no registered model trains this class of estimator
+    """
+    for model_class in MODELS.values():
+        if type(model) is model_class.estimator:
+            return model_class.update(model, X_new, y_new, n_new)
+    raise ValueError(f'No registered model can update a {type(model).__name__}')
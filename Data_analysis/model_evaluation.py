@@ -0,0 +1,225 @@
+# Model Evaluation Module
+# This module computes the regression metrics of evalutemodel in one pass over contiguous NumPy arrays,
+# with bootstrap confidence intervals and metrics per segment (location, furnishing, price band)
+# Every metric is derived from a few per-row sums, so the bootstrap and the segments reuse the same pass
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+# Price bands of the per-segment report, shared with the stratified split of DataDivision
+from Data_analysis.data_cleaning import PRICE_BAND_EDGES, PRICE_BAND_LABELS
+from serving.forest import FlatForest
+from serving.preprocessor import Preprocessor
+
+# Per-row statistics summed for every metric: row count, shifted target, its square,
+# squared error, absolute error and absolute percentage error
+SUM_COLUMNS = ('rows', 'y', 'y2', 'squared_error', 'absolute_error', 'percentage_error')
+
+# Metrics reported for every evaluated model and segment
+METRIC_NAMES = ('r2_score', 'rmse', 'mae', 'mape')
+
+# Categorical columns broken down in the per-segment report
+SEGMENT_COLUMNS = ['location', 'Furnishing']
+
+# Bootstrap weights are Poisson(1) counts drawn by inverse CDF from 16-bit uniform integers:
+# a table lookup is several times faster than Generator.poisson and the quantization
+# (probabilities in steps of 1/65536) is far below the bootstrap's own noise
+_POISSON_CDF = np.cumsum([math.exp(-1) / math.factorial(k) for k in range(20)])
+_POISSON_TABLE = np.searchsorted(_POISSON_CDF, (np.arange(2 ** 16) + 0.5) / 2 ** 16).astype(np.float64)
+
+
+def row_statistics(y_true: np.ndarray, predictions: np.ndarray, shift: float) -> np.ndarray:
+    """
+    Per-row statistics in SUM_COLUMNS order, one contiguous row per statistic
+
+    Args:
+        y_true (np.ndarray): Actual prices, float64
+        predictions (np.ndarray): Predicted prices, float64
+        shift (float): Subtracted from y before squaring, so the variance is not
+            computed from two huge, nearly equal sums
+
+    Returns:
+        np.ndarray: Array of shape (len(SUM_COLUMNS), n_rows)
+    """
+    stats = np.empty((len(SUM_COLUMNS), len(y_true)), dtype=np.float64)
+    stats[0] = 1.0
+    np.subtract(y_true, shift, out=stats[1])
+    np.square(stats[1], out=stats[2])
+    np.subtract(predictions, y_true, out=stats[4])
+    np.abs(stats[4], out=stats[4])
+    np.square(stats[4], out=stats[3])
+    # Same denominator as sklearn's mean_absolute_percentage_error
+    np.divide(stats[4], np.maximum(np.abs(y_true), np.finfo(np.float64).eps), out=stats[5])
+    return stats
+
+
+def metrics_from_sums(sums: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    R², RMSE, MAE and MAPE from summed row statistics
+
+    Works on one set of sums or on many at once (bootstrap replicates, segments).
+
+    Args:
+        sums (np.ndarray): Sums in SUM_COLUMNS order, shape (..., len(SUM_COLUMNS))
+
+    Returns:
+        Dict[str, np.ndarray]: One value per set of sums for each name in METRIC_NAMES
+            (R² is NaN when the target does not vary)
+    """
+    rows, y, y2, squared_error, absolute_error, percentage_error = np.moveaxis(sums, -1, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_variance = y2 - y * y / rows
+        return {
+            'r2_score': np.where(total_variance > 0, 1 - squared_error / total_variance, np.nan),
+            'rmse': np.sqrt(squared_error / rows),
+            'mae': absolute_error / rows,
+            'mape': percentage_error / rows,
+        }
+
+
+def evaluate(y_true, predictions, segments: Optional[Dict[str, Tuple[np.ndarray, List[str]]]] = None,
+             n_bootstrap: int = 1000, confidence: float = 0.95, chunk_rows: int = 65536, seed: int = 42) -> dict:
+    """
+    Regression metrics with bootstrap confidence intervals and per-segment breakdown
+
+    The data is read once, chunk by chunk. Each chunk adds its row
+    statistics to the totals, to every segment (np.bincount) and to every
+    bootstrap replicate. The replicates use the Poisson bootstrap: each row
+    appears Poisson(1) times in each replicate, so a chunk contributes one
+    (n_bootstrap x rows) @ (rows x 6) matrix product and no resampled copy
+    of the data is ever built.
+
+    Args:
+        y_true: Actual prices
+        predictions: Predicted prices
+        segments (Optional[Dict[str, Tuple[np.ndarray, List[str]]]]): Per breakdown, the
+            segment index of every row and the segment labels
+        n_bootstrap (int): Bootstrap replicates, 0 to skip the intervals
+        confidence (float): Coverage of the percentile intervals
+        chunk_rows (int): Rows processed at a time
+        seed (int): Seed of the bootstrap weights
+
+    Returns:
+        dict: 'metrics' (point estimates), 'intervals' (metric -> [low, high]) and
+            'segments' (breakdown -> one record per segment with its rows and metrics)
+    """
+    y_true = np.ascontiguousarray(y_true, dtype=np.float64)
+    predictions = np.ascontiguousarray(predictions, dtype=np.float64)
+    segments = segments or {}
+    n_rows = len(y_true)
+    shift = float(y_true[:chunk_rows].mean()) if n_rows else 0.0
+    rng = np.random.default_rng(seed)
+
+    totals = np.zeros(len(SUM_COLUMNS))
+    replicates = np.zeros((n_bootstrap, len(SUM_COLUMNS)))
+    segment_sums = {name: np.zeros((len(labels), len(SUM_COLUMNS))) for name, (_, labels) in segments.items()}
+    for start in range(0, n_rows, chunk_rows):
+        stop = min(start + chunk_rows, n_rows)
+        stats = row_statistics(y_true[start:stop], predictions[start:stop], shift)
+        totals += stats.sum(axis=1)
+        for name, (codes, labels) in segments.items():
+            chunk_codes = codes[start:stop]
+            for j in range(len(SUM_COLUMNS)):
+                segment_sums[name][:, j] += np.bincount(chunk_codes, weights=stats[j], minlength=len(labels))
+        if n_bootstrap:
+            weights = _POISSON_TABLE[rng.integers(0, 2 ** 16, size=(n_bootstrap, stop - start), dtype=np.uint16)]
+            replicates += weights @ stats.T
+
+    report = {'metrics': {name: float(value) for name, value in metrics_from_sums(totals).items()}}
+    if n_bootstrap:
+        tail = (1 - confidence) / 2 * 100
+        replicate_metrics = metrics_from_sums(replicates)
+        report['intervals'] = {
+            name: [float(value) for value in np.nanpercentile(values, [tail, 100 - tail])]
+            for name, values in replicate_metrics.items()
+        }
+    report['segments'] = {}
+    for name, (_, labels) in segments.items():
+        sums = segment_sums[name]
+        metrics = metrics_from_sums(sums)
+        report['segments'][name] = [
+            {'segment': label, 'rows': int(sums[i, 0]), **{metric: float(metrics[metric][i]) for metric in METRIC_NAMES}}
+            for i, label in enumerate(labels) if sums[i, 0] > 0
+        ]
+    return report
+
+
+def decode_segments(X_test: pd.DataFrame, y_test, preprocessor: Optional[dict] = None,
+                    columns: Sequence[str] = SEGMENT_COLUMNS) -> Dict[str, Tuple[np.ndarray, List[str]]]:
+    """
+    Segment index of every test row for the per-segment report
+
+    Categorical features are stored as scaled label codes: the codes are
+    recovered with the preprocessor's mean and scale and named with its
+    categories. Codes outside the known categories (missing values at
+    training time) form a "missing" segment. Price bands come from the
+    actual prices.
+
+    Args:
+        X_test (pd.DataFrame): Test features (encoded and scaled)
+        y_test: Actual prices of the test rows
+        preprocessor (Optional[dict]): Fitted preprocessor (Preprocessor.to_dict); without it
+            only price bands are reported
+        columns (Sequence[str]): Categorical columns to break down
+
+    Returns:
+        Dict[str, Tuple[np.ndarray, List[str]]]: Per breakdown, segment index of every row and segment labels
+    """
+    segments = {
+        'price_band': (np.digitize(np.asarray(y_test, dtype=np.float64), PRICE_BAND_EDGES), list(PRICE_BAND_LABELS)),
+    }
+    if preprocessor is None:
+        return segments
+    preprocessor = Preprocessor.from_dict(preprocessor)
+    for col in columns:
+        if col not in X_test.columns or col not in preprocessor.categories:
+            continue
+        j = preprocessor.feature_index(col)
+        labels = list(preprocessor.categories[col]) + ['missing']
+        codes = np.rint(X_test[col].to_numpy(dtype=np.float64) * preprocessor.scale[j] + preprocessor.mean[j])
+        known = (codes >= 0) & (codes < len(labels) - 1)
+        segments[col] = (np.where(known, codes, len(labels) - 1).astype(np.int64), labels)
+    return segments
+
+
+def forest_predictions(model, X, interval: float = 0.9,
+                       chunk_rows: int = 65536) -> Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Forest predictions with the spread of the individual trees, from one pass over the trees
+
+    The prediction is the mean of the tree predictions, as model.predict
+    computes it, and the band holds the central interval of the tree
+    predictions of every row. Rows are processed in chunks, so at most
+    chunk_rows x n_trees tree predictions are held at once.
+
+    Args:
+        model: Fitted RandomForestRegressor or FlatForest
+        X: Features as a DataFrame with the training columns
+        interval (float): Share of the tree predictions inside the band
+        chunk_rows (int): Rows processed at a time
+
+    Returns:
+        Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]]: Predictions, lower and upper
+            band of every row, or None if the model is not a forest
+    """
+    if isinstance(model, FlatForest):
+        per_tree = model.predict_per_tree
+    elif hasattr(model, 'estimators_') and hasattr(model, 'feature_names_in_') \
+            and all(hasattr(tree, 'tree_') for tree in model.estimators_):
+        # Same input as RandomForestRegressor.predict: float32 features in training order
+        def per_tree(X_chunk):
+            return np.column_stack([tree.predict(X_chunk, check_input=False) for tree in model.estimators_])
+    else:
+        return None
+
+    X = np.ascontiguousarray(X[list(model.feature_names_in_)], dtype=np.float32)
+    quantiles = [(1 - interval) / 2, (1 + interval) / 2]
+    predictions = np.empty(len(X))
+    lower = np.empty(len(X))
+    upper = np.empty(len(X))
+    for start in range(0, len(X), chunk_rows):
+        chunk = slice(start, start + chunk_rows)
+        trees = per_tree(X[chunk])
+        predictions[chunk] = trees.mean(axis=1)
+        lower[chunk], upper[chunk] = np.quantile(trees, quantiles, axis=1)
+    return predictions, lower, upper
@@ -0,0 +1,281 @@
+# Model Tuning Module
+# This module searches hyperparameters for the models registered in model_dev with cross-validation
+# Trials run in a process pool; the cross-validation folds live once in shared memory and every worker
+# reads them from there, and successive halving stops unpromising configurations on a small sample
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+from threadpoolctl import threadpool_limits
+from Data_analysis.model_dev import MODELS, get_model
+
+# Candidate values per hyperparameter, sampled uniformly by the search
+SEARCH_SPACES = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 300],
+        'max_depth': [None, 10, 20, 30],
+        'min_samples_leaf': [1, 2, 4, 8],
+        'max_features': [1.0, 0.5, 'sqrt'],
+    },
+    'hist_gradient_boosting': {
+        'learning_rate': [0.02, 0.05, 0.1, 0.2],
+        'max_iter': [100, 200, 400],
+        'max_leaf_nodes': [15, 31, 63, 127],
+        'min_samples_leaf': [10, 20, 50],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    },
+}
+
+# Supported strategies:
+# - "halving": successive halving, every rung keeps the best 1/eta configurations and gives them eta times more rows
+# - "random":  every configuration is evaluated on the full training folds
+SEARCH_STRATEGIES = ('halving', 'random')
+
+
+class SharedFolds:
+    """
+    Cross-validation data stored once in shared memory
+
+    The rows are shuffled and laid out fold after fold in one shared block,
+    so a validation fold is a contiguous view and the training rows of a
+    fold are the other views. Worker processes attach to the block by name
+    instead of receiving a pickled copy of the data with every trial.
+    """
+    def __init__(self, X: np.ndarray, y: np.ndarray, n_folds: int, seed: int = 42):
+        """
+        Copy the shuffled data into a new shared memory block
+
+        Args:
+            X (np.ndarray): Training features, shape (n_rows, n_features)
+            y (np.ndarray): Training target, shape (n_rows,)
+            n_folds (int): Number of cross-validation folds
+            seed (int): Seed of the shuffle
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        order = np.random.default_rng(seed).permutation(len(X))
+        self.shape = X.shape
+        self.bounds = np.linspace(0, len(X), n_folds + 1).astype(np.int64).tolist()
+        self._shm = shared_memory.SharedMemory(create=True, size=max(X.nbytes + y.nbytes, 1))
+        self._X, self._y = self._views(self._shm, self.shape)
+        np.take(X, order, axis=0, out=self._X)
+        np.take(y, order, out=self._y)
+
+    @staticmethod
+    def _views(shm, shape) -> Tuple[np.ndarray, np.ndarray]:
+        X = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        y = np.ndarray(shape[:1], dtype=np.float64, buffer=shm.buf, offset=X.nbytes)
+        return X, y
+
+    def spec(self) -> dict:
+        # Everything a worker needs to attach to the block
+        return {'name': self._shm.name, 'shape': self.shape, 'bounds': self.bounds}
+
+    def close(self) -> None:
+        self._X = self._y = None
+        self._shm.close()
+        self._shm.unlink()
+
+
+# Shared data attached by each worker process (see _attach_folds)
+_folds = {}
+
+
+def _attach_folds(spec: dict) -> None:
+    # Worker initializer: attach the shared folds once per process
+    shm = shared_memory.SharedMemory(name=spec['name'])
+    X, y = SharedFolds._views(shm, tuple(spec['shape']))
+    _folds.update(shm=shm, X=X, y=y, bounds=spec['bounds'])
+
+
+def fold_split(fold: int, n_rows: Optional[int] = None):
+    """
+    Training and validation data of one fold, from the shared block of the worker
+
+    Args:
+        fold (int): Fold used for validation
+        n_rows (Optional[int]): Training rows to use (all when None); the rows
+            are shuffled, so the first n_rows are a random sample
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: X_train, y_train, X_valid, y_valid
+    """
+    X, y, bounds = _folds['X'], _folds['y'], _folds['bounds']
+    slices = [slice(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if i != fold]
+    if n_rows is not None:
+        taken = []
+        for part in slices:
+            if n_rows <= 0:
+                break
+            stop = min(part.stop, part.start + n_rows)
+            taken.append(slice(part.start, stop))
+            n_rows -= stop - part.start
+        slices = taken
+    valid = slice(bounds[fold], bounds[fold + 1])
+    X_train = np.concatenate([X[part] for part in slices])
+    y_train = np.concatenate([y[part] for part in slices])
+    return X_train, y_train, X[valid], y[valid]
+
+
+def _run_fold(model_name: str, params: dict, fold: int, n_rows: int) -> Tuple[float, float]:
+    # Worker task: fit one configuration on one fold, return its validation R² and the seconds it took
+    start = time.perf_counter()
+    model = get_model(model_name, params)
+    if 'n_jobs' in model.params:
+        # Parallelism comes from the pool; a forest using all cores in every worker would oversubscribe them
+        model.params['n_jobs'] = 1
+    X_train, y_train, X_valid, y_valid = fold_split(fold, n_rows)
+    # Likewise for native thread pools: HistGradientBoosting uses OpenMP on every core by default.
+    # The limit is set around the fit, so it also covers runtimes loaded after the worker started
+    with threadpool_limits(limits=1):
+        fitted = model.train(X_train, y_train)
+        score = float(r2_score(y_valid, fitted.predict(X_valid)))
+    return score, time.perf_counter() - start
+
+
+def sample_configs(space: Dict[str, list], n_configs: int, seed: int = 42) -> List[dict]:
+    """
+    Draw distinct configurations from a search space
+
+    Args:
+        space (Dict[str, list]): Candidate values per hyperparameter
+        n_configs (int): Configurations to draw (fewer if the space is smaller)
+        seed (int): Seed of the random generator
+
+    Returns:
+        List[dict]: Distinct configurations
+    """
+    rng = np.random.default_rng(seed)
+    size = math.prod(len(values) for values in space.values())
+    configs, seen = [], set()
+    while len(configs) < min(n_configs, size):
+        config = {key: values[rng.integers(len(values))] for key, values in space.items()}
+        key = json.dumps(config, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(config)
+    return configs
+
+
+class HyperparameterSearch:
+    """
+    Cross-validated hyperparameter search for a registered model
+
+    With the "halving" strategy, all configurations are first evaluated on
+    a small random sample of the training rows; after each rung only the
+    best 1/eta of them continue, with eta times more rows, until the last
+    rung uses all the training rows of every fold. Most of the compute
+    therefore goes to the promising configurations. Each (configuration,
+    fold) fit is one task of the process pool.
+    """
+    def __init__(self, model_name: str = 'random_forest', space: Optional[Dict[str, list]] = None,
+                 n_trials: int = 20, strategy: str = 'halving', n_folds: int = 3, eta: int = 3,
+                 min_rows: int = 1000, n_jobs: Optional[int] = None, seed: int = 42):
+        """
+        Configure the search
+
+        Args:
+            model_name (str): Key of the model in model_dev.MODELS
+            space (Optional[Dict[str, list]]): Candidate values per hyperparameter,
+                SEARCH_SPACES[model_name] when None
+            n_trials (int): Configurations to sample
+            strategy (str): One of SEARCH_STRATEGIES
+            n_folds (int): Cross-validation folds
+            eta (int): Halving rate: 1/eta of the configurations survive each rung
+            min_rows (int): Smallest number of training rows used in the first rung
+            n_jobs (Optional[int]): Worker processes, all cores when None
+            seed (int): Seed of the sampling and of the fold shuffle
+        """
+        if model_name not in MODELS:
+            raise ValueError(f"Unknown model '{model_name}', expected one of {sorted(MODELS)}")
+        if strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Search strategy must be one of {SEARCH_STRATEGIES}, got '{strategy}'")
+        self.model_name = model_name
+        self.space = space if space is not None else SEARCH_SPACES[model_name]
+        self.n_trials = n_trials
+        self.strategy = strategy
+        self.n_folds = n_folds
+        self.eta = eta
+        self.min_rows = min_rows
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.seed = seed
+
+    def rungs(self, n_configs: int, max_rows: int) -> List[int]:
+        """
+        Training rows per fold used at each rung
+
+        Args:
+            n_configs (int): Configurations evaluated in the first rung
+            max_rows (int): Training rows of a fold
+
+        Returns:
+            List[int]: Increasing row counts, the last one being max_rows
+        """
+        if self.strategy == 'random':
+            return [max_rows]
+        n_rungs = 1 + int(math.log(max(n_configs, 1)) / math.log(self.eta))
+        rows = [int(max_rows / self.eta ** (n_rungs - 1 - rung)) for rung in range(n_rungs)]
+        return [n for n in rows if n >= self.min_rows][:-1] + [max_rows]
+
+    def run(self, X: pd.DataFrame, y: pd.Series, base_params: Optional[dict] = None,
+            on_trial=None) -> Tuple[dict, List[dict]]:
+        """
+        Search the configuration with the best mean cross-validated R²
+
+        Args:
+            X (pd.DataFrame): Training features
+            y (pd.Series): Training target
+            base_params (Optional[dict]): Fixed hyperparameters, overridden by the sampled ones
+            on_trial (Optional[Callable[[dict], None]]): Called with every finished trial
+
+        Returns:
+            Tuple[dict, List[dict]]: Best hyperparameters (base_params included) and all trials,
+                each with its params, rung, training rows, fold scores, mean score and fit seconds
+        """
+        base_params = dict(base_params or {})
+        configs = sample_configs(self.space, self.n_trials, self.seed)
+        folds = SharedFolds(X.to_numpy(dtype=np.float64), y.to_numpy(dtype=np.float64), self.n_folds, self.seed)
+        max_rows = len(X) - (folds.bounds[1] - folds.bounds[0])
+        trials = []
+        try:
+            with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=_attach_folds,
+                                     initargs=(folds.spec(),)) as pool:
+                survivors = configs
+                for rung, n_rows in enumerate(self.rungs(len(configs), max_rows)):
+                    futures = [
+                        [pool.submit(_run_fold, self.model_name, {**base_params, **config}, fold, n_rows)
+                         for fold in range(self.n_folds)]
+                        for config in survivors
+                    ]
+                    results = []
+                    for config, fold_futures in zip(survivors, futures):
+                        scores, seconds = zip(*[future.result() for future in fold_futures])
+                        trial = {
+                            'params': {**base_params, **config},
+                            'rung': rung,
+                            'n_rows': n_rows,
+                            'fold_scores': list(scores),
+                            'score': float(np.mean(scores)),
+                            'seconds': sum(seconds),
+                        }
+                        trials.append(trial)
+                        results.append((trial['score'], config))
+                        if on_trial is not None:
+                            on_trial(trial)
+                    logging.info(f'Rung {rung}: {len(survivors)} configurations on {n_rows} rows, '
+                                 f'best R2 {max(score for score, _ in results):.4f}')
+                    # Keep the best 1/eta configurations for the next rung (stable for ties)
+                    results.sort(key=lambda result: -result[0])
+                    survivors = [config for _, config in results[:max(1, math.ceil(len(results) / self.eta))]]
+        finally:
+            folds.close()
+
+        best = max((trial for trial in trials if trial['rung'] == trials[-1]['rung']), key=lambda trial: trial['score'])
+        return best['params'], trials
@@ -1,40 +1,86 @@
 # FastAPI application for House Price Prediction API
 # This file serves as the main entry point for the prediction service
 # It provides REST API endpoints for making house price predictions
-from fastapi import FastAPI, HTTPException
-from steps.ingest_data import ingestdata
-import joblib
-from sklearn.preprocessing import LabelEncoder
+from fastapi import FastAPI, Header, HTTPException, Response
+from serving.encoding import UnknownCategoryError
+from serving.batcher import MicroBatcher
+from serving.cache import PredictionCache
+from serving.executor import ExecutorRestarted, ExecutorSaturated, ExecutorTimeout, InferenceExecutor
+from serving.inference import Prediction, predict_frame_intervals
+from serving import metrics
+from serving.model_store import ModelStore
+import asyncio
+import hmac
 import logging
-from pydantic import BaseModel, Field
-import json
-import numpy as np
+from pydantic import BaseModel, Field, ValidationError, model_validator
+from typing import Any, List, Optional, Union
+import os
 
 # Configure logging for the application
 # This sets up logging to track application events and errors
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Load the trained model and label encoders at startup
+# Inference mode for the single-row /predict endpoint
+# "fast" writes the input straight into a NumPy row, "dataframe" goes through ingestdata and pandas
+INFERENCE_MODE = os.getenv('INFERENCE_MODE', 'fast')
+
+# Policy for categories not seen during training: "first", "missing" or "error"
+# See serving/encoding.py for the meaning of each policy
+UNKNOWN_CATEGORY_POLICY = os.getenv('UNKNOWN_CATEGORY_POLICY', 'first')
+
+# Model artifact to serve: "joblib" (models/model.pkl), "flat" (memory-mapped models/forest.bin)
+# or "auto", which prefers the flat forest whenever the training step exported one
+# joblib is the default: its forest is also flattened in memory for single rows and intervals,
+# while batches keep calling the sklearn trees, which score them faster than the flat traversal
+MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'joblib')
+
+# Prediction intervals: share of the forest's tree predictions between lower_bound and upper_bound
+# of every response, computed with the prediction in one traversal of all trees (0 disables them)
+# Models without individual trees (e.g. gradient boosting) return no interval
+PREDICTION_INTERVAL = float(os.getenv('PREDICTION_INTERVAL', 0.9))
+
+# Inference executor: predictions run in a bounded "thread" or "process" pool, off the event loop
+# Requests beyond INFERENCE_WORKERS running + INFERENCE_QUEUE_DEPTH waiting are rejected with 429,
+# and requests whose result is not ready within INFERENCE_TIMEOUT seconds get 503
+INFERENCE_EXECUTOR = os.getenv('INFERENCE_EXECUTOR', 'thread')
+INFERENCE_WORKERS = int(os.getenv('INFERENCE_WORKERS', min(4, os.cpu_count() or 1)))
+INFERENCE_QUEUE_DEPTH = int(os.getenv('INFERENCE_QUEUE_DEPTH', 64))
+INFERENCE_TIMEOUT = float(os.getenv('INFERENCE_TIMEOUT', 10))
+
+# Opt-in micro-batching for /predict: concurrent requests are coalesced into one prediction call
+# A batch is scored after MICRO_BATCH_MAX_WAIT_MS or once MICRO_BATCH_MAX_SIZE requests are waiting
+MICRO_BATCHING = os.getenv('MICRO_BATCHING', '0') == '1'
+MICRO_BATCH_MAX_SIZE = int(os.getenv('MICRO_BATCH_MAX_SIZE', 32))
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', 2))
+
+# Prediction cache: PREDICTION_CACHE_SIZE entries (0 disables it), each kept for PREDICTION_CACHE_TTL seconds
+PREDICTION_CACHE_SIZE = int(os.getenv('PREDICTION_CACHE_SIZE', 100000))
+PREDICTION_CACHE_TTL = float(os.getenv('PREDICTION_CACHE_TTL', 3600))
+
+# Hot model reload: POST /admin/reload, or a check of the model files every MODEL_WATCH_INTERVAL
+# seconds (0 disables the watch). /admin/reload requires MODEL_RELOAD_TOKEN in the X-Admin-Token
+# header, and is disabled (403) while MODEL_RELOAD_TOKEN is unset
+MODEL_WATCH_INTERVAL = float(os.getenv('MODEL_WATCH_INTERVAL', 0))
+MODEL_RELOAD_TOKEN = os.getenv('MODEL_RELOAD_TOKEN')
+
+# Prometheus metrics on GET /metrics: request counters, in-flight gauges, per-stage latency and
+# batch-size histograms (see serving/metrics.py). METRICS_ENABLED=0 turns every update into a no-op
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
+metrics.REGISTRY.enabled = METRICS_ENABLED
+
+# Load the trained model and its preprocessor at startup
 # This ensures the model is ready for predictions when the API starts
 try:
-    # Load the trained Random Forest model from the models directory
-    # This model was saved during the training pipeline execution
-    model = joblib.load('./models/model.pkl')
-    
-    # Load the label encoders used during training
-    # These are needed to transform categorical variables in the same way as during training
-    # The encoders are stored as JSON to preserve the class mappings
-    with open('./models/label_encoders.json', 'r') as f:
-        encoders_data = json.load(f)
-        label_encoders = {}
-        for col, classes in encoders_data.items():
-            encoder = LabelEncoder()
-            encoder.classes_ = np.array(classes)
-            label_encoders[col] = encoder
-    logger.info("Model has Started")
+    # Load the trained Random Forest model (models/model.pkl or the flat models/forest.bin)
+    # together with the encoding and scaling fitted during training (models/preprocessor.json, or
+    # label_encoders.json and scaler.pkl for older models), and validate them with a warm-up prediction
+    # The model, the preprocessor, the fast-path predictor and the artifact version live in one
+    # bundle (see serving/model_store.py) that a reload replaces as a whole
+    model_store = ModelStore('./models', MODEL_FORMAT, UNKNOWN_CATEGORY_POLICY, intervals=PREDICTION_INTERVAL > 0)
+    logger.info(f"Model has Started (version {model_store.current.version})")
 except Exception as e:
-    logger.error(f"Error loading model or encoders: {str(e)}")
+    logger.error(f"Error loading model or preprocessor: {str(e)}")
     raise
 
 # Initialize FastAPI application with metadata
@@ -45,6 +91,70 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Count requests and time them per endpoint, before any routing or validation
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Bounded pool that keeps CPU-bound prediction work off the asyncio event loop
+executor = InferenceExecutor(INFERENCE_EXECUTOR, INFERENCE_WORKERS, INFERENCE_QUEUE_DEPTH, INFERENCE_TIMEOUT)
+
+# LRU/TTL cache in front of the model for listings that are scored repeatedly
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL) if PREDICTION_CACHE_SIZE > 0 else None
+
+async def reload_model(force: bool = False) -> bool:
+    """
+    Load the model files on disk in the background and swap them in
+
+    Loading and the warm-up prediction run in a separate thread, so requests
+    keep being served by the current model meanwhile.
+
+    Args:
+        force (bool): Reload even if the files on disk did not change
+
+    Returns:
+        bool: True if a new model is now being served
+    """
+    loop = asyncio.get_running_loop()
+    reloaded = await loop.run_in_executor(None, model_store.reload, force)
+    if reloaded:
+        # Cache keys carry the model version, so old entries can no longer be hit; free them
+        if prediction_cache is not None:
+            prediction_cache.invalidate()
+        # Worker processes were forked with the old model in memory
+        if executor.kind == 'process':
+            executor.restart()
+    return reloaded
+
+async def watch_model_files():
+    """
+    Reload the model whenever the training step writes new artifacts
+
+    A new version is only loaded once it is seen unchanged on two consecutive
+    checks, so files that are still being written are not picked up. A version
+    that failed to load is not retried until the files change again.
+    """
+    seen = model_store.current.version
+    rejected = None
+    while True:
+        await asyncio.sleep(MODEL_WATCH_INTERVAL)
+        version = None
+        try:
+            version = model_store.disk_version()
+            if version == seen and version not in (model_store.current.version, rejected):
+                await reload_model()
+        except Exception as e:
+            rejected = version
+            logger.error(f"Model reload failed, still serving {model_store.current.version}: {str(e)}")
+        seen = version
+
+@app.on_event("startup")
+async def start_model_watch():
+    if MODEL_WATCH_INTERVAL > 0:
+        app.state.model_watch = asyncio.ensure_future(watch_model_files())
+
+@app.on_event("shutdown")
+def shutdown_executor():
+    executor.shutdown()
+
 # Pydantic model for input validation
 # This ensures that the API receives properly formatted data with correct data types
 # The Field validators enforce constraints like non-negative numbers
@@ -62,13 +172,52 @@ class InputFeatures(BaseModel):
     Society: str = Field(..., description="Society name")
     Floor: str = Field(..., description="Floor information")
 
+    # Time spent validating a listing, for the "validation" stage of /metrics
+    @model_validator(mode='wrap')
+    @classmethod
+    def timed_validation(cls, data, handler):
+        with metrics.stage_timer('validation'):
+            return handler(data)
+
 # Pydantic model for API response
 # This defines the structure of the prediction response
-# The confidence field is constrained between 0 and 1
+# confidence is the level of the [lower_bound, upper_bound] interval, between 0 and 1, and
+# prediction_std the standard deviation of the tree predictions; all four are null when the
+# model has no individual trees or PREDICTION_INTERVAL is 0
 class PredictionResponse(BaseModel):
     predicted_price: float
-    confidence: float = Field(..., ge=0, le=1)
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+    lower_bound: Optional[float] = None
+    upper_bound: Optional[float] = None
+    prediction_std: Optional[float] = None
+    status: str = "success"
+
+def interval_fields(prediction: Prediction) -> dict:
+    """
+    Response fields of a prediction: the price and, for forests, its interval
+    """
+    fields = {'predicted_price': prediction.price}
+    if prediction.lower is not None:
+        fields.update(confidence=PREDICTION_INTERVAL, lower_bound=prediction.lower,
+                      upper_bound=prediction.upper, prediction_std=prediction.std)
+    return fields
+
+# Pydantic models for the batch prediction response
+# Each item reports its own status so that one invalid listing does not fail the whole batch
+class BatchPredictionItem(BaseModel):
+    index: int
+    predicted_price: Optional[float] = None
+    confidence: Optional[float] = Field(None, ge=0, le=1)
+    lower_bound: Optional[float] = None
+    upper_bound: Optional[float] = None
+    prediction_std: Optional[float] = None
     status: str = "success"
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionItem]
+    succeeded: int
+    failed: int
 
 @app.get('/')
 def main():
@@ -82,6 +231,128 @@ def main():
         "version": "1.0.0"
     }
 
+def score_one(input_dict: dict) -> Prediction:
+    """
+    Predict the price of one validated listing (runs in the inference executor)
+
+    Args:
+        input_dict (dict): Validated InputFeatures as a dictionary
+
+    Returns:
+        Prediction: Predicted house price with its interval
+    """
+    bundle = model_store.current
+    if INFERENCE_MODE == 'fast':
+        # Encode and scale straight into a float32 row in feature_names_in_ order and predict
+        return bundle.fast_predictor.predict_interval(input_dict, PREDICTION_INTERVAL)
+    # Use the same data ingestion function as the training pipeline,
+    # apply the training encoding and scaling and reorder the columns for the model
+    return predict_frame_intervals(bundle.model, bundle.preprocessor, input_dict, bundle.forest, PREDICTION_INTERVAL)[0]
+
+def predict_rows(rows: List[dict]) -> List[Union[Prediction, UnknownCategoryError]]:
+    """
+    Predict validated rows with one vectorized transform and one forest traversal
+
+    Used by the batch endpoint and by the micro-batcher.
+
+    Args:
+        rows (List[dict]): Validated InputFeatures as dictionaries
+
+    Returns:
+        List[Union[Prediction, UnknownCategoryError]]: One prediction per row, or the
+            error of rows rejected by the "error" unknown-category policy
+    """
+    # The retries below must use the same model as the first attempt, even if a reload happens meanwhile
+    bundle = model_store.current
+    outcomes = [None] * len(rows)
+    pending = list(range(len(rows)))
+    while pending:
+        try:
+            predictions = predict_frame_intervals(bundle.model, bundle.preprocessor, [rows[i] for i in pending],
+                                                  bundle.forest, PREDICTION_INTERVAL)
+        except UnknownCategoryError as e:
+            # Only raised when UNKNOWN_CATEGORY_POLICY is "error": fail the offending
+            # rows and score the rest again
+            for row, value in zip(e.rows.tolist(), e.values):
+                outcomes[pending[row]] = UnknownCategoryError(e.column, e.rows[:1], [value])
+            rejected = set(e.rows.tolist())
+            pending = [i for row, i in enumerate(pending) if row not in rejected]
+            continue
+        for i, prediction in zip(pending, predictions):
+            outcomes[i] = prediction
+        break
+    return outcomes
+
+def score_batch(items: List[Any]) -> List[BatchPredictionItem]:
+    """
+    Validate and predict a batch of listings (runs in the inference executor)
+
+    Args:
+        items (List[Any]): Raw request items; items that are not JSON objects are reported as errors
+
+    Returns:
+        List[BatchPredictionItem]: One result per item, in input order
+    """
+    results = [BatchPredictionItem(index=i) for i in range(len(items))]
+
+    # Step 1: Validate each item on its own so invalid listings are reported, not fatal
+    # Items that are not objects (e.g. null or a string) fail their own validation
+    valid_index = []
+    valid_rows = []
+    for i, item in enumerate(items):
+        try:
+            valid_rows.append(InputFeatures.model_validate(item).dict())
+            valid_index.append(i)
+        except ValidationError as e:
+            results[i].status = "error"
+            results[i].error = str(e)
+
+    # Step 2: Serve repeated listings from the prediction cache
+    # The cache lives in the API process, so it is only consulted from the thread executor
+    cache = prediction_cache if INFERENCE_EXECUTOR == 'thread' else None
+    keys = [None] * len(valid_rows)
+    outcomes = [None] * len(valid_rows)
+    if cache is not None:
+        version = model_store.current.version
+        for pos, row in enumerate(valid_rows):
+            keys[pos] = PredictionCache.key(row, version)
+            outcomes[pos] = cache.get(keys[pos])
+    misses = [pos for pos, outcome in enumerate(outcomes) if outcome is None]
+
+    # Step 3-4: Build one DataFrame for the remaining rows, encode and scale it in one transform
+    # and run a single forest traversal for all of them
+    if misses:
+        for pos, outcome in zip(misses, predict_rows([valid_rows[pos] for pos in misses])):
+            outcomes[pos] = outcome
+            if cache is not None and not isinstance(outcome, Exception):
+                cache.put(keys[pos], outcome)
+
+    # Step 5: Scatter predictions back to their original positions
+    for i, outcome in zip(valid_index, outcomes):
+        if isinstance(outcome, Exception):
+            results[i].status = "error"
+            results[i].error = str(outcome)
+        else:
+            for name, value in interval_fields(outcome).items():
+                setattr(results[i], name, value)
+    return results
+
+# Optional dynamic batcher in front of the executor (see MICRO_BATCHING)
+batcher = None
+if MICRO_BATCHING:
+    batcher = MicroBatcher(predict_rows, executor.run, MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS)
+
+def overloaded(e: Exception) -> HTTPException:
+    """
+    Map executor backpressure errors to HTTP responses
+
+    A full queue returns 429 so clients back off; a request that waited past the
+    timeout, or whose worker pool broke and was restarted, returns 503. All carry
+    Retry-After.
+    """
+    status_code = 429 if isinstance(e, ExecutorSaturated) else 503
+    return HTTPException(status_code=status_code, detail=str(e), headers={"Retry-After": "1"})
+
 @app.post('/predict', response_model=PredictionResponse)
 async def predict(data: InputFeatures):
     """
@@ -90,47 +361,41 @@ async def predict(data: InputFeatures):
     
     This endpoint performs the following steps:
     1. Validates input data using Pydantic models
-    2. Converts input to DataFrame format
-    3. Applies label encoding to categorical variables
-    4. Makes prediction using the trained model
-    5. Returns prediction with confidence score
+    2. Returns the cached prediction if this listing was scored recently by the same model
+    3. Converts input to a feature row (NumPy fast path or DataFrame, see INFERENCE_MODE)
+       and applies the label encoding and feature scaling fitted during training
+    4. Makes prediction using the trained model, in the inference executor
+    5. Returns prediction with its interval: the spread of the forest's trees
     """
     try:
         # Convert Pydantic model to dictionary for processing
         input_dict = data.dict()
+
+        # Repeated listings skip encoding and forest traversal entirely
+        cache_key = None
+        prediction = None
+        if prediction_cache is not None:
+            cache_key = PredictionCache.key(input_dict, model_store.current.version)
+            prediction = prediction_cache.get(cache_key)
         
-        # Use the same data ingestion function as the training pipeline
-        # This ensures consistency between training and inference
-        df = ingestdata(input_dict)
-
-        # Apply the same label encoding as used during training
-        # This is crucial for maintaining consistency between training and inference
-        for col, encoder in label_encoders.items():
-            if col in df.columns:
-                # Handle unseen categories by using the first known category
-                # This prevents errors when the API receives new categories not seen during training
-                if df[col].iloc[0] not in encoder.classes_:
-                    df[col] = encoder.transform([encoder.classes_[0]])
-                else:
-                    df[col] = encoder.transform(df[col])
-
-        # Ensure the dataframe has the same columns as the training data
-        # This prevents errors if the model expects specific features
-        expected_columns = model.feature_names_in_
-        df = df[expected_columns]
-
-        # Make prediction using the loaded model
-        prediction = model.predict(df)
-        
-        # For now, using a fixed confidence score
-        # In a production system, this could be calculated based on model uncertainty
-        confidence = 0.95
+        # Encoding and prediction are CPU-bound: run them off the event loop,
+        # coalesced with other concurrent requests when micro-batching is enabled
+        if prediction is None:
+            if batcher is not None:
+                prediction = await batcher.submit(input_dict)
+            else:
+                prediction = await executor.run(score_one, input_dict)
+            if cache_key is not None:
+                prediction_cache.put(cache_key, prediction)
         
-        return PredictionResponse(
-            predicted_price=float(prediction[0]),
-            confidence=confidence
-        )
+        # The interval comes from the same traversal as the price (see PREDICTION_INTERVAL)
+        return PredictionResponse(**interval_fields(prediction))
         
+    except (ExecutorSaturated, ExecutorTimeout, ExecutorRestarted) as e:
+        raise overloaded(e)
+    except UnknownCategoryError as e:
+        # Only raised when UNKNOWN_CATEGORY_POLICY is "error"
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Prediction error: {str(e)}")
         raise HTTPException(
@@ -138,14 +403,145 @@ async def predict(data: InputFeatures):
             detail=f"Error making prediction: {str(e)}"
         )
 
+@app.post('/predict/batch', response_model=BatchPredictionResponse)
+async def predict_batch(items: List[Any]):
+    """
+    Batch prediction endpoint
+    Takes a list of house features and returns one prediction per item, in input order
+    A body that is not a list returns 422, and so does an empty list; any other item,
+    valid or not, gets its own result
+    
+    This endpoint performs the following steps in the inference executor:
+    1. Validates every item individually using the InputFeatures model
+    2. Converts all valid items to a single DataFrame
+    3. Applies label encoding and feature scaling across the whole batch
+    4. Makes predictions for all valid items, with their intervals, in one forest traversal
+    5. Returns per-item results, with validation and unknown-category errors
+       reported for invalid items
+    """
+    if not items:
+        raise HTTPException(status_code=422, detail="The batch must contain at least one listing")
+    try:
+        results = await executor.run(score_batch, items)
+    except (ExecutorSaturated, ExecutorTimeout, ExecutorRestarted) as e:
+        raise overloaded(e)
+    except Exception as e:
+        logger.error(f"Batch prediction error: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error making batch prediction: {str(e)}"
+        )
+
+    succeeded = sum(result.status == "success" for result in results)
+    return BatchPredictionResponse(
+        results=results,
+        succeeded=succeeded,
+        failed=len(items) - succeeded
+    )
+
 @app.get('/health')
 def health_check():
     """
     Health check endpoint for monitoring
     Returns the status of the model and API
     This endpoint is useful for monitoring systems to check if the service is healthy
+    It never waits for the inference executor, so it stays responsive under load
     """
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
-    }
\ No newline at end of file
+        "model_loaded": model_store.current is not None,
+        "model_version": model_store.current.version,
+        "inference_pool": executor.metrics(),
+    }
+
+@app.get('/stats')
+def stats():
+    """
+    Serving statistics endpoint
+    Returns the inference pool counters, the prediction cache counters and, when
+    micro-batching is enabled, the throughput and latency observed for each batch size
+    """
+    return {
+        "model_version": model_store.current.version,
+        "model_store": model_store.metrics(),
+        "inference_pool": executor.metrics(),
+        "micro_batching": batcher.metrics() if batcher is not None else None,
+        "prediction_cache": prediction_cache.metrics() if prediction_cache is not None else None,
+    }
+
+def serving_samples() -> list:
+    """
+    Samples of the counters kept by the inference pool, the prediction cache and the
+    model store, read when /metrics is scraped
+    """
+    pool = executor.metrics()
+    samples = [
+        ('house_price_inference_pool_in_flight', 'gauge', 'Predictions running or queued in the inference pool', pool['in_flight']),
+        ('house_price_inference_pool_queued', 'gauge', 'Predictions waiting for an inference worker', pool['queued']),
+        ('house_price_inference_pool_rejected_total', 'counter', 'Predictions rejected because the pool was full', pool['rejected']),
+        ('house_price_inference_pool_timed_out_total', 'counter', 'Predictions not ready within INFERENCE_TIMEOUT', pool['timed_out']),
+        ('house_price_inference_pool_failed_total', 'counter', 'Predictions that raised an error', pool['failed']),
+        ('house_price_model_reloads_total', 'counter', 'Models swapped in without a restart', model_store.reloads),
+        ('house_price_model_failed_reloads_total', 'counter', 'Model reloads rejected by validation', model_store.failed_reloads),
+    ]
+    if prediction_cache is not None:
+        cache = prediction_cache.metrics()
+        samples += [
+            ('house_price_prediction_cache_hits_total', 'counter', 'Predictions served from the cache', cache['hits']),
+            ('house_price_prediction_cache_misses_total', 'counter', 'Cache lookups that reached the model', cache['misses']),
+            ('house_price_prediction_cache_entries', 'gauge', 'Predictions held in the cache', cache['entries']),
+        ]
+    if batcher is not None:
+        samples.append(('house_price_micro_batch_pending', 'gauge', 'Requests waiting for the next micro-batch',
+                        batcher.metrics()['pending']))
+    return samples
+
+metrics.REGISTRY.register_collector(serving_samples)
+
+@app.get('/metrics')
+def prometheus_metrics():
+    """
+    Prometheus scrape endpoint
+    Returns the serving metrics in the Prometheus text format: requests by endpoint and
+    status, request latency, requests in flight, the time spent in each prediction stage
+    (validation, ingest, encode, reindex, predict), rows per model call, and the counters
+    of the inference pool, the prediction cache and the model store
+
+    Each process keeps its own metrics: with serve.py every worker reports the requests
+    it served, and with INFERENCE_EXECUTOR=process the stages after validation run in
+    the pool processes and are not recorded.
+    """
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.post('/admin/reload')
+async def admin_reload(force: bool = False, x_admin_token: Optional[str] = Header(None)):
+    """
+    Model reload endpoint
+    Loads the model files currently on disk and swaps them in without restarting the API
+
+    The new model is validated with a warm-up prediction before it replaces the old
+    one; requests already running finish on the model they started with. If loading
+    or validation fails, the current model keeps serving and 500 is returned.
+    With several workers (serve.py) each worker holds its own model: this endpoint only
+    reloads the worker that receives the request, so prefer MODEL_WATCH_INTERVAL there.
+    Requires the X-Admin-Token header to match MODEL_RELOAD_TOKEN; without that variable
+    the endpoint is disabled and always returns 403.
+    """
+    if not MODEL_RELOAD_TOKEN:
+        raise HTTPException(status_code=403, detail="Model reload is disabled: MODEL_RELOAD_TOKEN is not set")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), MODEL_RELOAD_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        reloaded = await reload_model(force)
+    except Exception as e:
+        logger.error(f"Model reload failed: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error reloading model, still serving {model_store.current.version}: {str(e)}"
+        )
+    return {
+        "reloaded": reloaded,
+        "model": model_store.current.info(),
+    }
@@ -0,0 +1,414 @@
+# API Load-Test Benchmark
+# Drives the prediction API at fixed concurrency levels against a locally trained model and records latency
+# percentiles, throughput, CPU and memory of the server process, or, in offline mode, times the prediction
+# stages (ingestdata, encoding, reindex, model.predict) directly without HTTP
+# Results are written as JSON and can be compared with a stored baseline run
+# Usage: python -m benchmarks.bench_api [--mode inprocess|uvicorn|offline] [--concurrency 1 8 32]
+#            [--requests 2000] [--batch-size 32] [--workdir DIR] [--output results.json]
+#            [--baseline baseline.json] [--tolerance 0.1]
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_listings, to_api_rows, train_artifacts
+
+MODES = ('inprocess', 'uvicorn', 'offline')
+
+# Repository root, put on the path of the uvicorn server process
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Compared with the baseline: a regression is a higher latency or a lower throughput beyond the tolerance
+COMPARED = {'p50_ms': 1, 'p95_ms': 1, 'p99_ms': 1, 'rps': -1}
+
+
+def process_usage(pid: int) -> dict:
+    """
+    CPU time and memory of a process, read from /proc
+
+    Args:
+        pid (int): Process to measure
+
+    Returns:
+        dict: cpu_seconds (user + system), rss_mb (current) and peak_rss_mb (VmHWM)
+    """
+    with open(f'/proc/{pid}/stat') as f:
+        # The command name may contain spaces: fields are counted after its closing parenthesis
+        fields = f.read().rsplit(')', 1)[1].split()
+    ticks = os.sysconf('SC_CLK_TCK')
+    usage = {'cpu_seconds': (int(fields[11]) + int(fields[12])) / ticks}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                usage['rss_mb'] = int(line.split()[1]) / 1024
+            elif line.startswith('VmHWM:'):
+                usage['peak_rss_mb'] = int(line.split()[1]) / 1024
+    return usage
+
+
+def summarize(name: str, latencies: list, seconds: float, rows_per_call: int, usage_before: dict,
+              usage_after: dict, errors: int = 0, **info) -> dict:
+    """
+    Percentiles, throughput and resource usage of one measured run
+
+    Args:
+        name (str): Key of the run, used to match it with the baseline
+        latencies (list): Latency of each call in seconds
+        seconds (float): Wall time of the run
+        rows_per_call (int): Listings scored per call
+        usage_before (dict): process_usage of the server before the run
+        usage_after (dict): process_usage of the server after the run
+        errors (int): Calls that did not return HTTP 200
+        **info: Extra fields stored with the result (endpoint, concurrency, ...)
+
+    Returns:
+        dict: Result record
+    """
+    ms = np.asarray(latencies) * 1000
+    cpu = usage_after['cpu_seconds'] - usage_before['cpu_seconds']
+    return {
+        'name': name,
+        **info,
+        'calls': len(ms),
+        'rows_per_call': rows_per_call,
+        'errors': errors,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+        'rps': len(ms) / seconds,
+        'rows_per_s': len(ms) * rows_per_call / seconds,
+        'cpu_percent': 100 * cpu / seconds,
+        'rss_mb': usage_after['rss_mb'],
+        'peak_rss_mb': usage_after['peak_rss_mb'],
+    }
+
+
+def prepare_workdir(workdir: str, n_rows: int) -> str:
+    """
+    Directory holding the models/ folder the API loads
+
+    Without a workdir, a random forest is trained on synthetic listings and
+    saved as the training step saves it (model.pkl, flat forest, preprocessor).
+
+    Args:
+        workdir (str): Existing directory with a models/ folder, or '' for a synthetic model
+        n_rows (int): Synthetic listings used for training
+
+    Returns:
+        str: Directory containing models/
+    """
+    if workdir:
+        if not os.path.exists(os.path.join(workdir, 'models', 'preprocessor.json')):
+            raise FileNotFoundError(f'No trained model in {workdir}/models')
+        return os.path.abspath(workdir)
+    from steps.train_model import save_model
+    workdir = tempfile.mkdtemp(prefix='bench_api_')
+    model, preprocessor = train_artifacts(make_listings(n_rows))
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        save_model(model, preprocessor.to_dict())
+    finally:
+        os.chdir(cwd)
+    return workdir
+
+
+def batched(rows: list, batch_size: int) -> list:
+    # Request bodies of /predict/batch: consecutive full batches of listings
+    return [rows[i:i + batch_size] for i in range(0, len(rows) - batch_size + 1, batch_size)]
+
+
+async def drive(client, endpoint: str, bodies: list, concurrency: int, n_calls: int):
+    """
+    Send n_calls requests with a fixed number of requests in flight
+
+    Each of the concurrency clients sends its next request as soon as the
+    previous one is answered (closed loop).
+
+    Returns:
+        Tuple[list, int, float]: Latency of each call in seconds, errors and wall time
+    """
+    latencies, errors = [], 0
+    sent = 0
+
+    async def client_loop():
+        nonlocal sent, errors
+        while sent < n_calls:
+            body = bodies[sent % len(bodies)]
+            sent += 1
+            start = time.perf_counter()
+            response = await client.post(endpoint, json=body)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run_http(client, pid: int, rows: list, concurrency_levels: list, n_requests: int,
+                   batch_size: int, mode: str) -> list:
+    # Every endpoint at every concurrency level, after a few warm-up requests
+    workloads = [('/predict', rows, 1)]
+    if batch_size > 0:
+        workloads.append(('/predict/batch', batched(rows, batch_size), batch_size))
+    results = []
+    for endpoint, bodies, rows_per_call in workloads:
+        await drive(client, endpoint, bodies, 4, 20)
+        for concurrency in concurrency_levels:
+            n_calls = max(n_requests // rows_per_call, concurrency)
+            before = process_usage(pid)
+            latencies, errors, seconds = await drive(client, endpoint, bodies, concurrency, n_calls)
+            result = summarize(f'{mode}:{endpoint}:c{concurrency}', latencies, seconds, rows_per_call,
+                               before, process_usage(pid), errors,
+                               endpoint=endpoint, concurrency=concurrency)
+            results.append(result)
+            print_result(result)
+    return results
+
+
+def run_inprocess(workdir: str, rows: list, args) -> list:
+    """
+    Drive app:app through httpx's ASGI transport, in this process
+
+    No sockets or server are involved, so the numbers isolate the application
+    (validation, executor, prediction). CPU and memory include the load generator.
+    """
+    import httpx
+    # app.py loads ./models: import it from the workdir, with the repository still importable
+    sys.path.insert(0, REPO_ROOT)
+    os.chdir(workdir)
+    import app
+
+    async def main():
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=60) as client:
+            return await run_http(client, os.getpid(), rows, args.concurrency, args.requests,
+                                  args.batch_size, 'inprocess')
+    try:
+        return asyncio.run(main())
+    finally:
+        app.executor.shutdown()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(workdir: str, rows: list, args) -> list:
+    """
+    Start uvicorn app:app in a separate process and drive it over HTTP
+
+    The server inherits the environment, so API settings (INFERENCE_MODE,
+    MICRO_BATCHING, ...) are set the usual way. CPU and memory are those of
+    the server process only.
+    """
+    import httpx
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get('PYTHONPATH')])))
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning', '--no-access-log'],
+        cwd=workdir, env=env,
+    )
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        deadline = time.time() + 120
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f'uvicorn exited with code {server.returncode}')
+            try:
+                if httpx.get(base_url + '/health').status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            if time.time() > deadline:
+                raise TimeoutError('uvicorn did not start within 120 seconds')
+            time.sleep(0.2)
+
+        async def main():
+            limits = httpx.Limits(max_connections=max(args.concurrency))
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                return await run_http(client, server.pid, rows, args.concurrency, args.requests,
+                                      args.batch_size, 'uvicorn')
+        return asyncio.run(main())
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_offline(workdir: str, rows: list, args) -> list:
+    """
+    Time the prediction stages directly, without HTTP, validation or the executor
+
+    Single rows go through the DataFrame path stage by stage (ingestdata,
+    encoding and scaling, column reindex, model.predict) and through the
+    fast path used by /predict; batches go through the DataFrame path. As in
+    the API, forests predict with their interval unless PREDICTION_INTERVAL is 0.
+    """
+    from serving.model_store import load_bundle
+    from steps.ingest_data import ingestdata
+    level = float(os.getenv('PREDICTION_INTERVAL', 0.9))
+    bundle = load_bundle(os.path.join(workdir, 'models'), os.getenv('MODEL_FORMAT', 'joblib'),
+                         os.getenv('UNKNOWN_CATEGORY_POLICY', 'first'), intervals=level > 0)
+    model, preprocessor = bundle.model, bundle.preprocessor
+    pid = os.getpid()
+
+    def stages(data):
+        # One DataFrame-path prediction, returning the seconds spent in each stage
+        times = [time.perf_counter()]
+        df = ingestdata(data)
+        times.append(time.perf_counter())
+        features = preprocessor.transform(df)
+        times.append(time.perf_counter())
+        frame = pd.DataFrame(features, columns=preprocessor.feature_names)[model.feature_names_in_]
+        times.append(time.perf_counter())
+        if bundle.forest is not None:
+            bundle.forest.predict_interval(frame, level)
+        else:
+            model.predict(frame)
+        times.append(time.perf_counter())
+        return np.diff(times)
+
+    workloads = [('single', rows[:args.requests], 1)]
+    if args.batch_size > 0:
+        batches = batched(rows, args.batch_size)[:max(1, args.requests // args.batch_size)]
+        workloads.append((f'batch{args.batch_size}', batches, args.batch_size))
+
+    results = []
+    for label, bodies, rows_per_call in workloads:
+        for body in bodies[:20]:
+            stages(body)
+        before, start = process_usage(pid), time.perf_counter()
+        timings = np.array([stages(body) for body in bodies])
+        seconds = time.perf_counter() - start
+        after = process_usage(pid)
+        for stage, column in zip(['ingest', 'encode', 'reindex', 'predict'], timings.T):
+            result = summarize(f'offline:{label}:{stage}', column, seconds, rows_per_call, before, after,
+                               stage=stage)
+            # Throughput of a stage alone, not of the whole loop
+            result['rps'] = len(column) / column.sum()
+            result['rows_per_s'] = result['rps'] * rows_per_call
+            results.append(result)
+            print_result(result)
+        result = summarize(f'offline:{label}:total', timings.sum(axis=1), seconds, rows_per_call, before, after,
+                           stage='total')
+        results.append(result)
+        print_result(result)
+
+    before, start = process_usage(pid), time.perf_counter()
+    latencies = []
+    for row in rows[:args.requests]:
+        call = time.perf_counter()
+        bundle.fast_predictor.predict_interval(row, level)
+        latencies.append(time.perf_counter() - call)
+    result = summarize('offline:single:fast_path', latencies, time.perf_counter() - start, 1, before,
+                       process_usage(pid), stage='fast_path')
+    results.append(result)
+    print_result(result)
+    return results
+
+
+def print_result(result: dict) -> None:
+    print(f"{result['name']:>36} {result['p50_ms']:>9.3f} {result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+          f"{result['rps']:>10.1f} {result['rows_per_s']:>10.1f} {result['errors']:>6} "
+          f"{result['cpu_percent']:>6.0f} {result['rss_mb']:>8.0f}")
+
+
+def compare(results: list, baseline: dict, tolerance: float) -> list:
+    """
+    Compare a run with a baseline run, result by result
+
+    Args:
+        results (list): Result records of this run
+        baseline (dict): Output file of an earlier run
+        tolerance (float): Relative change allowed before a metric counts as a regression
+
+    Returns:
+        list: Names and metrics that regressed
+    """
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    print(f"\ncompared with the baseline of {baseline['meta'].get('timestamp')} (tolerance {tolerance:.0%})")
+    for result in results:
+        if result['name'] not in previous:
+            continue
+        changes = []
+        for metric, direction in COMPARED.items():
+            old, new = previous[result['name']][metric], result[metric]
+            change = (new - old) / old if old else 0.0
+            changes.append(f'{metric} {change:+.1%}')
+            if direction * change > tolerance:
+                regressions.append(f"{result['name']} {metric}")
+        print(f"{result['name']:>36}  " + '  '.join(changes))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the prediction API')
+    parser.add_argument('--mode', choices=MODES, default='inprocess',
+                        help='inprocess (ASGI transport), uvicorn (HTTP server process) or offline (no HTTP)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32], help='requests in flight')
+    parser.add_argument('--requests', type=int, default=2000, help='listings scored per endpoint and level')
+    parser.add_argument('--batch-size', type=int, default=32, help='listings per /predict/batch call, 0 to skip it')
+    parser.add_argument('--rows', type=int, default=20000, help='synthetic listings used for the model and requests')
+    parser.add_argument('--workdir', default='', help='directory with a trained models/ folder (synthetic model if unset)')
+    parser.add_argument('--output', default='', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default='', help='JSON file of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='relative regression allowed by the comparison')
+    args = parser.parse_args()
+
+    # One log line per client request would drown the results
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    # Repeated listings would be answered by the prediction cache; measure the model unless asked otherwise
+    os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+
+    listings = make_listings(args.rows)
+    workdir = prepare_workdir(args.workdir, args.rows)
+    rows = to_api_rows(listings.sample(frac=1, random_state=0))
+    print(f'{args.mode} benchmark, models in {workdir}, {os.cpu_count()} CPUs')
+    print(f"{'run':>36} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'calls/s':>10} {'rows/s':>10} "
+          f"{'errors':>6} {'CPU %':>6} {'RSS MB':>8}")
+
+    run = {'inprocess': run_inprocess, 'uvicorn': run_uvicorn, 'offline': run_offline}[args.mode]
+    results = run(workdir, rows, args)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'mode': args.mode,
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'settings': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+            'environment': {key: value for key, value in os.environ.items()
+                            if key.startswith(('INFERENCE_', 'MICRO_BATCH', 'PREDICTION_CACHE', 'MODEL_FORMAT',
+                                               'UNKNOWN_CATEGORY', 'METRICS_'))},
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print('regressions: ' + ', '.join(regressions))
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
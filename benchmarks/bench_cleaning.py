@@ -0,0 +1,94 @@
+# Price and Area Parsing Benchmark
+# Compares the row-by-row parsing of 'Amount(in rupees)' and 'Carpet Area' used before
+# with the vectorized DataPreprocessing.convert_prices and convert_areas
+# The outputs are checked to be identical before timing; edge cases are covered by tests/test_data_cleaning.py
+# Usage: python -m benchmarks.bench_cleaning [--rows 1000000 10000000]
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from Data_analysis.data_cleaning import DataPreprocessing
+
+
+def legacy_prices(amounts: pd.Series) -> pd.Series:
+    # Parsing as done before: one Python call per row
+    return amounts.apply(DataPreprocessing().convert_price)
+
+
+def legacy_areas(areas: pd.Series) -> pd.Series:
+    # Parsing as done before: one pass per unit over the whole column
+    areas = areas.astype(str)
+    areas = areas.str.replace('sqft', '', regex=True)
+    areas = areas.str.replace('sqm', '', regex=True)
+    areas = areas.str.replace('sqyrd', '', regex=True)
+    return pd.to_numeric(areas, errors='coerce')
+
+
+def make_columns(n_rows: int, seed: int = 42):
+    """
+    Price and area columns in the formats of the scraped CSV, as read by pd.read_csv
+
+    Args:
+        n_rows (int): Number of rows
+        seed (int): Seed for the random generator
+
+    Returns:
+        Tuple[pd.Series, pd.Series]: Price strings and area strings
+    """
+    rng = np.random.default_rng(seed)
+    amount = rng.uniform(1, 999, n_rows).round(2).astype(str)
+    unit = rng.choice(np.array([' Lac', ' Cr', ''], dtype='<U4'), n_rows, p=[0.6, 0.3, 0.1])
+    prices = np.char.add(amount, unit).astype(object)
+    prices[rng.random(n_rows) < 0.02] = 'Call for Price'
+
+    area = rng.integers(100, 10000, n_rows).astype(str)
+    areas = np.char.add(area, rng.choice(np.array([' sqft', ' sqm', ' sqyrd'], dtype='<U6'), n_rows)).astype(object)
+    areas[rng.random(n_rows) < 0.05] = None
+    # Round-trip through the CSV reader so the columns get the dtype used in the pipeline
+    return pd.Series(prices).astype('str'), pd.Series(areas).astype('str').where(pd.notna(areas))
+
+
+def check_parity(prices: pd.Series, areas: pd.Series) -> None:
+    """
+    Assert that the vectorized parsers reproduce the row-by-row ones exactly
+
+    Args:
+        prices (pd.Series): Price strings
+        areas (pd.Series): Area strings
+    """
+    preprocessing = DataPreprocessing()
+    pd.testing.assert_series_equal(preprocessing.convert_prices(prices), legacy_prices(prices), check_exact=True)
+    pd.testing.assert_series_equal(preprocessing.convert_areas(areas), legacy_areas(areas), check_exact=True)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark vectorized price and area parsing')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000000, 10000000])
+    args = parser.parse_args()
+
+    # Step 1: Check that both implementations agree on realistic columns
+    check_parity(*make_columns(100000))
+    print('parity: vectorized parsing matches convert_price and the unit stripping exactly')
+
+    # Step 2: Time both implementations on each dataset size
+    preprocessing = DataPreprocessing()
+    print(f"{'rows':>10} {'column':>8} {'row by row (s)':>15} {'vectorized (s)':>15} {'speedup':>8}")
+    for n_rows in args.rows:
+        prices, areas = make_columns(n_rows)
+        for column, legacy, vectorized, values in (
+            ('price', legacy_prices, preprocessing.convert_prices, prices),
+            ('area', legacy_areas, preprocessing.convert_areas, areas),
+        ):
+            before = timed(legacy, values)
+            after = timed(vectorized, values)
+            print(f'{n_rows:>10} {column:>8} {before:>15.2f} {after:>15.2f} {before / after:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
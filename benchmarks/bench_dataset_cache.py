@@ -0,0 +1,66 @@
+# Columnar Dataset Cache Benchmark
+# Times ingestion and cleaning of the training CSV without the cache, on the first (cold) run
+# that converts the CSV to the Arrow cache, and on later (warm) runs that memory-map it
+# Usage: python -m benchmarks.bench_dataset_cache [--rows 1000000] [--warm-runs 3]
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from benchmarks.bench_ingestion import write_csv
+from Data_analysis.data_cleaning import DataPreprocessing
+from steps.ingest_data import cache_csv, read_cached
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_uncached(path: str):
+    # ingestdata_step + clean_df: parse the whole CSV on every run
+    raw, load = timed(pd.read_csv, path)
+    cleaned, clean = timed(DataPreprocessing().handle_data, raw)
+    return cleaned, {'cache': 0.0, 'load': load, 'clean': clean}
+
+
+def run_cached(path: str, cache_dir: str):
+    # cache_data_step + clean_cached_df: hash the CSV, convert it if needed, read projected columns
+    cached, cache = timed(cache_csv, path, cache_dir)
+    raw, load = timed(read_cached, cached)
+    cleaned, clean = timed(DataPreprocessing().handle_data, raw)
+    return cleaned, {'cache': cache, 'load': load, 'clean': clean}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the columnar dataset cache')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--warm-runs', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'listings.csv')
+        cache_dir = os.path.join(directory, 'cache')
+        write_csv(path, args.rows)
+
+        runs = [('no cache', *run_uncached(path)), ('cold', *run_cached(path, cache_dir))]
+        for i in range(args.warm_runs):
+            runs.append((f'warm {i + 1}', *run_cached(path, cache_dir)))
+
+        # Every run must produce exactly the cleaned data of the uncached path
+        for _, cleaned, _ in runs[1:]:
+            pd.testing.assert_frame_equal(cleaned, runs[0][1], check_exact=True)
+        print('parity: cleaned data from the cache matches the CSV path')
+
+        cache_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        print(f'{args.rows} rows: CSV {os.path.getsize(path) / 2 ** 20:.0f} MB, '
+              f'Arrow cache {os.path.getsize(cache_file) / 2 ** 20:.0f} MB')
+        print(f"{'run':>9} {'hash/convert (s)':>17} {'load (s)':>9} {'clean (s)':>10} {'total (s)':>10}")
+        for name, _, seconds in runs:
+            print(f"{name:>9} {seconds['cache']:>17.2f} {seconds['load']:>9.2f} {seconds['clean']:>10.2f} "
+                  f"{sum(seconds.values()):>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+# Train/Test Division Benchmark
+# Compares the division used before (scale the whole dataset in float64, rebuild the DataFrame,
+# then split it) with DataDivision (split the row positions, fit the scaler on the training rows,
+# scale chunk by chunk into one float32 matrix): wall time, memory used on top of the cleaned
+# dataset at the peak, and size of the four outputs that clean_df stores as ZenML artifacts
+# Each version runs in its own process so that its peak memory can be measured
+# Usage: python -m benchmarks.bench_division [--rows 5000000]
+import argparse
+import io
+import json
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from benchmarks.bench_ingestion import peak_rss_mb
+from benchmarks.bench_preprocessing import reset_peak_rss
+from Data_analysis.data_cleaning import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, DataDivision
+from steps.profiling import artifact_bytes
+
+
+def legacy_division(dataset: pd.DataFrame):
+    # Division as done before: scaler fitted on every row, float64 copies of all features
+    X = dataset[FEATURE_COLUMNS]
+    y = dataset['Amount(in rupees)']
+    X = pd.DataFrame(StandardScaler().fit_transform(X), columns=X.columns)
+    return train_test_split(X, y, test_size=0.33, random_state=42)
+
+
+VERSIONS = {'before': legacy_division, 'after': lambda dataset: DataDivision().handle_data(dataset)}
+
+
+def make_cleaned(n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Dataset with the columns and dtypes DataPreprocessing returns
+
+    Args:
+        n_rows (int): Number of rows
+        seed (int): Seed for the random generator
+
+    Returns:
+        pd.DataFrame: Label codes as int64, counts, areas and prices as float64
+    """
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in FEATURE_COLUMNS:
+        if col in CATEGORICAL_COLUMNS:
+            columns[col] = rng.integers(0, 500, n_rows)
+        else:
+            columns[col] = rng.lognormal(5, 1, n_rows).round()
+    columns['Amount(in rupees)'] = np.exp(rng.normal(15.5, 1.0, n_rows))
+    # Rows dropped by the cleaning leave gaps in the index
+    return pd.DataFrame(columns, index=np.arange(0, 2 * n_rows, 2))
+
+
+def parquet_bytes(frames) -> int:
+    # Size of the outputs as the ZenML pandas materializer stores them
+    total = 0
+    for frame in frames:
+        buffer = io.BytesIO()
+        (frame if isinstance(frame, pd.DataFrame) else frame.to_frame()).to_parquet(buffer)
+        total += buffer.tell()
+    return total
+
+
+def check_parity(n_rows: int) -> None:
+    """
+    Assert that DataDivision picks the same rows as before and scales them with a scaler fitted on the training rows
+
+    Args:
+        n_rows (int): Rows compared
+    """
+    dataset = make_cleaned(n_rows, seed=1)
+    division = DataDivision()
+    X_train, X_test, y_train, y_test = division.handle_data(dataset)
+    _, _, legacy_y_train, legacy_y_test = legacy_division(dataset)
+    pd.testing.assert_series_equal(y_train, legacy_y_train)
+    pd.testing.assert_series_equal(y_test, legacy_y_test)
+
+    scaler = StandardScaler().fit(dataset.loc[y_train.index, FEATURE_COLUMNS])
+    for X, y in ((X_train, y_train), (X_test, y_test)):
+        expected = scaler.transform(dataset.loc[y.index, FEATURE_COLUMNS]).astype(np.float32)
+        assert np.array_equal(X.to_numpy(), expected), 'scaled features differ'
+
+
+def run_version(version: str, n_rows: int) -> None:
+    # Runs in a child process: prints the measurements of one version as JSON
+    dataset = make_cleaned(n_rows)
+    resettable = reset_peak_rss()
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    outputs = VERSIONS[version](dataset)
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': seconds,
+        'dataset_mb': dataset.memory_usage(deep=True).sum() / 2 ** 20,
+        # Without a resettable peak the figure includes building the dataset
+        'extra_mb': peak_rss_mb() - (before if resettable else 0),
+        'memory_mb': sum(artifact_bytes(output) for output in outputs) / 2 ** 20,
+        'parquet_mb': parquet_bytes(outputs) / 2 ** 20,
+    }))
+
+
+def measure(version: str, n_rows: int) -> dict:
+    """
+    Divide the dataset with one version in a fresh process
+
+    Returns:
+        dict: Seconds, size of the dataset, memory above it at the peak, and size of
+            the outputs in memory and as Parquet, in MB
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_division', '--run-version', version, '--rows', str(n_rows)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the train/test division')
+    parser.add_argument('--rows', type=int, default=5000000, help='rows of the cleaned dataset')
+    parser.add_argument('--run-version', choices=list(VERSIONS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_version:
+        run_version(args.run_version, args.rows)
+        return
+
+    # Step 1: Check the rows and the scaling of DataDivision
+    check_parity(200000)
+    print('parity: same train/test rows as before, scaled with a scaler fitted on the training rows')
+
+    # Step 2: Time both versions and measure their memory and outputs on the full-size dataset
+    print(f'{args.rows} cleaned rows')
+    print(f"{'version':>8} {'seconds':>8} {'dataset (MB)':>13} {'peak extra (MB)':>16} {'outputs (MB)':>13} "
+          f"{'parquet (MB)':>13}")
+    for version in VERSIONS:
+        result = measure(version, args.rows)
+        print(f"{version:>8} {result['seconds']:>8.2f} {result['dataset_mb']:>13.0f} {result['extra_mb']:>16.0f} "
+              f"{result['memory_mb']:>13.0f} {result['parquet_mb']:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+# Model Evaluation Benchmark
+# Compares the evaluation engine of Data_analysis/model_evaluation.py with the sklearn metric functions
+# for point metrics, bootstrap confidence intervals and per-segment metrics, and the forest prediction
+# band computed from one pass over the trees with predicting the forest and its trees separately
+# Usage: python -m benchmarks.bench_evaluation [--rows 1000000] [--bootstrap 200] [--segments 500]
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_absolute_percentage_error, r2_score
+from Data_analysis.model_evaluation import evaluate, forest_predictions
+
+
+def sklearn_metrics(y, predictions):
+    # Evaluation before the engine: one sklearn call (one pass) per metric
+    return {
+        'r2_score': r2_score(y, predictions),
+        'rmse': np.sqrt(((y - predictions) ** 2).mean()),
+        'mae': mean_absolute_error(y, predictions),
+        'mape': mean_absolute_percentage_error(y, predictions),
+    }
+
+
+def sklearn_bootstrap(y, predictions, n_bootstrap, seed=42):
+    # Textbook bootstrap: resample the rows with replacement and recompute every metric
+    rng = np.random.default_rng(seed)
+    replicates = []
+    for _ in range(n_bootstrap):
+        index = rng.integers(0, len(y), len(y))
+        replicates.append(sklearn_metrics(y[index], predictions[index]))
+    return {name: np.percentile([r[name] for r in replicates], [2.5, 97.5]) for name in replicates[0]}
+
+
+def sklearn_segments(y, predictions, codes, n_segments):
+    # One boolean mask and one set of metric calls per segment
+    results = []
+    for segment in range(n_segments):
+        mask = codes == segment
+        if mask.sum() > 1:
+            results.append(sklearn_metrics(y[mask], predictions[mask]))
+    return results
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Model evaluation benchmark')
+    parser.add_argument('--rows', type=int, default=1000000, help='evaluated rows')
+    parser.add_argument('--bootstrap', type=int, default=200, help='bootstrap replicates')
+    parser.add_argument('--segments', type=int, default=500, help='segments of the breakdown (e.g. locations)')
+    parser.add_argument('--forest-rows', type=int, default=20000, help='test rows of the forest comparison')
+    parser.add_argument('--trees', type=int, default=100, help='trees of the forest comparison')
+    args = parser.parse_args()
+
+    # Prices of a few lakhs to a few crores and predictions within about 20% of them
+    rng = np.random.default_rng(0)
+    y = np.exp(rng.normal(15.5, 1.0, args.rows))
+    predictions = y * rng.lognormal(0, 0.2, args.rows)
+    codes = rng.integers(0, args.segments, args.rows)
+    segments = {'segment': (codes, [str(i) for i in range(args.segments)])}
+
+    # Parity: point metrics and segment metrics match sklearn
+    reference, sklearn_seconds = timed(lambda: sklearn_metrics(y, predictions))
+    report, engine_seconds = timed(lambda: evaluate(y, predictions, n_bootstrap=0))
+    for name, value in reference.items():
+        assert np.isclose(report['metrics'][name], value, rtol=1e-9), f'{name} differs'
+    print(f'parity: metrics of {args.rows} rows match sklearn (rtol 1e-9)')
+    print(f'point metrics      sklearn {sklearn_seconds * 1e3:9.1f} ms   engine {engine_seconds * 1e3:9.1f} ms   '
+          f'x{sklearn_seconds / engine_seconds:.1f}')
+
+    reference, sklearn_seconds = timed(lambda: sklearn_segments(y, predictions, codes, args.segments))
+    report, engine_seconds = timed(lambda: evaluate(y, predictions, segments, n_bootstrap=0))
+    engine_segments = [record for record in report['segments']['segment'] if record['rows'] > 1]
+    for expected, actual in zip(reference, engine_segments):
+        assert all(np.isclose(actual[name], value, rtol=1e-9) for name, value in expected.items())
+    print(f'{args.segments} segments       sklearn {sklearn_seconds * 1e3:9.1f} ms   engine {engine_seconds * 1e3:9.1f} ms   '
+          f'x{sklearn_seconds / engine_seconds:.1f}')
+
+    # Bootstrap: the two methods draw different replicates, so the intervals are only compared loosely
+    reference, sklearn_seconds = timed(lambda: sklearn_bootstrap(y, predictions, args.bootstrap))
+    report, engine_seconds = timed(lambda: evaluate(y, predictions, n_bootstrap=args.bootstrap))
+    for name, (low, high) in reference.items():
+        engine_low, engine_high = report['intervals'][name]
+        print(f'  {name:9} 95% CI sklearn [{low:.6g}, {high:.6g}]   engine [{engine_low:.6g}, {engine_high:.6g}]')
+    print(f'{args.bootstrap} bootstraps     sklearn {sklearn_seconds * 1e3:9.1f} ms   engine {engine_seconds * 1e3:9.1f} ms   '
+          f'x{sklearn_seconds / engine_seconds:.1f}')
+
+    # Forest: predict, then predict every tree again for the band, against one pass over the trees
+    X = rng.normal(size=(args.forest_rows * 2, 10)).astype(np.float32)
+    target = X[:, 0] * 3 + X[:, 1] ** 2 + rng.normal(size=len(X))
+    X = pd.DataFrame(X, columns=[f'f{i}' for i in range(X.shape[1])])
+    model = RandomForestRegressor(n_estimators=args.trees, max_depth=12, n_jobs=1, random_state=0)
+    model.fit(X[:args.forest_rows], target[:args.forest_rows])
+    X_test = X[args.forest_rows:]
+
+    def separate():
+        predicted = model.predict(X_test)
+        trees = np.column_stack([tree.predict(X_test.to_numpy(dtype=np.float32)) for tree in model.estimators_])
+        return predicted, np.quantile(trees, [0.05, 0.95], axis=1)
+
+    (predicted, _), separate_seconds = timed(separate)
+    (shared, _, _), shared_seconds = timed(lambda: forest_predictions(model, X_test))
+    assert np.allclose(predicted, shared, rtol=1e-12), 'forest predictions differ'
+    print(f'forest + band      separate {separate_seconds * 1e3:8.1f} ms   shared {shared_seconds * 1e3:9.1f} ms   '
+          f'x{separate_seconds / shared_seconds:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# Ingestion Benchmark
+# Compares loading the whole training CSV and cleaning it (ingestdata_step + DataPreprocessing)
+# with streaming it in chunks with an explicit schema (clean_csv_in_chunks + ChunkedPreprocessing)
+# Each mode runs in its own process so that its peak memory can be measured
+# Usage: python -m benchmarks.bench_ingestion [--rows 2000000] [--chunksize 100000]
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import pandas as pd
+from benchmarks.synthetic import make_listings
+from Data_analysis.data_cleaning import ChunkedPreprocessing, DataPreprocessing
+from steps.ingest_data import read_csv_chunks
+
+
+def clean_full(path: str, chunksize: int) -> pd.DataFrame:
+    return DataPreprocessing().handle_data(pd.read_csv(path))
+
+
+def clean_chunked(path: str, chunksize: int) -> pd.DataFrame:
+    return ChunkedPreprocessing().handle_data(lambda columns: read_csv_chunks(path, chunksize, columns))
+
+
+MODES = {'full': clean_full, 'chunked': clean_chunked}
+
+
+def write_csv(path: str, n_rows: int) -> None:
+    """
+    Write synthetic listings to a CSV file, in slices to keep the generator's memory low
+
+    Args:
+        path (str): Output file
+        n_rows (int): Number of listings
+    """
+    step = 500000
+    for start in range(0, n_rows, step):
+        listings = make_listings(min(step, n_rows - start), seed=start)
+        listings['Index'] += start
+        listings.to_csv(path, mode='w' if start == 0 else 'a', header=start == 0, index=False)
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is reset by exec; ru_maxrss would still include the memory of the forking parent
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode: str, path: str, chunksize: int) -> None:
+    # Runs in a child process: prints elapsed seconds, cleaned rows and peak RSS in MB
+    start = time.perf_counter()
+    dataset = MODES[mode](path, chunksize)
+    elapsed = time.perf_counter() - start
+    print(f'{elapsed} {len(dataset)} {peak_rss_mb()}')
+
+
+def measure(mode: str, path: str, chunksize: int):
+    """
+    Run one mode in a fresh process
+
+    Returns:
+        Tuple[float, int, float]: Seconds, cleaned rows and peak resident memory in MB
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_ingestion', '--run-mode', mode, '--csv', path,
+         '--chunksize', str(chunksize)],
+        check=True, capture_output=True, text=True,
+    ).stdout.split()
+    return float(output[0]), int(output[1]), float(output[2])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark whole-file versus chunked CSV ingestion')
+    parser.add_argument('--rows', type=int, default=2000000)
+    parser.add_argument('--chunksize', type=int, default=100000)
+    parser.add_argument('--run-mode', choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode, args.csv, args.chunksize)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Step 1: Check that both modes produce the same cleaned data on a small file
+        small = os.path.join(directory, 'small.csv')
+        write_csv(small, 20000)
+        pd.testing.assert_frame_equal(clean_chunked(small, 3000), clean_full(small, 0), check_exact=True)
+        print('parity: chunked cleaning matches DataPreprocessing on the whole file')
+
+        # Step 2: Time both modes and measure their peak memory on the full-size file
+        path = os.path.join(directory, 'listings.csv')
+        write_csv(path, args.rows)
+        print(f'{args.rows} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB of CSV, chunks of {args.chunksize} rows')
+        print(f"{'mode':>8} {'seconds':>8} {'rows kept':>10} {'peak RSS (MB)':>14}")
+        for mode in ('chunked', 'full'):
+            seconds, rows, peak = measure(mode, path, args.chunksize)
+            print(f'{mode:>8} {seconds:>8.2f} {rows:>10} {peak:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
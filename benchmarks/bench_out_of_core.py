@@ -0,0 +1,138 @@
+# Out-of-Core Training Benchmark
+# Compares training in memory (pd.read_csv + DataPreprocessing + DataDivision + RandomForestModel) with
+# out-of-core training (FeatureStore.build + train_forest: float32 blocks on disk, one sub-forest per block)
+# on the same synthetic CSV, recording wall time, peak memory and test accuracy of each
+# Each mode runs in its own process so that its peak memory can be measured
+# Usage: python -m benchmarks.bench_out_of_core [--rows 400000] [--block-rows 100000] [--trees 20]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, r2_score
+from benchmarks.bench_ingestion import peak_rss_mb, write_csv
+from Data_analysis.data_cleaning import ChunkedPreprocessing, DataDivision, DataPreprocessing
+from Data_analysis.feature_store import FeatureStore, train_forest
+from Data_analysis.model_dev import get_model
+from steps.ingest_data import read_csv_chunks
+
+
+def in_memory(path: str, store_dir: str, args) -> tuple:
+    X_train, X_test, y_train, y_test = DataDivision().handle_data(DataPreprocessing().handle_data(pd.read_csv(path)))
+    prepared = time.perf_counter()
+    model = get_model('random_forest', {'n_estimators': args.trees}).train(X_train, y_train)
+    return prepared, model, X_test, y_test
+
+
+def out_of_core(path: str, store_dir: str, args) -> tuple:
+    store = FeatureStore(store_dir).build(lambda columns: read_csv_chunks(path, args.chunksize, columns),
+                                          block_rows=args.block_rows, chunk_rows=args.chunksize)
+    prepared = time.perf_counter()
+    model = train_forest(store_dir, {'n_estimators': args.trees})
+    X_test, y_test = store.test_sample()
+    return prepared, model, X_test, y_test
+
+
+MODES = {'in_memory': in_memory, 'out_of_core': out_of_core}
+
+
+def check_parity(path: str, store_dir: str, chunksize: int) -> None:
+    """
+    Assert that the store holds the rows and classes of the chunked in-memory cleaning
+
+    Args:
+        path (str): Small CSV file
+        store_dir (str): Directory for the store
+        chunksize (int): Rows read at a time
+    """
+    store = FeatureStore(store_dir).build(lambda columns: read_csv_chunks(path, chunksize, columns),
+                                          block_rows=max(1, chunksize // 2), chunk_rows=chunksize)
+    reference = ChunkedPreprocessing()
+    division = DataDivision()
+    X_train, X_test, _, _ = division.handle_data(reference.handle_data(lambda columns: read_csv_chunks(path, chunksize, columns)))
+    assert store.categories_ == reference.categories_ and store.modes_ == reference.modes_, 'classes or modes differ'
+
+    # The same rows, whatever the split: each scaler is fitted on its own training rows,
+    # so both matrices are unscaled (up to float32 rounding) and compared sorted
+    blocks = [store.block(block)[0] for block in range(store.n_blocks)]
+    actual = store.scaler_.inverse_transform(np.vstack(blocks + [store.test_sample()[0].to_numpy()]).astype(np.float64))
+    expected = division.scaler_.inverse_transform(np.vstack([X_train, X_test]).astype(np.float64))
+    actual = actual[np.lexsort(actual.T[::-1])]
+    expected = expected[np.lexsort(expected.T[::-1])]
+    assert actual.shape == expected.shape and np.allclose(actual, expected, rtol=1e-5, atol=1e-2), 'rows differ'
+
+
+def run_mode(mode: str, path: str, args) -> None:
+    # Runs in a child process: prints the measurements of one mode as JSON
+    with tempfile.TemporaryDirectory() as store_dir:
+        start = time.perf_counter()
+        prepared, model, X_test, y_test = MODES[mode](path, store_dir, args)
+        trained = time.perf_counter()
+        predictions = model.predict(X_test[list(model.feature_names_in_)])
+        print(json.dumps({
+            'prepare_seconds': prepared - start,
+            'train_seconds': trained - prepared,
+            'peak_mb': peak_rss_mb(),
+            'r2': r2_score(y_test, predictions),
+            'mae': mean_absolute_error(y_test, predictions),
+            'trees': len(model.estimators_),
+        }))
+
+
+def measure(mode: str, path: str, args) -> dict:
+    """
+    Train in one mode in a fresh process
+
+    Returns:
+        dict: Preparation and training seconds, peak resident memory in MB (of the process;
+            with several workers, each also holds one block), test R² and MAE, and the number of trees
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_out_of_core', '--run-mode', mode, '--csv', path,
+         '--chunksize', str(args.chunksize), '--block-rows', str(args.block_rows), '--trees', str(args.trees)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark out-of-core training against in-memory training')
+    parser.add_argument('--rows', type=int, default=400000, help='synthetic listings in the CSV')
+    parser.add_argument('--chunksize', type=int, default=100000, help='rows read at a time')
+    parser.add_argument('--block-rows', type=int, default=100000, help='most training rows per sub-forest')
+    parser.add_argument('--trees', type=int, default=20, help='trees of the forest')
+    parser.add_argument('--run-mode', choices=list(MODES), help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_mode:
+        run_mode(args.run_mode, args.csv, args)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Step 1: Check that the store holds the same data as the in-memory cleaning on a small file
+        small = os.path.join(directory, 'small.csv')
+        write_csv(small, 20000)
+        check_parity(small, os.path.join(directory, 'store'), 3000)
+        print('parity: feature store rows, classes and scaling match ChunkedPreprocessing + DataDivision')
+
+        # Step 2: Train both ways on the full-size file
+        path = os.path.join(directory, 'listings.csv')
+        write_csv(path, args.rows)
+        print(f'{args.rows} rows, {os.path.getsize(path) / 2 ** 20:.0f} MB of CSV, {args.trees} trees, '
+              f'blocks of {args.block_rows} rows, {os.cpu_count()} CPUs')
+        print(f"{'mode':>12} {'prepare (s)':>12} {'train (s)':>10} {'peak (MB)':>10} "
+              f"{'R2':>7} {'MAE':>12}")
+        for mode in MODES:
+            result = measure(mode, path, args)
+            print(f"{mode:>12} {result['prepare_seconds']:>12.2f} {result['train_seconds']:>10.2f} "
+                  f"{result['peak_mb']:>10.0f} {result['r2']:>7.4f} "
+                  f"{result['mae']:>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# Preprocessing Strategy Benchmark
+# Compares DataPreprocessing with LeanPreprocessing (compact dtypes, one deduplication pass,
+# no full-frame copies) on the same synthetic listings: wall time, memory used on top of
+# the raw frame at the peak of the cleaning, and size of the cleaned frame
+# The strategies only clean to the same rows when no Bathroom/Balcony count is missing, so
+# the listings are timed with those counts filled; the rows kept otherwise are reported first
+# Each strategy runs in its own process so that its peak memory can be measured
+# Usage: python -m benchmarks.bench_preprocessing [--rows 1000000]
+import argparse
+import ctypes
+import json
+import subprocess
+import sys
+import time
+import pandas as pd
+from benchmarks.bench_ingestion import peak_rss_mb
+from benchmarks.synthetic import make_listings
+from Data_analysis.data_cleaning import MODE_FILLED_COLUMNS, PREPROCESSING_STRATEGIES, get_preprocessing
+
+
+def reset_peak_rss() -> bool:
+    # Return the heap freed while building the input to the system, so the cleaning cannot
+    # reuse it unseen, then reset VmHWM (writing 5 to clear_refs) to the current resident size
+    try:
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def make_input(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Synthetic listings on which both strategies clean to the same rows
+
+    DataPreprocessing fills missing counts through an index-aligned mode, which
+    only fills the first rows, and LeanPreprocessing fills them all; with the
+    counts filled beforehand, neither has anything left to fill.
+
+    Args:
+        n_rows (int): Number of listings
+        seed (int): Seed for the random generator
+
+    Returns:
+        pd.DataFrame: Raw listings without missing Bathroom/Balcony counts
+    """
+    listings = make_listings(n_rows, seed)
+    for col in MODE_FILLED_COLUMNS:
+        listings[col] = listings[col].fillna(listings[col].mode().iloc[0])
+    return listings
+
+
+def rows_kept(n_rows: int) -> dict:
+    """
+    Rows each strategy keeps from listings with missing counts
+
+    Returns:
+        dict: Rows kept per strategy name
+    """
+    raw = make_listings(n_rows, seed=7)
+    return {name: len(get_preprocessing(name).handle_data(raw.copy())) for name in PREPROCESSING_STRATEGIES}
+
+
+def check_parity(n_rows: int) -> None:
+    """
+    Assert that LeanPreprocessing keeps the rows and values of DataPreprocessing on the benchmark input
+
+    Args:
+        n_rows (int): Synthetic listings compared
+    """
+    listings = make_input(n_rows, seed=7)
+    standard = get_preprocessing('standard')
+    lean = get_preprocessing('lean')
+    expected = standard.handle_data(listings.copy())
+    actual = lean.handle_data(listings)
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+    known = {col: [value for value in values if not pd.isna(value)] for col, values in standard.categories_.items()}
+    assert known == lean.categories_, 'category lists differ'
+
+
+def run_strategy(name: str, n_rows: int) -> None:
+    # Runs in a child process: prints the measurements of one strategy as JSON
+    raw = make_input(n_rows)
+    raw_mb = raw.memory_usage(deep=True).sum() / 2 ** 20
+    resettable = reset_peak_rss()
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    cleaned = get_preprocessing(name).handle_data(raw)
+    seconds = time.perf_counter() - start
+    print(json.dumps({
+        'seconds': seconds,
+        'raw_mb': raw_mb,
+        # Without a resettable peak the figure includes building the synthetic input
+        'extra_mb': peak_rss_mb() - (before if resettable else 0),
+        'cleaned_mb': cleaned.memory_usage(deep=True).sum() / 2 ** 20,
+        'rows': len(cleaned),
+    }))
+
+
+def measure(name: str, n_rows: int) -> dict:
+    """
+    Clean the listings with one strategy in a fresh process
+
+    Returns:
+        dict: Seconds, size of the raw frame, memory above it at the peak and
+            size of the cleaned frame in MB, and the rows kept
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_preprocessing', '--run-strategy', name, '--rows', str(n_rows)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the preprocessing strategies')
+    parser.add_argument('--rows', type=int, default=1000000, help='synthetic listings before cleaning')
+    parser.add_argument('--run-strategy', choices=list(PREPROCESSING_STRATEGIES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_strategy:
+        run_strategy(args.run_strategy, args.rows)
+        return
+
+    # Step 1: Show how many rows each strategy keeps when counts are missing
+    kept = rows_kept(100000)
+    print('rows kept from 100000 listings with missing counts: '
+          + ', '.join(f'{name} {rows}' for name, rows in kept.items()))
+
+    # Step 2: Check that both strategies keep the same rows with the same values on the benchmark input
+    check_parity(100000)
+    print('parity: with counts filled, LeanPreprocessing matches DataPreprocessing (values equal, dtypes compact)')
+
+    # Step 3: Time both strategies and measure their memory on the full-size listings, counts filled
+    print(f"{args.rows} synthetic listings, missing counts filled")
+    print(f"{'strategy':>9} {'seconds':>8} {'raw (MB)':>9} {'peak extra (MB)':>16} {'cleaned (MB)':>13} {'rows':>9}")
+    for name in PREPROCESSING_STRATEGIES:
+        result = measure(name, args.rows)
+        print(f"{name:>9} {result['seconds']:>8.2f} {result['raw_mb']:>9.0f} {result['extra_mb']:>16.0f} "
+              f"{result['cleaned_mb']:>13.0f} {result['rows']:>9}")
+
+
+if __name__ == '__main__':
+    main()
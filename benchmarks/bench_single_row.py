@@ -0,0 +1,54 @@
+# Single-Row Inference Benchmark
+# Compares the DataFrame prediction path with the pandas-free fast path used by /predict
+# Usage: python -m benchmarks.bench_single_row [--rows 20000] [--requests 2000]
+import argparse
+import time
+import numpy as np
+from benchmarks.synthetic import make_listings, to_api_rows, train_artifacts
+from serving.inference import FastPredictor, predict_frame
+
+
+def time_requests(predict, rows) -> np.ndarray:
+    """
+    Time one call of predict per row
+
+    Args:
+        predict: Callable taking one validated API dict
+        rows (list): Request bodies to score
+
+    Returns:
+        np.ndarray: Latency of each call in microseconds
+    """
+    latencies = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        predict(row)
+        latencies[i] = time.perf_counter() - start
+    return latencies * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Single-row inference benchmark')
+    parser.add_argument('--rows', type=int, default=20000, help='synthetic listings used for training')
+    parser.add_argument('--requests', type=int, default=2000, help='single-row requests per path')
+    args = parser.parse_args()
+
+    listings = make_listings(args.rows)
+    model, preprocessor = train_artifacts(listings)
+    rows = to_api_rows(listings.sample(args.requests, random_state=0))
+    # Include categories never seen during training to exercise the fallback
+    rows[0] = dict(rows[0], Society='Unseen Society', location='Unseen location')
+
+    # Both paths predict the same prices: see tests/test_inference.py
+    fast = FastPredictor(model, preprocessor)
+
+    for name, predict in [
+        ('dataframe', lambda row: predict_frame(model, preprocessor, row)),
+        ('fast', fast.predict),
+    ]:
+        latencies = time_requests(predict, rows)
+        print(f'{name:>10}: p50 {np.percentile(latencies, 50):8.1f} us   p99 {np.percentile(latencies, 99):8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# Training Benchmark
+# Fits the registered models of Data_analysis.model_dev on synthetic listings, cleaned and split as in the pipeline,
+# and records wall time, peak memory and the test R² and MAE of each configuration
+# Each configuration runs in its own process so that its peak memory can be measured
+# Usage: python -m benchmarks.bench_training [--rows 200000]
+#            [--models random_forest:n_jobs=1 random_forest hist_gradient_boosting:max_iter=300]
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from sklearn.metrics import mean_absolute_error, r2_score
+from benchmarks.bench_ingestion import peak_rss_mb
+from benchmarks.synthetic import make_listings
+from Data_analysis.data_cleaning import DataDivision, DataPreprocessing
+from Data_analysis.model_dev import get_model
+
+DEFAULT_MODELS = ['random_forest:n_jobs=1', 'random_forest', 'hist_gradient_boosting']
+
+
+def parse_spec(spec: str):
+    """
+    Parse a model specification "name[:param=value,...]"
+
+    Values are read as JSON when possible (numbers, booleans, null) and kept as strings otherwise.
+
+    Args:
+        spec (str): Specification given on the command line
+
+    Returns:
+        Tuple[str, dict]: Registered model name and hyperparameters
+    """
+    name, _, settings = spec.partition(':')
+    params = {}
+    for setting in filter(None, settings.split(',')):
+        key, _, value = setting.partition('=')
+        try:
+            params[key] = json.loads(value)
+        except ValueError:
+            params[key] = value
+    return name, params
+
+
+def run_spec(spec: str, n_rows: int) -> None:
+    # Runs in a child process: prints the measurements of one configuration as JSON
+    dataset = DataPreprocessing().handle_data(make_listings(n_rows))
+    X_train, X_test, y_train, y_test = DataDivision().handle_data(dataset)
+    name, params = parse_spec(spec)
+    model = get_model(name, params)
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    fitted = model.train(X_train, y_train)
+    seconds = time.perf_counter() - start
+    peak = peak_rss_mb()
+
+    predictions = fitted.predict(X_test)
+    print(json.dumps({
+        'seconds': seconds,
+        'data_mb': before,
+        'peak_mb': peak,
+        'r2': r2_score(y_test, predictions),
+        'mae': mean_absolute_error(y_test, predictions),
+        # Lets runs that must train the same model (e.g. different n_jobs) be compared
+        'digest': hashlib.sha1(predictions.tobytes()).hexdigest()[:12],
+    }))
+
+
+def measure(spec: str, n_rows: int) -> dict:
+    """
+    Train one configuration in a fresh process
+
+    Returns:
+        dict: Fit seconds, resident memory before and at the peak of the fit in MB,
+            test R² and MAE, and a digest of the test predictions
+    """
+    output = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_training', '--run-spec', spec, '--rows', str(n_rows)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the training backends')
+    parser.add_argument('--rows', type=int, default=200000, help='synthetic listings before cleaning')
+    parser.add_argument('--models', nargs='+', default=DEFAULT_MODELS,
+                        help='model specifications, name[:param=value,...]')
+    parser.add_argument('--run-spec', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_spec:
+        run_spec(args.run_spec, args.rows)
+        return
+
+    print(f'{args.rows} synthetic listings, {os.cpu_count()} CPUs')
+    print(f"{'model':>45} {'fit (s)':>8} {'data (MB)':>10} {'peak (MB)':>10} {'R2':>7} {'MAE':>12} {'digest':>13}")
+    results = {}
+    for spec in args.models:
+        result = measure(spec, args.rows)
+        results[spec] = result
+        print(f"{spec:>45} {result['seconds']:>8.2f} {result['data_mb']:>10.0f} {result['peak_mb']:>10.0f} "
+              f"{result['r2']:>7.4f} {result['mae']:>12.0f} {result['digest']:>13}")
+
+    # Parallel fitting must not change the forest: specifications that differ only in n_jobs agree exactly
+    groups = {}
+    for spec, result in results.items():
+        name, params = parse_spec(spec)
+        params.pop('n_jobs', None)
+        groups.setdefault((name, json.dumps(params, sort_keys=True)), set()).add(result['digest'])
+    for (name, params), digests in groups.items():
+        assert len(digests) == 1, f'{name} {params}: predictions depend on n_jobs'
+
+
+if __name__ == '__main__':
+    main()
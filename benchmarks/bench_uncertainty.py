@@ -0,0 +1,80 @@
+# Prediction Interval Benchmark
+# Measures the cost of the prediction intervals returned by the API against plain model.predict:
+# one traversal of all trees (FlatForest.predict_interval, which calls the sklearn trees for large batches)
+# versus calling every tree in Python and summarizing with NumPy
+# Usage: python -m benchmarks.bench_uncertainty [--rows 20000] [--batches 1 32 1000] [--requests 300]
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.bench_single_row import time_requests
+from benchmarks.synthetic import make_listings, to_api_rows, train_artifacts
+from serving.inference import FastPredictor, predict_frame, predict_frame_intervals, uncertainty_forest
+
+
+def per_tree_loop(model, X: np.ndarray, level: float):
+    # The straightforward version: one tree.predict call per tree, then the spread
+    trees = np.column_stack([tree.predict(X, check_input=False) for tree in model.estimators_])
+    return trees.mean(axis=1), trees.std(axis=1), *np.quantile(trees, [(1 - level) / 2, (1 + level) / 2], axis=1)
+
+
+def best_of(func, repeat: int) -> float:
+    # Best wall time of several runs, in microseconds
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Prediction interval benchmark')
+    parser.add_argument('--rows', type=int, default=20000, help='synthetic listings used for training')
+    parser.add_argument('--batches', type=int, nargs='+', default=[1, 32, 1000], help='rows per prediction call')
+    parser.add_argument('--requests', type=int, default=300, help='single-row requests of the API paths')
+    parser.add_argument('--level', type=float, default=0.9, help='share of the tree predictions inside the interval')
+    args = parser.parse_args()
+
+    listings = make_listings(args.rows)
+    model, preprocessor = train_artifacts(listings)
+    forest = uncertainty_forest(model)
+    print(f'{len(model.estimators_)} trees, {forest.value.size} nodes')
+
+    rows = to_api_rows(listings.sample(max(args.batches + [args.requests]), random_state=0))
+    features = preprocessor.transform(listings.sample(len(rows), random_state=0))
+    X = pd.DataFrame(features, columns=preprocessor.feature_names)[model.feature_names_in_]
+    X32 = np.ascontiguousarray(X, dtype=np.float32)
+
+    # Parity: the interval's centre is model.predict, its bounds and std those of the tree predictions
+    mean, std, lower, upper = forest.predict_interval(X, args.level)
+    reference = per_tree_loop(model, X32, args.level)
+    assert np.allclose(mean, model.predict(X), rtol=1e-9), 'interval centre differs from model.predict'
+    for name, actual, expected in zip(['std', 'lower', 'upper'], [std, lower, upper], reference[1:]):
+        assert np.allclose(actual, expected, rtol=1e-9), f'{name} differs from the per-tree loop'
+    print(f'parity: {len(X)} rows, centre = model.predict, std and bounds = per-tree loop')
+
+    print(f'{"rows":>6} {"model.predict":>15} {"per-tree loop":>15} {"interval":>15} {"overhead":>9}')
+    for batch in args.batches:
+        X_batch, X32_batch = X[:batch], X32[:batch]
+        repeat = 20 if batch > 100 else 100
+        plain = best_of(lambda: model.predict(X_batch), repeat)
+        looped = best_of(lambda: per_tree_loop(model, X32_batch, args.level), repeat)
+        flat = best_of(lambda: forest.predict_interval(X_batch, args.level), repeat)
+        print(f'{batch:>6} {plain:>12.0f} us {looped:>12.0f} us {flat:>12.0f} us {flat / plain:>8.2f}x')
+
+    # API paths: single-row fast path and DataFrame path, without and with intervals
+    fast = FastPredictor(model, preprocessor, forest)
+    single = rows[:args.requests]
+    for name, predict in [
+        ('fast', fast.predict),
+        ('fast + interval', lambda row: fast.predict_interval(row, args.level)),
+        ('dataframe', lambda row: predict_frame(model, preprocessor, row)),
+        ('dataframe + interval', lambda row: predict_frame_intervals(model, preprocessor, row, forest, args.level)),
+    ]:
+        latencies = time_requests(predict, single)
+        print(f'{name:>20}: p50 {np.percentile(latencies, 50):8.1f} us   p99 {np.percentile(latencies, 99):8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
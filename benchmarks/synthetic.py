@@ -0,0 +1,128 @@
+# Synthetic Data for Benchmarks
+# This module generates listings with the same schema as the raw house price CSV
+# so that benchmarks can run reproducibly without the real dataset
+import numpy as np
+import pandas as pd
+from Data_analysis.data_cleaning import DataDivision, DataPreprocessing
+from Data_analysis.model_dev import RandomForestModel
+from serving.preprocessor import Preprocessor
+
+# Categorical columns encoded during preprocessing
+CATEGORICAL_COLUMNS = ['Title', 'location', 'Transaction', 'Furnishing', 'facing', 'Status', 'Floor', 'Society']
+
+
+def make_listings(n_rows: int, seed: int = 42, n_locations: int = 200, n_societies: int = 5000) -> pd.DataFrame:
+    """
+    Generate raw listings with the columns and value formats of the scraped CSV
+
+    Cardinalities default to the order of magnitude seen in the real data:
+    a few hundred locations, thousands of societies and titles.
+
+    Args:
+        n_rows (int): Number of listings to generate
+        seed (int): Seed for the random generator
+        n_locations (int): Number of distinct locations
+        n_societies (int): Number of distinct societies
+
+    Returns:
+        pd.DataFrame: Raw listings, as returned by pd.read_csv on the original file
+    """
+    rng = np.random.default_rng(seed)
+    locations = np.array([f'location {i}' for i in range(n_locations)], dtype=object)
+    societies = np.array([f'Society {i}' for i in range(n_societies)], dtype=object)
+
+    location = rng.choice(locations, n_rows)
+    bhk = rng.integers(1, 6, n_rows).astype(str)
+    title = np.char.add(np.char.add(bhk, ' BHK Flat for sale in '), location.astype(str)).astype(object)
+
+    # The listing price is the carpet area times the price per sqft, with some noise, so that models
+    # trained on these listings have something to learn. Prices are written in lakhs, crores or plain
+    # rupees, with a few unparseable entries
+    carpet_area = rng.integers(300, 3000, n_rows)
+    carpet_text = np.char.add(carpet_area.astype(str), rng.choice([' sqft', ' sqm', ' sqyrd'], n_rows)).astype(object)
+    price_per_sqft = rng.uniform(2000, 20000, n_rows).round()
+    rupees = carpet_area * price_per_sqft * rng.lognormal(0, 0.2, n_rows)
+    unit = np.where(rupees >= 10000000, 'Cr', 'Lac')
+    unit[rng.random(n_rows) < 0.1] = ''
+    amount = (rupees / np.where(unit == 'Cr', 10000000, 100000)).round(2)
+    amount_text = np.where(
+        unit == '',
+        rupees.round().astype(np.int64).astype(str),
+        np.char.add(np.char.add(amount.astype(str), ' '), unit),
+    ).astype(object)
+    amount_text[rng.random(n_rows) < 0.02] = 'Call for Price'
+
+    def with_missing(values, rate=0.05):
+        values = values.astype(object)
+        values[rng.random(n_rows) < rate] = None
+        return values
+
+    return pd.DataFrame({
+        'Index': np.arange(n_rows),
+        'Title': title,
+        'Description': 'Multistorey apartment for sale',
+        'Amount(in rupees)': amount_text,
+        'Price (in rupees)': price_per_sqft,
+        'location': location,
+        'Carpet Area': carpet_text,
+        'Status': rng.choice(np.array(['Ready to Move', 'Under Construction'], dtype=object), n_rows),
+        'Floor': rng.choice(np.array([f'{i} out of 30' for i in range(30)], dtype=object), n_rows),
+        'Transaction': rng.choice(np.array(['Resale', 'New Property', 'Other'], dtype=object), n_rows),
+        'Furnishing': with_missing(rng.choice(np.array(['Furnished', 'Semi-Furnished', 'Unfurnished'], dtype=object), n_rows)),
+        'facing': with_missing(rng.choice(np.array(['East', 'West', 'North', 'South', 'North - East'], dtype=object), n_rows)),
+        'overlooking': 'Garden/Park',
+        'Society': rng.choice(societies, n_rows),
+        'Bathroom': with_missing(rng.integers(1, 5, n_rows)),
+        'Balcony': with_missing(rng.integers(0, 4, n_rows)),
+        'Car Parking': '1 Covered',
+        'Ownership': 'Freehold',
+        'Super Area': None,
+        'Dimensions': None,
+        'Plot Area': None,
+    })
+
+
+def to_api_rows(listings: pd.DataFrame) -> list:
+    """
+    Convert raw listings into request bodies accepted by the /predict endpoint
+
+    Args:
+        listings (pd.DataFrame): Raw listings from make_listings
+
+    Returns:
+        list: One dict per listing with the InputFeatures field names
+    """
+    api_rows = pd.DataFrame({
+        'Title': listings['Title'],
+        'Bathroom': listings['Bathroom'].fillna(1).astype(int),
+        'Carpet_Area': listings['Carpet Area'].str.extract(r'(\d+)', expand=False).astype(int),
+        'location': listings['location'],
+        'Transaction': listings['Transaction'],
+        'Furnishing': listings['Furnishing'].fillna('Unknow'),
+        'Balcony': listings['Balcony'].fillna(0).astype(int),
+        'facing': listings['facing'].fillna('Unknow'),
+        'Price_in_rupees': listings['Price (in rupees)'].astype(int),
+        'Status': listings['Status'],
+        'Society': listings['Society'],
+        'Floor': listings['Floor'],
+    })
+    return api_rows.to_dict(orient='records')
+
+
+def train_artifacts(listings: pd.DataFrame):
+    """
+    Train a model and its preprocessor on synthetic listings, as the pipeline would
+
+    Args:
+        listings (pd.DataFrame): Raw listings from make_listings
+
+    Returns:
+        Tuple containing the trained model and the fitted Preprocessor
+    """
+    preprocessing = DataPreprocessing()
+    dataset = preprocessing.handle_data(listings.copy())
+    division = DataDivision()
+    X_train, X_test, y_train, y_test = division.handle_data(dataset)
+    model = RandomForestModel().train(X_train, y_train)
+    preprocessor = Preprocessor.from_fitted(preprocessing.categories_, division.scaler_, division.feature_names_)
+    return model, preprocessor
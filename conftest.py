@@ -0,0 +1,3 @@
+# Pytest Configuration
+# Its location puts the repository root on sys.path, so the tests import the project
+# modules (Data_analysis, serving, steps, benchmarks) the way the pipeline and the API do
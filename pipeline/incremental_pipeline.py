@@ -0,0 +1,41 @@
+# ZenML Pipeline for Incremental Retraining
+# This file defines the workflow that updates the served model with the listings added since the last run
+# instead of retraining it on the whole dataset
+from steps.clean_data import clean_delta
+from steps.ingest_data import ingest_delta_step, snapshot_data_step
+from steps.train_model import updatemodel
+from zenml import pipeline
+
+@pipeline(enable_cache=False)
+def incrementalpipeline(data : str, new_trees : int = 10):
+    """
+    Incremental training pipeline orchestrated by ZenML
+
+    This pipeline executes the following steps in sequence:
+    1. Delta Ingestion: Load the rows of the CSV file not seen by the last run
+    2. Data Cleaning: Clean them with the saved fill values and encode them with
+       the saved preprocessor, adding new categories without renumbering the old ones
+    3. Model Update: Add trees fitted on the new rows to the saved model
+    4. Snapshot: Record the rows of the CSV file the model has now seen
+
+    trianingpipeline must have run once on the same file first. Listings
+    removed from the file stay in the model until the next full training.
+
+    Args:
+        data (str): Path to the CSV file containing house price data
+        new_trees (int): Trees (boosting iterations for gradient boosting) added to the model
+
+    Returns:
+        None: The pipeline saves the updated model for the API
+    """
+    # Step 1: Load the new and changed rows
+    delta = ingest_delta_step(data)
+
+    # Step 2: Clean and encode them like the training data
+    X_new, y_new, preprocessor = clean_delta(delta)
+
+    # Step 3: Add trees fitted on the new rows and save the model
+    updated_model = updatemodel(X_new, y_new, preprocessor, new_trees)
+
+    # Step 4: Remember the rows the model has seen, once it is saved
+    snapshot_data_step(data, after=updated_model)
@@ -1,39 +1,109 @@
 # ZenML Pipeline for House Price Prediction
 # This file defines the complete ML workflow using ZenML's pipeline decorator
 # The pipeline ensures reproducibility and tracks all steps automatically
-from steps.clean_data import clean_df
-from steps.ingest_data import ingestdata_step
+from steps.clean_data import clean_cached_df, clean_csv_in_chunks, clean_csv_to_feature_store, clean_df
+from steps.compress_model import compressmodel
+from steps.ingest_data import cache_data_step, ingestdata_step, snapshot_data_step
 from steps.evalute_model import evalutemodel
-from steps.train_model import trainmodel
+from steps.train_model import trainmodel, trainmodel_out_of_core
+from steps.tune_model import tunemodel
+from typing import List, Optional
 from zenml import pipeline
 
 @pipeline(enable_cache=True)
-def trianingpipeline(data : str):
+def trianingpipeline(data : str, chunksize : int = 0, cache_dir : str = '',
+                     model_name : str = 'random_forest', model_params : Optional[dict] = None,
+                     n_trials : int = 0, search_strategy : str = 'halving',
+                     compression_variants : Optional[List[str]] = None, serve_variant : str = '',
+                     preprocessing : str = 'standard', feature_store : str = '', block_rows : int = 1000000,
+                     stratify : bool = False):
     """
     Complete ML training pipeline orchestrated by ZenML
     
     This pipeline executes the following steps in sequence:
     1. Data Ingestion: Load data from CSV file
     2. Data Cleaning: Preprocess and prepare data for training
-    3. Model Training: Train the Random Forest model
-    4. Model Evaluation: Calculate and log performance metrics
+    3. Model Training: Train the configured model (Random Forest by default),
+       optionally with hyperparameters found by a cross-validated search
+    4. Model Evaluation: Calculate and log performance metrics, optionally after
+       comparing compressed variants of the forest and serving one of them
+    5. Snapshot: Record the rows of the CSV file, so incrementalpipeline can
+       later train on the new ones only
     
     Args:
         data (str): Path to the CSV file containing house price data
+        chunksize (int): When positive, steps 1-2 stream the CSV in chunks of this many
+            rows instead of loading it whole (see clean_csv_in_chunks)
+        cache_dir (str): When set, steps 1-2 convert the CSV once to a columnar file in this
+            directory, keyed by its content, and later runs read it instead of the CSV
+        model_name (str): Model to train, a key of Data_analysis.model_dev.MODELS
+            ("random_forest" or "hist_gradient_boosting")
+        model_params (Optional[dict]): Hyperparameters overriding the model defaults,
+            e.g. {"n_estimators": 300, "n_jobs": 8}
+        n_trials (int): When positive, the hyperparameters are first searched over this many
+            configurations (see tunemodel), keeping model_params fixed
+        search_strategy (str): "halving" (successive halving) or "random"
+        compression_variants (Optional[List[str]]): Compressed variants of the forest to compare,
+            e.g. ["depth=16", "trees=40,float32"] (see compressmodel); [] compares the defaults
+        serve_variant (str): Variant written to models/ in place of the trained forest
+        preprocessing (str): Cleaning strategy of step 2 when the whole CSV is loaded,
+            "standard" or "lean" (compact dtypes and more rows kept, see LeanPreprocessing)
+        feature_store (str): When set, training is out of core: steps 1-2 stream the CSV (in chunks
+            of chunksize rows, 100000 by default) into float32 blocks in this directory and step 3
+            fits one sub-forest per block (random_forest only, without search or compression)
+        block_rows (int): Most training rows per block of the feature store
+        stratify (bool): Split train/test with the same share of every price band in both sets
+            (not used by the feature store, which draws its test rows chunk by chunk)
     
     Returns:
         None: The pipeline saves the trained model and logs metrics to MLflow
     """
-    # Step 1: Load and ingest the raw data from CSV file
-    dataframe = ingestdata_step(data)
-    
-    # Step 2: Clean, preprocess data and split into train/test sets
-    # This step handles missing values, encoding categorical variables, and data scaling
-    X_train,X_test,y_train,y_test = clean_df(dataframe)
-    
-    # Step 3: Train the Random Forest model on the prepared training data
-    trained_model = trainmodel(X_train,y_train)
+    if feature_store:
+        if model_name != 'random_forest' or n_trials > 0 or compression_variants is not None or serve_variant:
+            raise ValueError('Out-of-core training supports random_forest without n_trials or compression')
+        # Steps 1-2: Stream the CSV into the on-disk feature store; only a sample of the test rows is returned
+        store,X_test,y_test,preprocessor = clean_csv_to_feature_store(data, chunksize or 100000, feature_store,
+                                                                      block_rows)
+    elif chunksize > 0:
+        # Steps 1-2: Stream the CSV and clean it chunk by chunk, then split into train/test sets
+        # Peak memory is bounded by the chunk size instead of the size of the raw file
+        X_train,X_test,y_train,y_test,preprocessor = clean_csv_in_chunks(data, chunksize, stratify)
+    elif cache_dir:
+        # Steps 1-2: Convert the CSV to the columnar cache (only when its content changed),
+        # then clean the columns DataPreprocessing needs, memory-mapped from the cache
+        dataset = cache_data_step(data, cache_dir)
+        X_train,X_test,y_train,y_test,preprocessor = clean_cached_df(dataset, stratify)
+    else:
+        # Step 1: Load and ingest the raw data from CSV file
+        dataframe = ingestdata_step(data)
+        
+        # Step 2: Clean, preprocess data and split into train/test sets
+        # This step handles missing values, encoding categorical variables, and data scaling
+        X_train,X_test,y_train,y_test,preprocessor = clean_df(dataframe, preprocessing, stratify)
     
+    if feature_store:
+        # Step 3: Fit one sub-forest per block in parallel workers and merge them into one forest
+        trained_model = trainmodel_out_of_core(store, preprocessor, model_params)
+    else:
+        if n_trials > 0:
+            # Step 3a: Search the hyperparameters with cross-validation on the training data
+            # Every trial is logged to MLflow; the best configuration replaces model_params
+            model_params = tunemodel(X_train, y_train, model_name, model_params,
+                                     n_trials=n_trials, strategy=search_strategy)
+
+        # Step 3: Train the configured model on the prepared training data
+        # The fitted preprocessor is saved next to the model for the API
+        trained_model = trainmodel(X_train,y_train,preprocessor,model_name,model_params)
+
+    if compression_variants is not None or serve_variant:
+        # Step 3b: Report size, latency and accuracy of compressed forests and optionally serve one
+        # The evaluation below then measures the model actually served
+        trained_model = compressmodel(trained_model, X_train, X_test, y_test,
+                                      compression_variants or None, serve_variant)
+
     # Step 4: Evaluate the model performance on test data
-    # This logs metrics like R², MAE, RMSE to MLflow for tracking
-    evalutemodel(trained_model,X_test,y_test)
\ No newline at end of file
+    # This logs metrics like R², MAE, RMSE with confidence intervals and per-segment values to MLflow
+    evalutemodel(trained_model,X_test,y_test,preprocessor)
+
+    # Step 5: Remember the rows the saved model was trained on, for incrementalpipeline
+    snapshot_data_step(data, after=trained_model)
\ No newline at end of file
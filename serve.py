@@ -0,0 +1,206 @@
+# Multi-worker server for the House Price Prediction API
+# The model is loaded once in this parent process and the workers are forked from it,
+# so all workers share the model memory instead of each holding a private copy
+# Usage: python serve.py [--workers N] [--threads-per-worker 1] [--host 0.0.0.0] [--port 8000]
+import argparse
+import gc
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+
+# Environment variables read by the BLAS/OpenMP runtimes used by numpy and scikit-learn
+THREAD_ENV_VARS = [
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'VECLIB_MAXIMUM_THREADS',
+]
+
+logger = logging.getLogger('serve')
+
+
+def cgroup_cpu_limit() -> float:
+    """
+    CPUs allowed by the container's CFS quota, from cgroup v2 or v1
+
+    Returns:
+        float: Quota divided by period, or infinity when there is no quota or no cgroup
+    """
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()[:2]
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = f.read().strip()
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = f.read().strip()
+        except OSError:
+            return math.inf
+    if quota in ('max', '-1'):
+        return math.inf
+    try:
+        return int(quota) / int(period)
+    except (ValueError, ZeroDivisionError):
+        return math.inf
+
+
+def available_cpus() -> int:
+    """
+    CPUs this process may actually use
+
+    os.cpu_count() counts every core of the host, even in a container limited
+    to a few of them or a process pinned with taskset, and starting a worker
+    per host core then oversubscribes the CPUs that are really available.
+
+    Returns:
+        int: The smaller of the CPU affinity and the cgroup quota (rounded up), at least 1;
+            os.cpu_count() where neither is available
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit != math.inf:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def pin_threads(threads: int) -> None:
+    """
+    Limit the native thread pools of every worker
+
+    Without this, each worker starts one BLAS/OpenMP thread per core and N
+    workers oversubscribe the machine N times. The environment variables must
+    be set before numpy is imported; threadpoolctl covers pools already loaded.
+
+    Args:
+        threads (int): Threads allowed per worker
+    """
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = str(threads)
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(limits=threads)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """
+    Create the listening socket in the parent so that every worker accepts on it
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind
+
+    Returns:
+        socket.socket: Listening socket, inheritable by forked workers
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, args) -> None:
+    """
+    Serve the already-loaded application on the shared socket
+
+    Args:
+        app: FastAPI application imported by the parent
+        sock (socket.socket): Listening socket created by the parent
+        args: Parsed command line arguments
+    """
+    import uvicorn
+
+    # Forked workers inherit the parent's handlers; let uvicorn install its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    pin_threads(args.threads_per_worker)
+
+    config = uvicorn.Config(app, log_level=args.log_level, timeout_keep_alive=args.keep_alive)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-forking server for the House Price Prediction API')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WORKERS', available_cpus())))
+    parser.add_argument('--threads-per-worker', type=int, default=int(os.getenv('THREADS_PER_WORKER', 1)))
+    parser.add_argument('--keep-alive', type=int, default=5)
+    parser.add_argument('--log-level', default='info')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    # Step 1: Pin native thread pools before numpy is imported by the application
+    pin_threads(args.threads_per_worker)
+
+    # Step 2: Load the model, encoders and FastAPI app once, in the parent
+    from app import app
+
+    # Step 3: Bind the socket once; every worker accepts connections on it
+    sock = bind_socket(args.host, args.port)
+
+    if args.workers <= 1 or not hasattr(os, 'fork'):
+        # No fork on Windows: fall back to a single in-process server
+        if args.workers > 1:
+            logger.warning('os.fork is not available on this platform, starting a single worker')
+        run_worker(app, sock, args)
+        return
+
+    # Step 4: Move every object allocated so far (model included) out of the garbage collector's reach
+    # Otherwise the collector writes to their headers in each worker and copy-on-write duplicates the pages
+    gc.collect()
+    gc.freeze()
+
+    workers = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app, sock, args)
+            finally:
+                os._exit(0)
+        workers.add(pid)
+        logger.info(f'Started worker {pid}')
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(args.workers):
+        spawn()
+
+    # Step 5: Supervise the workers, replacing any that dies until shutdown is requested
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        workers.discard(pid)
+        if not stopping:
+            logger.warning(f'Worker {pid} exited with status {status}, restarting')
+            spawn()
+    sock.close()
+    logger.info('All workers stopped')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
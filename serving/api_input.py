@@ -0,0 +1,88 @@
+# API Input Module
+# This module converts API request data into the DataFrame layout of the training data
+# It is kept free of ZenML and of the pipeline steps, so the API only needs the serving packages
+# steps.ingest_data re-exports it for the training code
+import logging
+from typing import List, Union
+import pandas as pd
+
+# Columns expected by the trained model, in training order
+REQUIRED_COLUMNS = ['Title', 'Bathroom', 'Carpet Area', 'location', 'Transaction',
+                    'Furnishing', 'Balcony', 'facing', 'Price (in rupees)',
+                    'Status', 'Society', 'Floor']
+
+# API field names that differ from the column names used in the training data
+# Pydantic fields cannot contain spaces or brackets, so the API uses these aliases
+API_COLUMN_NAMES = {
+    'Carpet_Area': 'Carpet Area',
+    'Price_in_rupees': 'Price (in rupees)',
+}
+
+
+class IngestData:
+    """
+    Data ingestion class for handling dictionary input from API requests
+    
+    This class converts API input data (dictionary format) into a pandas DataFrame
+    that matches the structure expected by the model training pipeline.
+    A list of dictionaries is also accepted, producing one row per item.
+    """
+    def __init__(self, data: Union[dict, List[dict]]):
+        """
+        Initialize with input data dictionary
+        
+        Args:
+            data (Union[dict, List[dict]]): House features from a single API request,
+                or a list of them for batch prediction
+        """
+        self.data = data
+    
+    def getData(self):
+        """
+        Convert dictionary input to DataFrame format
+        
+        This method ensures all required columns are present in the DataFrame,
+        even if they're not provided in the input dictionary. This maintains
+        consistency with the training data structure. API field names are
+        renamed to the matching training column names.
+        
+        Returns:
+            pd.DataFrame: DataFrame with all required columns for model prediction
+        """
+        logging.info('Converting API input dictionary to DataFrame')
+        # Convert dictionary to DataFrame with single row (or one row per item for a batch)
+        rows = self.data if isinstance(self.data, list) else [self.data]
+        df = pd.DataFrame(rows).rename(columns=API_COLUMN_NAMES)
+        
+        # Ensure all required columns are present (same as training data)
+        # If a column is missing, it will be filled with None
+        for col in REQUIRED_COLUMNS:
+            if col not in df.columns:
+                df[col] = None
+        return df
+
+
+# API Data Ingestion Function
+def ingestdata(data: Union[dict, List[dict]]) -> pd.DataFrame:
+    """
+    Function for ingesting API request data during prediction
+    
+    This function is used by the FastAPI application to convert incoming
+    JSON requests into the DataFrame format expected by the trained model.
+    
+    Args:
+        data (Union[dict, List[dict]]): House features from an API request,
+            or a list of them for batch prediction
+    
+    Returns:
+        pd.DataFrame: DataFrame formatted for model prediction
+    
+    Raises:
+        Exception: If there's an error processing the input data
+    """
+    try:
+        logging.info('Processing API input data for prediction')
+        return IngestData(data).getData()
+    except Exception as e:
+        logging.error(f'Error while ingesting the data: {e}')
+        raise e
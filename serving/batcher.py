@@ -0,0 +1,127 @@
+# Micro-Batching Module
+# This module coalesces concurrent single-row requests into one vectorized prediction
+# Requests are collected for up to max_wait_ms or max_batch_size items, whichever comes first
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List
+
+
+class MicroBatcher:
+    """
+    Dynamic batcher for single-row predictions
+
+    Each submitted item waits on its own future. The first item of a batch
+    starts a timer; the batch is flushed when the timer fires or when it
+    reaches max_batch_size. The batch is scored by one call to predict_many
+    and the results are fanned back out to the waiting coroutines.
+    All state is touched only from the event loop thread.
+    """
+    def __init__(self, predict_many: Callable[[List[Any]], List[Any]],
+                 run: Callable[..., Awaitable[Any]],
+                 max_batch_size: int = 32, max_wait_ms: float = 2.0):
+        """
+        Configure the batcher
+
+        Args:
+            predict_many (Callable): Sync function scoring a list of items; it returns one
+                result per item, or an Exception instance for items that failed on their own
+            run (Callable): Coroutine function used to execute predict_many,
+                e.g. InferenceExecutor.run, so batches run off the event loop
+            max_batch_size (int): Flush as soon as this many items are waiting
+            max_wait_ms (float): Longest time the first item of a batch waits for company
+        """
+        self.predict_many = predict_many
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._timer = None
+
+        # Per batch size: [batches, items, seconds from dispatch to results, seconds items waited before dispatch]
+        self._stats = {}
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue one item and wait for its result
+
+        Args:
+            item: Input accepted by predict_many
+
+        Returns:
+            The result of predict_many for this item
+
+        Raises:
+            Exception: The item's own error, or the error that failed its whole batch
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending[:self.max_batch_size], self._pending[self.max_batch_size:]
+        if self._pending:
+            self._timer = asyncio.get_running_loop().call_later(self.max_wait, self._flush)
+        if batch:
+            asyncio.ensure_future(self._score(batch))
+
+    async def _score(self, batch):
+        start = time.perf_counter()
+        try:
+            results = await self.run(self.predict_many, [item for item, _, _ in batch])
+        except Exception as e:
+            # The whole batch failed (e.g. executor saturated): every caller gets the error
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._record(batch, start)
+
+        for (_, future, _), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _record(self, batch, start):
+        end = time.perf_counter()
+        stats = self._stats.setdefault(len(batch), [0, 0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += len(batch)
+        stats[2] += end - start
+        stats[3] += sum(start - submitted for _, _, submitted in batch)
+
+    def metrics(self) -> dict:
+        """
+        Throughput and latency per observed batch size
+
+        Returns:
+            dict: Configuration and, for each batch size, the number of batches,
+                mean time from dispatch to results, mean wait before dispatch
+                and items per second
+        """
+        by_size = {}
+        for size, (batches, items, seconds, waited) in sorted(self._stats.items()):
+            by_size[size] = {
+                'batches': batches,
+                'items': items,
+                'mean_batch_ms': round(seconds / batches * 1000, 3),
+                'mean_wait_ms': round(waited / items * 1000, 3),
+                'items_per_second': round(items / seconds, 1) if seconds else None,
+            }
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'pending': len(self._pending),
+            'by_batch_size': by_size,
+        }
@@ -0,0 +1,141 @@
+# Prediction Cache Module
+# This module memoizes predictions for listings that are scored again and again
+# Keys combine the canonicalized validated input with the version of the loaded model artifacts
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+def artifact_version(*paths: str) -> str:
+    """
+    Version string identifying a set of model artifacts on disk
+
+    Built from the path, size and modification time of each file, so it
+    changes whenever the training step writes a new artifact.
+
+    Args:
+        *paths (str): Artifact files that make up the served model
+
+    Returns:
+        str: Short hexadecimal version string
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    for path in paths:
+        stat = os.stat(path)
+        digest.update(f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};'.encode())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache with a time-to-live for prediction results
+
+    The number of entries is bounded; the least recently used entry is
+    evicted when the cache is full and entries older than the TTL are
+    treated as misses. Each entry holds a 16-byte key and one result.
+    """
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 3600.0):
+        """
+        Create an empty cache
+
+        Args:
+            max_entries (int): Maximum number of cached predictions
+            ttl_seconds (float): Lifetime of an entry; 0 keeps entries until evicted
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(data: dict, model_version: str) -> bytes:
+        """
+        Stable key for a validated input and a model version
+
+        Args:
+            data (dict): Validated InputFeatures as a dictionary
+            model_version (str): Version of the model that will score the input
+
+        Returns:
+            bytes: 16-byte digest of the canonical JSON form of the input
+        """
+        canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+        return hashlib.blake2b(f'{model_version}|{canonical}'.encode(), digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[object]:
+        """
+        Cached result for a key, or None on a miss
+
+        Args:
+            key (bytes): Key built by PredictionCache.key
+
+        Returns:
+            Optional[object]: Cached result, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: bytes, value: object) -> None:
+        """
+        Store a result, evicting the least recently used entries if the cache is full
+
+        Args:
+            key (bytes): Key built by PredictionCache.key
+            value (object): Result to cache
+        """
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self) -> None:
+        """
+        Drop every entry, e.g. after a new model has been loaded
+        """
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def metrics(self) -> dict:
+        """
+        Snapshot of the cache counters
+
+        Returns:
+            dict: Size, configuration and hit/miss/eviction counters
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
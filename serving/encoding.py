@@ -0,0 +1,151 @@
+# Category Encoding Module
+# This module replaces LabelEncoder.transform at serving time with lookup tables built once at load
+# Codes are identical to the LabelEncoder codes (position in the sorted classes_ array)
+import json
+from typing import Dict, Sequence
+import numpy as np
+import pandas as pd
+
+# Supported policies for categories that were not seen during training:
+# - "first":   use the code of the first known category (historical behaviour of the API)
+# - "missing": encode as NaN and let the forest route the row as a missing value
+# - "error":   reject the input with an UnknownCategoryError
+UNKNOWN_POLICIES = ('first', 'missing', 'error')
+
+
+class UnknownCategoryError(ValueError):
+    """
+    Raised by the "error" policy when an input category was not seen during training
+
+    The offending row positions are kept so batch callers can report per-item errors.
+    """
+    def __init__(self, column: str, rows: np.ndarray, values: list):
+        self.column = column
+        self.rows = rows
+        self.values = values
+        super().__init__(f"Unknown category {values[0]!r} for column '{column}'")
+
+    def __reduce__(self):
+        # Rebuilt from its own arguments, so it survives the trip back from a worker process
+        return (self.__class__, (self.column, self.rows, self.values))
+
+
+class CategoryIndex:
+    """
+    Compiled lookup table for one categorical column
+
+    A dict serves single values and a hash-based pandas Index serves whole
+    columns, so neither path pays for the membership check and binary search
+    done by LabelEncoder.transform.
+    """
+    def __init__(self, column: str, classes: Sequence[str], unknown: str = 'first'):
+        """
+        Build the lookup tables for a column
+
+        Args:
+            column (str): Name of the column, used in error messages
+            classes (Sequence[str]): Known categories, in LabelEncoder.classes_ order
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+        """
+        if unknown not in UNKNOWN_POLICIES:
+            raise ValueError(f"Unknown category policy must be one of {UNKNOWN_POLICIES}, got '{unknown}'")
+        self.column = column
+        self.classes = list(classes)
+        self.unknown = unknown
+        self.unknown_code = 0.0 if unknown == 'first' else np.nan
+        self.codes = {value: code for code, value in enumerate(self.classes)}
+        self.index = pd.Index(self.classes, dtype=object)
+
+    def encode_value(self, value) -> float:
+        """
+        Encode a single category
+
+        Args:
+            value: Raw category from the API input
+
+        Returns:
+            float: Category code, or the unknown code defined by the policy
+        """
+        code = self.codes.get(value)
+        if code is None:
+            if self.unknown == 'error':
+                raise UnknownCategoryError(self.column, np.array([0]), [value])
+            return self.unknown_code
+        return code
+
+    def encode(self, values: Sequence) -> np.ndarray:
+        """
+        Encode a whole column in one vectorized hash lookup
+
+        Args:
+            values (Sequence): Raw categories, one per row
+
+        Returns:
+            np.ndarray: float32 category codes, one per row
+        """
+        codes = self.index.get_indexer(pd.Index(values, dtype=object)).astype(np.float32)
+        unknown = codes < 0
+        if unknown.any():
+            if self.unknown == 'error':
+                rows = np.flatnonzero(unknown)
+                raise UnknownCategoryError(self.column, rows, [values[i] for i in rows])
+            codes[unknown] = self.unknown_code
+        return codes
+
+
+class CategoryEncoder:
+    """
+    Collection of CategoryIndex tables, one per categorical column
+
+    This is the serving-time replacement for the dictionary of LabelEncoder
+    objects; the classes come from the preprocessor saved by training.
+    """
+    def __init__(self, classes: Dict[str, Sequence[str]], unknown: str = 'first'):
+        """
+        Compile the lookup tables for every categorical column
+
+        Args:
+            classes (Dict[str, Sequence[str]]): Known categories per column
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+        """
+        self.unknown = unknown
+        self.indexes = {col: CategoryIndex(col, values, unknown) for col, values in classes.items()}
+
+    @classmethod
+    def from_json(cls, path: str, unknown: str = 'first') -> 'CategoryEncoder':
+        """
+        Load the category classes written as JSON ({column: [classes...]})
+
+        Args:
+            path (str): Path to the label encoders JSON file
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+
+        Returns:
+            CategoryEncoder: Compiled encoder
+        """
+        with open(path, 'r') as f:
+            return cls(json.load(f), unknown)
+
+    @property
+    def columns(self) -> list:
+        return list(self.indexes)
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.indexes
+
+    def __getitem__(self, column: str) -> CategoryIndex:
+        return self.indexes[column]
+
+    def encode(self, columns: Dict[str, Sequence]) -> Dict[str, np.ndarray]:
+        """
+        Encode several categorical columns at once
+
+        Columns without a lookup table are ignored.
+
+        Args:
+            columns (Dict[str, Sequence]): Raw categories per column
+
+        Returns:
+            Dict[str, np.ndarray]: float32 category codes per column
+        """
+        return {col: self.indexes[col].encode(values) for col, values in columns.items() if col in self.indexes}
@@ -0,0 +1,186 @@
+# Inference Executor Module
+# This module runs CPU-bound prediction work outside the asyncio event loop
+# A bounded number of jobs may be in flight; beyond that, requests are rejected instead of queued forever
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Supported pool types
+EXECUTOR_KINDS = ('thread', 'process')
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when the executor already holds its maximum number of jobs
+
+    The API maps this to HTTP 429 so clients back off instead of piling up.
+    """
+
+
+class ExecutorTimeout(Exception):
+    """
+    Raised when a job did not finish within the configured timeout
+
+    The API maps this to HTTP 503; the job itself keeps running to completion.
+    """
+
+
+class ExecutorRestarted(Exception):
+    """
+    Raised when a worker process died and the pool had to be replaced
+
+    The API maps this to HTTP 503; the jobs of the broken pool are lost, but
+    the next requests go to the fresh pool.
+    """
+
+
+class InferenceExecutor:
+    """
+    Bounded pool for prediction work with backpressure and metrics
+
+    At most max_workers jobs run at once and at most max_queue more wait for a
+    worker. Admission is checked on the event loop before submitting, so the
+    event loop itself never blocks and /health keeps answering under load.
+    """
+    def __init__(self, kind: str = 'thread', max_workers: int = 4, max_queue: int = 64, timeout: float = 10.0):
+        """
+        Create the worker pool
+
+        Args:
+            kind (str): "thread" or "process", see EXECUTOR_KINDS
+            max_workers (int): Jobs executed concurrently
+            max_queue (int): Jobs allowed to wait for a free worker
+            timeout (float): Seconds a request waits for its result before giving up
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Executor kind must be one of {EXECUTOR_KINDS}, got '{kind}'")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.pool = self._create_pool()
+
+        # Counters are only updated from the event loop thread, except the busy time
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.busy_seconds = 0.0
+        self._busy_lock = threading.Lock()
+
+    def _create_pool(self):
+        if self.kind == 'thread':
+            return ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='inference')
+        return ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def restart(self) -> None:
+        """
+        Replace the worker pool with a fresh one
+
+        Worker processes hold a copy of the model taken when they started, so
+        the process pool must be replaced after a model reload. Jobs already
+        submitted finish in the old pool; new jobs go to the new one.
+        """
+        old, self.pool = self.pool, self._create_pool()
+        old.shutdown(wait=False)
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def _timed(self, func, args):
+        # Runs in the worker thread; measures time spent actually computing
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            with self._busy_lock:
+                self.busy_seconds += time.perf_counter() - start
+
+    async def run(self, func, *args):
+        """
+        Run func(*args) in the pool and await its result
+
+        Args:
+            func: Callable to execute; must be picklable for the process pool
+            *args: Positional arguments for func
+
+        Returns:
+            The return value of func
+
+        Raises:
+            ExecutorSaturated: If the pool already holds its maximum number of jobs
+            ExecutorTimeout: If the result is not ready within the timeout
+            ExecutorRestarted: If the process pool broke and was replaced
+        """
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise ExecutorSaturated(f'Inference pool saturated ({self.in_flight} jobs in flight)')
+
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        self.submitted += 1
+        pool = self.pool
+        try:
+            if self.kind == 'thread':
+                future = loop.run_in_executor(pool, self._timed, func, args)
+            else:
+                future = loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool as e:
+            # The pool broke before this job could be submitted
+            self.in_flight -= 1
+            self.failed += 1
+            if self.pool is pool:
+                self.restart()
+            raise ExecutorRestarted(f'Inference worker pool broke and was restarted: {e}')
+        # The slot is released when the job really finishes, even if the caller stopped waiting
+        future.add_done_callback(self._release)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise ExecutorTimeout(f'Inference did not finish within {self.timeout}s')
+        except BrokenProcessPool as e:
+            # A broken pool rejects every later job: replace it so only the jobs in flight fail
+            self.failed += 1
+            if self.pool is pool:
+                self.restart()
+            raise ExecutorRestarted(f'Inference worker pool broke and was restarted: {e}')
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        return result
+
+    def _release(self, future):
+        self.in_flight -= 1
+
+    def metrics(self) -> dict:
+        """
+        Snapshot of the pool state for health checks and monitoring
+
+        Returns:
+            dict: Pool configuration, occupancy and counters
+        """
+        return {
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queued': max(0, self.in_flight - self.max_workers),
+            'saturated': self.in_flight >= self.capacity,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'timed_out': self.timed_out,
+            'busy_seconds': round(self.busy_seconds, 3),
+        }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,325 @@
+# Flat Forest Module
+# This module exports a fitted random forest as flat node arrays and evaluates it without sklearn
+# The arrays live in one raw binary file, so they can be memory-mapped and shared between worker processes
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Bumped whenever the on-disk layout changes
+FORMAT_VERSION = 1
+
+# Node arrays stored in the binary file, all trees concatenated
+# Node ids are global indices into these arrays; leaves have left == right == -1
+NODE_ARRAYS = {
+    'feature': np.int32,
+    'threshold': np.float64,
+    'left': np.int32,
+    'right': np.int32,
+    'missing_left': np.bool_,
+    'value': np.float64,
+}
+
+# Every array starts on a 64-byte boundary so memory-mapped views stay aligned
+ALIGNMENT = 64
+
+# Arrays that export_forest can store as float32 to halve their size
+FLOAT32_ARRAYS = ('threshold', 'value')
+
+# From this many rows, a forest flattened from a fitted model calls its sklearn trees instead:
+# their compiled traversal, one tree at a time, stays in cache where the flat one does not
+TREE_CALL_ROWS = 128
+
+
+def float32_thresholds(threshold: np.ndarray) -> np.ndarray:
+    """
+    Round split thresholds down to float32 without changing any split
+
+    Trees compare float32 features with the thresholds. Rounding each
+    threshold down to the largest float32 not above it keeps x <= threshold
+    unchanged for every float32 x, which plain rounding to nearest does not.
+
+    Args:
+        threshold (np.ndarray): float64 thresholds
+
+    Returns:
+        np.ndarray: float32 thresholds
+    """
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def flatten_forest(model, float32: bool = False):
+    """
+    Flat node arrays of a fitted forest regressor, all trees concatenated
+
+    Args:
+        model: Fitted single-output forest (e.g. RandomForestRegressor)
+        float32 (bool): Round thresholds down to float32 (see float32_thresholds)
+            and store thresholds and leaf values as float32
+
+    Returns:
+        tuple: Node arrays keyed by the names in NODE_ARRAYS, their dtypes and the tree roots
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    roots = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+
+    def concat(field):
+        return np.concatenate([field(tree, root) for root, tree in zip(roots, trees)])
+
+    def child(children, root):
+        # Shift child ids into the global numbering, keeping -1 for leaves
+        return np.where(children < 0, -1, children + root)
+
+    arrays = {
+        'feature': concat(lambda tree, root: tree.feature),
+        'threshold': concat(lambda tree, root: tree.threshold),
+        'left': concat(lambda tree, root: child(tree.children_left, root)),
+        'right': concat(lambda tree, root: child(tree.children_right, root)),
+        'missing_left': concat(lambda tree, root: tree.missing_go_to_left),
+        'value': concat(lambda tree, root: tree.value[:, 0, 0]),
+    }
+    dtypes = dict(NODE_ARRAYS)
+    if float32:
+        arrays['threshold'] = float32_thresholds(arrays['threshold'])
+        dtypes.update({name: np.float32 for name in FLOAT32_ARRAYS})
+    arrays = {name: np.ascontiguousarray(arrays[name], dtype=dtype) for name, dtype in dtypes.items()}
+    return arrays, dtypes, roots
+
+
+def export_forest(model, path: str, float32: bool = False) -> None:
+    """
+    Export a fitted forest regressor as flat node arrays
+
+    Writes two files: <path>.bin with the node arrays back to back and
+    <path>.json with their offsets, the tree roots and the feature names.
+    Both are written to temporary files and renamed into place, so a server
+    that has the previous forest memory-mapped keeps reading intact pages.
+
+    Args:
+        model: Fitted single-output forest (e.g. RandomForestRegressor)
+        path (str): Output path without extension, e.g. models/forest
+        float32 (bool): Store thresholds and leaf values as float32; splits are
+            unchanged (see float32_thresholds), leaf values lose precision
+    """
+    arrays, dtypes, roots = flatten_forest(model, float32)
+
+    layout = {}
+    offset = 0
+    with open(path + '.bin.tmp', 'wb') as f:
+        for name, dtype in dtypes.items():
+            data = arrays[name]
+            padding = -offset % ALIGNMENT
+            f.write(b'\0' * padding)
+            offset += padding
+            layout[name] = {'offset': offset, 'count': len(data), 'dtype': np.dtype(dtype).name}
+            f.write(data.tobytes())
+            offset += data.nbytes
+
+    with open(path + '.json.tmp', 'w') as f:
+        json.dump({
+            'format_version': FORMAT_VERSION,
+            'feature_names': [str(name) for name in model.feature_names_in_],
+            'roots': roots.tolist(),
+            'arrays': layout,
+        }, f)
+
+    # Renaming gives the new files new inodes; truncating the old .bin in place
+    # would crash any process still reading it through a memory map
+    os.replace(path + '.bin.tmp', path + '.bin')
+    os.replace(path + '.json.tmp', path + '.json')
+
+
+class FlatForest:
+    """
+    Random forest evaluated directly from flat node arrays
+
+    All (row, tree) pairs are advanced together with vectorized NumPy
+    indexing, one tree level per step, and pairs that reached a leaf are
+    dropped as they finish. A batch therefore costs a few array operations
+    per tree level instead of one Python call per tree. Predictions match
+    RandomForestRegressor.predict.
+    """
+    def __init__(self, arrays: dict, roots, feature_names: list, trees: list = None):
+        """
+        Initialize from already loaded node arrays
+
+        Args:
+            arrays (dict): Node arrays keyed by the names in NODE_ARRAYS
+            roots: Global node id of every tree root
+            feature_names (list): Feature order expected by the forest
+            trees (list): Fitted sklearn trees the arrays were built from, used for
+                batches of TREE_CALL_ROWS rows or more
+        """
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.missing_left = arrays['missing_left']
+        self.value = arrays['value']
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.feature_names_in_ = np.array(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+        self.trees = trees
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'FlatForest':
+        """
+        Load a forest written by export_forest
+
+        Args:
+            path (str): Path without extension, e.g. models/forest
+            mmap (bool): Memory-map the node arrays instead of reading them into the heap
+
+        Returns:
+            FlatForest: Forest ready for predictions
+        """
+        with open(path + '.json', 'r') as f:
+            meta = json.load(f)
+        if meta['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest format version {meta['format_version']}")
+
+        arrays = {}
+        for name, dtype in NODE_ARRAYS.items():
+            section = meta['arrays'][name]
+            # Files written before float32 storage existed have no dtype entry
+            dtype = np.dtype(section.get('dtype', dtype))
+            if mmap:
+                # Plain ndarray view over the mapping: indexing np.memmap objects is slower
+                arrays[name] = np.asarray(np.memmap(path + '.bin', dtype=dtype, mode='r',
+                                                    offset=section['offset'], shape=(section['count'],)))
+            else:
+                arrays[name] = np.fromfile(path + '.bin', dtype=dtype,
+                                           offset=section['offset'], count=section['count'])
+        return cls(arrays, meta['roots'], meta['feature_names'])
+
+    @classmethod
+    def from_model(cls, model) -> 'FlatForest':
+        """
+        Flat copy of a fitted forest, built in memory
+
+        Used to get per-tree predictions from a forest served from
+        models/model.pkl, which has no exported node arrays. The model's
+        trees are kept for large batches (see TREE_CALL_ROWS).
+
+        Args:
+            model: Fitted single-output forest (e.g. RandomForestRegressor)
+
+        Returns:
+            FlatForest: Forest predicting as the model does
+        """
+        arrays, _, roots = flatten_forest(model)
+        return cls(arrays, roots, [str(name) for name in model.feature_names_in_], list(model.estimators_))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(path + '.bin') and os.path.exists(path + '.json')
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    def _as_array(self, X) -> np.ndarray:
+        # Same input handling as sklearn trees: float32 features in feature_names_in_ order
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names_in_]
+        return np.ascontiguousarray(X, dtype=np.float32)
+
+    def predict_per_tree(self, X) -> np.ndarray:
+        """
+        Leaf value reached in every tree for every row
+
+        Args:
+            X: Features as a DataFrame or a 2D array in feature_names_in_ order
+
+        Returns:
+            np.ndarray: Array of shape (n_rows, n_trees)
+        """
+        X = self._as_array(X)
+        n_rows, n_features = X.shape
+        if self.trees is not None and n_rows >= TREE_CALL_ROWS:
+            return np.column_stack([tree.predict(X, check_input=False) for tree in self.trees])
+        n_trees = self.n_trees
+        flat_X = X.ravel()
+        out = np.empty(n_rows * n_trees, dtype=np.float64)
+
+        # Active (row, tree) pairs: output slot, current node and row offset into flat_X
+        slot = np.arange(n_rows * n_trees)
+        node = np.tile(self.roots, n_rows)
+        row_offset = np.repeat(np.arange(n_rows) * n_features, n_trees)
+
+        while slot.size:
+            left = self.left[node]
+            leaf = left < 0
+            if leaf.any():
+                # Record finished pairs and keep traversing the others only
+                out[slot[leaf]] = self.value[node[leaf]]
+                keep = ~leaf
+                slot, node, row_offset, left = slot[keep], node[keep], row_offset[keep], left[keep]
+                if not slot.size:
+                    break
+            x = flat_X[row_offset + self.feature[node]]
+            go_left = x <= self.threshold[node]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left = np.where(missing, self.missing_left[node], go_left)
+            node = np.where(go_left, left, self.right[node])
+
+        return out.reshape(n_rows, n_trees)
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict house prices as the mean of all tree predictions
+
+        Args:
+            X: Features as a DataFrame or a 2D array in feature_names_in_ order
+
+        Returns:
+            np.ndarray: One predicted price per row
+        """
+        return self.predict_per_tree(X).mean(axis=1)
+
+    def predict_interval(self, X, level: float = 0.9) -> tuple:
+        """
+        Predictions with the spread of the individual trees, from one traversal
+
+        Args:
+            X: Features as a DataFrame or a 2D array in feature_names_in_ order
+            level (float): Share of the tree predictions inside [lower, upper]
+
+        Returns:
+            tuple: Prediction, standard deviation, lower and upper bound of every row (see tree_spread)
+        """
+        return tree_spread(self.predict_per_tree(X), level)
+
+
+def tree_spread(per_tree: np.ndarray, level: float = 0.9) -> tuple:
+    """
+    Mean, standard deviation and central interval of the tree predictions of every row
+
+    The bounds are the (1 - level) / 2 and (1 + level) / 2 quantiles of the
+    tree predictions, interpolated linearly as np.quantile does, but from a
+    single sort: np.quantile costs more than the traversal itself on one row.
+
+    Args:
+        per_tree (np.ndarray): Tree predictions, shape (n_rows, n_trees)
+        level (float): Share of the tree predictions inside [lower, upper]
+
+    Returns:
+        tuple: Four float64 arrays of length n_rows: prediction (the mean, as
+            predict returns it), standard deviation, lower and upper bound
+    """
+    n_trees = per_tree.shape[1]
+    mean = per_tree.mean(axis=1)
+    std = np.sqrt(np.square(per_tree - mean[:, None]).mean(axis=1))
+    ordered = np.sort(per_tree, axis=1)
+    bounds = []
+    for q in ((1 - level) / 2, (1 + level) / 2):
+        position = q * (n_trees - 1)
+        below = int(np.floor(position))
+        above = min(below + 1, n_trees - 1)
+        fraction = position - below
+        bounds.append(ordered[:, below] + (ordered[:, above] - ordered[:, below]) * fraction)
+    return mean, std, bounds[0], bounds[1]
@@ -0,0 +1,251 @@
+# Inference Module
+# This module contains the prediction code shared by the FastAPI application and the benchmarks
+# It provides two interchangeable paths: the DataFrame path (same ingestion as training)
+# and a pandas-free fast path that writes API input straight into a NumPy row
+# Both can also return prediction intervals from the spread of the forest's trees
+import threading
+from typing import List, NamedTuple, Optional, Union
+import numpy as np
+import pandas as pd
+from serving.forest import FlatForest
+from serving.metrics import observe_batch_size, stage_timer
+from serving.preprocessor import Preprocessor
+from serving.api_input import API_COLUMN_NAMES, ingestdata
+
+# Map training column names back to the API field names that carry them
+FIELD_NAMES = {column: field for field, column in API_COLUMN_NAMES.items()}
+
+
+class Prediction(NamedTuple):
+    """
+    Predicted price of one listing with the spread of the forest's trees
+
+    std, lower and upper are None when the model is not a forest or
+    intervals are disabled.
+    """
+    price: float
+    std: Optional[float] = None
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+
+
+def uncertainty_forest(model) -> Optional[FlatForest]:
+    """
+    Flat forest giving the per-tree predictions of a model, if it is a forest
+
+    A FlatForest is used as is; a fitted random forest is flattened in
+    memory once, so every request gets all its tree predictions from one
+    vectorized traversal instead of one tree.predict call per tree.
+
+    Args:
+        model: Served estimator
+
+    Returns:
+        Optional[FlatForest]: Forest predicting as the model does, or None for
+            models without individual trees (e.g. gradient boosting)
+    """
+    if isinstance(model, FlatForest):
+        return model
+    trees = getattr(model, 'estimators_', None)
+    if trees is None or getattr(model, 'n_outputs_', 1) != 1 or not all(hasattr(tree, 'tree_') for tree in trees):
+        return None
+    return FlatForest.from_model(model)
+
+
+def frame_features(model, preprocessor: Preprocessor, data: Union[dict, List[dict]]) -> pd.DataFrame:
+    # Ingestion, encoding and scaling of the DataFrame path, in model column order
+    with stage_timer('ingest'):
+        df = ingestdata(data)
+    with stage_timer('encode'):
+        features = preprocessor.transform(df)
+    with stage_timer('reindex'):
+        return pd.DataFrame(features, columns=preprocessor.feature_names)[model.feature_names_in_]
+
+
+def predict_frame(model, preprocessor: Preprocessor, data: Union[dict, List[dict]]) -> np.ndarray:
+    """
+    Predict house prices through the DataFrame path
+
+    This is the reference implementation: it reuses the ingestion code of the
+    training pipeline, applies the fitted encoding and scaling in one
+    vectorized transform and reorders the columns to match the model before
+    calling model.predict. The time spent in each stage is recorded in
+    serving.metrics.
+
+    Args:
+        model: Trained estimator exposing feature_names_in_
+        preprocessor (Preprocessor): Encoding and scaling fitted during training
+        data (Union[dict, List[dict]]): Validated API input, one dict per listing
+
+    Returns:
+        np.ndarray: One predicted price per input row
+    """
+    df = frame_features(model, preprocessor, data)
+    with stage_timer('predict'):
+        predictions = model.predict(df)
+    observe_batch_size(len(predictions))
+    return predictions
+
+
+def predict_frame_intervals(model, preprocessor: Preprocessor, data: Union[dict, List[dict]],
+                            forest: Optional[FlatForest], level: float = 0.9) -> List[Prediction]:
+    """
+    Predict house prices through the DataFrame path, with prediction intervals
+
+    The features are built as in predict_frame. With a forest, one
+    traversal yields every tree prediction: their mean is the predicted
+    price, as model.predict computes it, and their spread the interval.
+
+    Args:
+        model: Trained estimator exposing feature_names_in_
+        preprocessor (Preprocessor): Encoding and scaling fitted during training
+        data (Union[dict, List[dict]]): Validated API input, one dict per listing
+        forest (Optional[FlatForest]): Flat version of the model (see uncertainty_forest);
+            None predicts with model.predict and returns no interval
+        level (float): Share of the tree predictions inside [lower, upper]
+
+    Returns:
+        List[Prediction]: One prediction per input row
+    """
+    df = frame_features(model, preprocessor, data)
+    with stage_timer('predict'):
+        if forest is None:
+            predictions = [Prediction(price) for price in model.predict(df).tolist()]
+        else:
+            spread = forest.predict_interval(df, level)
+            predictions = [Prediction(*values) for values in zip(*(values.tolist() for values in spread))]
+    observe_batch_size(len(predictions))
+    return predictions
+
+
+class FastPredictor:
+    """
+    Pandas-free single-row predictor
+
+    The category lookups, the scaling parameters and the column order are
+    resolved once at construction. Each request is then encoded into a
+    preallocated float64 row in feature_names_in_ order, scaled in place
+    as Preprocessor.transform does, and copied into the float32 row passed
+    to the estimator. Forests are evaluated through their flat version
+    (see uncertainty_forest): one vectorized traversal of all trees, without
+    the input validation model.predict repeats on every call. Given the flat
+    version of a forest, predict_interval also returns the spread of the
+    trees from that same traversal.
+    """
+    def __init__(self, model, preprocessor: Preprocessor, forest: Optional[FlatForest] = None):
+        """
+        Initialize the predictor for a fitted model and its preprocessor
+
+        Args:
+            model: Trained estimator exposing feature_names_in_
+            preprocessor (Preprocessor): Encoding and scaling fitted during training
+            forest (Optional[FlatForest]): Flat version of the model for predict_interval
+                (see uncertainty_forest); without it, predict_interval returns no interval and
+                a forest fitted with sklearn is flattened for predict only
+
+        Raises:
+            ValueError: If the model uses a feature the preprocessor does not produce
+        """
+        self.model = model
+        self.forest = forest
+        self.feature_names = list(model.feature_names_in_)
+
+        # Resolve, per feature, the API field to read, the category lookup table (if any)
+        # and the scaling parameters, all in model feature order
+        encoder = preprocessor.encoder
+        columns = [preprocessor.feature_index(name) for name in self.feature_names]
+        self.fields = [FIELD_NAMES.get(name, name) for name in self.feature_names]
+        self.lookups = [encoder[name] if name in encoder else None for name in self.feature_names]
+        self.mean = preprocessor.mean[columns].reshape(1, -1)
+        self.scale = preprocessor.scale[columns].reshape(1, -1)
+
+        # Forests are traversed flat; the interval forest is reused when there is one
+        self.flat = forest if forest is not None else uncertainty_forest(model)
+
+        # Preallocated rows per thread, so concurrent requests never share a buffer
+        self._local = threading.local()
+
+    def _rows(self):
+        rows = getattr(self._local, 'rows', None)
+        if rows is None:
+            n_features = len(self.feature_names)
+            rows = (np.empty((1, n_features), dtype=np.float64), np.empty((1, n_features), dtype=np.float32))
+            self._local.rows = rows
+        return rows
+
+    def transform(self, data: dict) -> np.ndarray:
+        """
+        Encode and scale validated API input into the preallocated float64 feature row
+
+        Args:
+            data (dict): Validated API input for one listing
+
+        Returns:
+            np.ndarray: Feature row of shape (1, n_features), reused across calls
+        """
+        row, _ = self._rows()
+        for j, (field, lookup) in enumerate(zip(self.fields, self.lookups)):
+            value = data.get(field)
+            if lookup is not None:
+                value = lookup.encode_value(value)
+            row[0, j] = np.nan if value is None else value
+        np.subtract(row, self.mean, out=row)
+        np.divide(row, self.scale, out=row)
+        return row
+
+    def encode(self, data: dict) -> np.ndarray:
+        """
+        Write validated API input into the preallocated float32 feature row
+
+        Args:
+            data (dict): Validated API input for one listing
+
+        Returns:
+            np.ndarray: Scaled feature row of shape (1, n_features), reused across calls
+        """
+        scaled = self.transform(data)
+        _, row = self._rows()
+        row[...] = scaled
+        return row
+
+    def predict(self, data: dict) -> float:
+        """
+        Predict the price of a single listing
+
+        Args:
+            data (dict): Validated API input for one listing
+
+        Returns:
+            float: Predicted house price
+        """
+        observe_batch_size(1)
+        if self.flat is None:
+            # Generic estimators still get the scaled, reordered row, just through their own predict
+            with stage_timer('encode'):
+                row = self.transform(data)
+            with stage_timer('predict'):
+                return float(self.model.predict(pd.DataFrame(row, columns=self.feature_names))[0])
+        with stage_timer('encode'):
+            row = self.encode(data)
+        with stage_timer('predict'):
+            return float(self.flat.predict(row)[0])
+
+    def predict_interval(self, data: dict, level: float = 0.9) -> Prediction:
+        """
+        Predict the price of a single listing with the spread of the forest's trees
+
+        Args:
+            data (dict): Validated API input for one listing
+            level (float): Share of the tree predictions inside [lower, upper]
+
+        Returns:
+            Prediction: Price, with std and bounds when the predictor has a forest
+        """
+        if self.forest is None:
+            return Prediction(self.predict(data))
+        observe_batch_size(1)
+        with stage_timer('encode'):
+            row = self.encode(data)
+        with stage_timer('predict'):
+            mean, std, lower, upper = self.forest.predict_interval(row, level)
+        return Prediction(float(mean[0]), float(std[0]), float(lower[0]), float(upper[0]))
@@ -0,0 +1,337 @@
+# Metrics Module
+# This module collects serving metrics (request counters, in-flight gauges, per-stage latency and
+# batch-size histograms) and renders them in the Prometheus text format for the /metrics endpoint
+# Updates are a lock-protected increment; nothing is formatted until a scrape
+import bisect
+import math
+import threading
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+# Histogram buckets: latencies in seconds (50 µs to 10 s) and rows per model call
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+class Registry:
+    """
+    Set of metrics rendered together by /metrics
+
+    When disabled, every update returns immediately, so instrumented code
+    costs one attribute check per call.
+    """
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric: 'Metric') -> None:
+        self._metrics.append(metric)
+
+    def register_collector(self, collect: Callable[[], List[Tuple[str, str, str, float]]]) -> None:
+        """
+        Add a callback read at scrape time
+
+        Used for state that other components already count (the inference
+        pool, the prediction cache, model reloads), so those hot paths are
+        not instrumented twice.
+
+        Args:
+            collect (Callable): Returns (name, type, help, value) samples, type being "counter" or "gauge"
+        """
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text, one sample per line
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            for name, kind, documentation, value in collect():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                lines.append(f'{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Registry of the serving metrics below; app.py disables it with METRICS_ENABLED=0
+REGISTRY = Registry()
+
+
+class Metric:
+    """
+    Base class of the metric types: one child per combination of label values
+
+    Children are created on first use and kept, so callers on a hot path
+    can resolve them once with labels() and update them directly.
+    """
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 registry: Optional[Registry] = None):
+        """
+        Create and register a metric
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (Sequence[str]): Names of the labels
+            registry (Optional[Registry]): Registry rendering it, REGISTRY by default
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.registry = registry if registry is not None else REGISTRY
+        self._children = {}
+        self._lock = threading.Lock()
+        self.registry.register(self)
+
+    def labels(self, *values: str):
+        """
+        Child of the metric for the given label values, in labelnames order
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} expects labels {self.labelnames}, got {values}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, values))
+        return lines
+
+
+class _Value:
+    # Counter and gauge child: one float behind a lock
+    def __init__(self, registry: Registry):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if not self._registry.enabled:
+            return
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.inc(-amount)
+
+    def render(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> List[str]:
+        return [f'{name}{_format_labels(labelnames, values)} {_format_value(self.value)}']
+
+
+class Counter(Metric):
+    """
+    Monotonically increasing count, e.g. requests served
+    """
+    kind = 'counter'
+
+    def _new_child(self) -> _Value:
+        return _Value(self.registry)
+
+
+class Gauge(Metric):
+    """
+    Value that goes up and down, e.g. requests in flight
+    """
+    kind = 'gauge'
+
+    def _new_child(self) -> _Value:
+        return _Value(self.registry)
+
+
+class _Timer:
+    # Context manager observing the time spent in its block
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram: '_Buckets'):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    # Shared no-op timer returned while the registry is disabled
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Buckets:
+    # Histogram child: per-bucket counts (non-cumulative until rendered), sum and count
+    def __init__(self, registry: Registry, buckets: Sequence[float]):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        if not self._registry.enabled:
+            return
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def time(self):
+        """
+        Context manager observing the seconds spent in its block
+        """
+        return _Timer(self) if self._registry.enabled else _NULL_TIMER
+
+    def render(self, name: str, labelnames: Sequence[str], values: Sequence[str]) -> List[str]:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        names = labelnames + ('le',)
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + [math.inf], counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels(names, tuple(values) + (_format_value(bound),))} {cumulative}')
+        labels = _format_labels(labelnames, values)
+        lines.append(f'{name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{name}_count{labels} {cumulative}')
+        return lines
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values in fixed buckets, e.g. latencies
+    """
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Optional[Registry] = None):
+        """
+        Create and register a histogram
+
+        Args:
+            name (str): Metric name
+            documentation (str): Help text
+            labelnames (Sequence[str]): Names of the labels
+            buckets (Sequence[float]): Increasing upper bounds of the buckets (+Inf is added)
+            registry (Optional[Registry]): Registry rendering it, REGISTRY by default
+        """
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.registry, self.buckets)
+
+
+# Serving metrics
+# Stages of a prediction: validation (pydantic), ingest (ingestdata), encode (label encoding and
+# scaling), reindex (model column order) and predict (model.predict or the forest traversal)
+REQUESTS = Counter('house_price_http_requests_total', 'HTTP requests by endpoint, method and status code',
+                   ('endpoint', 'method', 'status'))
+REQUEST_SECONDS = Histogram('house_price_http_request_duration_seconds', 'HTTP request latency by endpoint',
+                            ('endpoint',))
+IN_FLIGHT = Gauge('house_price_http_requests_in_flight', 'HTTP requests being processed by endpoint',
+                  ('endpoint',))
+STAGE_SECONDS = Histogram('house_price_inference_stage_seconds', 'Time spent in each prediction stage',
+                          ('stage',))
+BATCH_SIZE = Histogram('house_price_inference_batch_size', 'Rows per model prediction call',
+                       buckets=BATCH_SIZE_BUCKETS)
+
+# Children resolved once for the hot paths
+_STAGES = {stage: STAGE_SECONDS.labels(stage) for stage in ('validation', 'ingest', 'encode', 'reindex', 'predict')}
+_BATCH_SIZE = BATCH_SIZE.labels()
+
+
+def stage_timer(stage: str):
+    """
+    Context manager adding the time spent in its block to a prediction stage
+
+    Args:
+        stage (str): One of validation, ingest, encode, reindex, predict
+    """
+    return _STAGES[stage].time()
+
+
+def observe_batch_size(rows: int) -> None:
+    _BATCH_SIZE.observe(rows)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests, their status and latency per endpoint
+
+    Endpoints are the paths of the application routes; any other path is
+    reported as "other" so unknown URLs cannot create new series.
+    """
+    def __init__(self, app, registry: Optional[Registry] = None):
+        self.app = app
+        self.registry = registry if registry is not None else REGISTRY
+        self._endpoints = None
+
+    def _endpoint(self, scope: dict) -> str:
+        if self._endpoints is None:
+            self._endpoints = {getattr(route, 'path', None) for route in scope['app'].routes}
+        path = scope['path']
+        return path if path in self._endpoints else 'other'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = self._endpoint(scope)
+        status = [500]
+
+        async def send_with_status(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+            await send(message)
+
+        in_flight = IN_FLIGHT.labels(endpoint)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+            REQUESTS.labels(endpoint, scope['method'], str(status[0])).inc()
+            in_flight.dec()
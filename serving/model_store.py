@@ -0,0 +1,246 @@
+# Model Store Module
+# This module loads the served model and its preprocessor as one bundle and validates it before use
+# The API swaps whole bundles on reload, so a request always sees a consistent model/preprocessor pair
+import logging
+import math
+import os
+import threading
+import time
+import joblib
+from serving.cache import artifact_version
+from serving.forest import FlatForest
+from serving.inference import FIELD_NAMES, FastPredictor, predict_frame, uncertainty_forest
+from serving.preprocessor import Preprocessor
+
+
+def preprocessor_files(models_dir: str) -> list:
+    """
+    Artifact files that hold the preprocessor of the served model
+
+    Models trained before preprocessor.json existed (e.g. the v1.0 release the
+    Docker image downloads) come with label_encoders.json and scaler.pkl instead;
+    they are used when preprocessor.json is missing.
+
+    Args:
+        models_dir (str): Directory written by the training step
+
+    Returns:
+        list: [preprocessor.json], or [label_encoders.json, scaler.pkl] for legacy models
+    """
+    path = os.path.join(models_dir, 'preprocessor.json')
+    legacy = [os.path.join(models_dir, 'label_encoders.json'), os.path.join(models_dir, 'scaler.pkl')]
+    if not os.path.exists(path) and all(os.path.exists(file) for file in legacy):
+        return legacy
+    return [path]
+
+
+def model_files(models_dir: str, model_format: str) -> list:
+    """
+    Artifact files that make up the served model
+
+    Args:
+        models_dir (str): Directory written by the training step
+        model_format (str): "joblib", "flat" or "auto" (flat forest when it exists)
+
+    Returns:
+        list: Model files followed by the preprocessor files (see preprocessor_files)
+    """
+    forest_path = os.path.join(models_dir, 'forest')
+    if model_format == 'flat' or (model_format == 'auto' and FlatForest.exists(forest_path)):
+        files = [forest_path + '.bin', forest_path + '.json']
+    else:
+        files = [os.path.join(models_dir, 'model.pkl')]
+    return files + preprocessor_files(models_dir)
+
+
+def current_version(models_dir: str, model_format: str) -> str:
+    """
+    Version of the artifacts currently on disk, without loading them
+
+    Args:
+        models_dir (str): Directory written by the training step
+        model_format (str): "joblib", "flat" or "auto"
+
+    Returns:
+        str: Version string as computed by artifact_version
+    """
+    return artifact_version(*model_files(models_dir, model_format))
+
+
+class ModelBundle:
+    """
+    Everything needed to serve one trained model
+
+    Holds the estimator, the fitted preprocessor, the fast-path predictor
+    built from both and the version of the files they came from. With
+    intervals, it also holds the flat version of a forest used for
+    prediction intervals (see uncertainty_forest). The fast path traverses
+    that flat version too, so a joblib forest is flattened once here, with
+    or without intervals, which keeps a second copy of its nodes in memory.
+    """
+    def __init__(self, model, preprocessor: Preprocessor, version: str, files: list, intervals: bool = True):
+        self.model = model
+        self.preprocessor = preprocessor
+        self.forest = uncertainty_forest(model) if intervals else None
+        self.fast_predictor = FastPredictor(model, preprocessor, self.forest)
+        self.version = version
+        self.files = files
+        self.loaded_at = time.time()
+
+    def info(self) -> dict:
+        return {
+            'version': self.version,
+            'model_type': type(self.model).__name__,
+            'files': self.files,
+            'loaded_at': self.loaded_at,
+        }
+
+
+def load_bundle(models_dir: str, model_format: str, unknown_policy: str, intervals: bool = True) -> ModelBundle:
+    """
+    Load the model and preprocessor from the models directory
+
+    Args:
+        models_dir (str): Directory written by the training step
+        model_format (str): "joblib", "flat" or "auto"
+        unknown_policy (str): Unknown-category policy for the preprocessor
+        intervals (bool): Prepare the forest used for prediction intervals
+
+    Returns:
+        ModelBundle: Loaded, not yet validated bundle
+    """
+    files = model_files(models_dir, model_format)
+    # The version is read before loading: if files change meanwhile, the next check reloads again
+    version = artifact_version(*files)
+    if files[0].endswith('.bin'):
+        # The flat forest is memory-mapped: it loads in milliseconds and its pages are shared between processes
+        model = FlatForest.load(files[0][:-len('.bin')])
+    else:
+        model = joblib.load(files[0])
+    if files[-1].endswith('scaler.pkl'):
+        # Legacy artifacts, written before the preprocessor was saved as one file
+        preprocessor = Preprocessor.from_legacy(files[-2], files[-1], unknown_policy)
+    else:
+        preprocessor = Preprocessor.load(files[-1], unknown_policy)
+    return ModelBundle(model, preprocessor, version, files, intervals)
+
+
+def warm_up(bundle: ModelBundle) -> float:
+    """
+    Validate a bundle with a prediction on a synthetic listing
+
+    The listing uses the first known category of every categorical column
+    and zero for numeric ones. Both the fast path and the DataFrame path
+    must return the same finite price. This also touches the model pages,
+    so the first real request does not pay for it.
+
+    Args:
+        bundle (ModelBundle): Freshly loaded bundle
+
+    Returns:
+        float: The warm-up prediction
+
+    Raises:
+        ValueError: If the bundle cannot produce a valid prediction
+    """
+    encoder = bundle.preprocessor.encoder
+    row = {}
+    for name in bundle.fast_predictor.feature_names:
+        row[FIELD_NAMES.get(name, name)] = encoder[name].classes[0] if name in encoder else 0
+    fast = bundle.fast_predictor.predict(row)
+    frame = float(predict_frame(bundle.model, bundle.preprocessor, row)[0])
+    if not math.isfinite(fast) or not math.isclose(fast, frame, rel_tol=1e-6):
+        raise ValueError(f'Warm-up prediction failed: fast path {fast}, DataFrame path {frame}')
+    # The interval's central prediction must be the model's
+    interval = bundle.fast_predictor.predict_interval(row)
+    if not math.isclose(interval.price, fast, rel_tol=1e-6):
+        raise ValueError(f'Warm-up prediction failed: interval path {interval.price}, fast path {fast}')
+    logging.info(f'Model {bundle.version} warmed up, prediction {fast:.2f}')
+    return fast
+
+
+class ModelStore:
+    """
+    Holder of the bundle currently being served, with reload support
+
+    Readers take model_store.current once per request and use that bundle
+    throughout, so a request that started on the old model finishes on it.
+    A reload loads and warms up the new bundle completely before replacing
+    the reference; a bundle that fails validation is never served.
+    """
+    def __init__(self, models_dir: str = './models', model_format: str = 'joblib', unknown_policy: str = 'first',
+                 intervals: bool = True):
+        """
+        Load and validate the initial bundle
+
+        Args:
+            models_dir (str): Directory written by the training step
+            model_format (str): "joblib", "flat" or "auto"
+            unknown_policy (str): Unknown-category policy for the encoder
+            intervals (bool): Prepare every bundle for prediction intervals
+        """
+        self.models_dir = models_dir
+        self.model_format = model_format
+        self.unknown_policy = unknown_policy
+        self.intervals = intervals
+        self._lock = threading.Lock()
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error = None
+
+        bundle = load_bundle(models_dir, model_format, unknown_policy, intervals)
+        warm_up(bundle)
+        self.current = bundle
+
+    def disk_version(self) -> str:
+        """
+        Version of the artifacts currently on disk
+        """
+        return current_version(self.models_dir, self.model_format)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Load the artifacts on disk and swap them in if they validate
+
+        Blocking; call it from a background thread. Concurrent calls are
+        serialized.
+
+        Args:
+            force (bool): Reload even if the version on disk is the one being served
+
+        Returns:
+            bool: True if a new bundle is now being served
+
+        Raises:
+            Exception: Whatever prevented loading or validating the new bundle;
+                the previous bundle keeps being served
+        """
+        with self._lock:
+            if not force and self.disk_version() == self.current.version:
+                return False
+            try:
+                bundle = load_bundle(self.models_dir, self.model_format, self.unknown_policy, self.intervals)
+                warm_up(bundle)
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_error = str(e)
+                raise
+            previous, self.current = self.current, bundle
+            self.reloads += 1
+            self.last_error = None
+            logging.info(f'Model reloaded: {previous.version} -> {bundle.version}')
+            return True
+
+    def metrics(self) -> dict:
+        """
+        Snapshot of the served bundle and the reload counters
+
+        Returns:
+            dict: Served model information, reload and failure counts and the last error
+        """
+        return {
+            'model': self.current.info(),
+            'reloads': self.reloads,
+            'failed_reloads': self.failed_reloads,
+            'last_error': self.last_error,
+        }
@@ -0,0 +1,234 @@
+# Preprocessor Module
+# This module holds the preprocessing fitted during training (label encoding + feature scaling)
+# It is saved next to the model as models/preprocessor.json and applied by the API to every input,
+# so serving transforms listings exactly as the training data was transformed
+import json
+import os
+from typing import Dict, List, Optional, Sequence, Union
+import joblib
+import numpy as np
+import pandas as pd
+from serving.encoding import CategoryEncoder
+from serving.api_input import ingestdata
+
+# Bumped whenever the on-disk layout changes
+FORMAT_VERSION = 1
+
+
+def as_number(value):
+    # The value as a float when it parses as a number, unchanged otherwise
+    number = pd.to_numeric(pd.Series([value], dtype=object), errors='coerce').iloc[0]
+    return value if pd.isna(number) else float(number)
+
+
+class Preprocessor:
+    """
+    Fitted label encoding and standard scaling of the model features
+
+    The categories are the LabelEncoder classes of DataPreprocessing and the
+    mean/scale are those of the StandardScaler fitted by DataDivision, in the
+    feature order of the training data. transform applies both with a few
+    array operations, the same way for one row or a whole batch, and the
+    scaling is computed as StandardScaler.transform does so the features
+    match the training data bit for bit.
+    """
+    def __init__(self, feature_names: Sequence[str], categories: Dict[str, Sequence[str]],
+                 mean: Sequence[float], scale: Sequence[float], unknown: str = 'first',
+                 fill_values: Optional[Dict[str, list]] = None):
+        """
+        Initialize from fitted preprocessing parameters
+
+        Args:
+            feature_names (Sequence[str]): Training column names, in model feature order
+            categories (Dict[str, Sequence[str]]): LabelEncoder classes per categorical column
+            mean (Sequence[float]): StandardScaler.mean_, one value per feature
+            scale (Sequence[float]): StandardScaler.scale_, one value per feature
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+            fill_values (Optional[Dict[str, list]]): Modes used to fill missing counts during
+                cleaning, kept for incremental retraining
+        """
+        self.feature_names = [str(name) for name in feature_names]
+        self.categories = {col: list(values) for col, values in categories.items()}
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        if self.mean.shape != (len(self.feature_names),) or self.scale.shape != self.mean.shape:
+            raise ValueError(f'Preprocessor has {len(self.feature_names)} features but '
+                             f'{self.mean.size} means and {self.scale.size} scales')
+        self.unknown = unknown
+        self.fill_values = dict(fill_values or {})
+        self.encoder = CategoryEncoder(self.categories, unknown)
+
+    @classmethod
+    def from_fitted(cls, categories: Dict[str, Sequence], scaler, feature_names: Sequence[str],
+                    fill_values: Optional[Dict[str, list]] = None) -> 'Preprocessor':
+        """
+        Build the preprocessor from the objects fitted by the cleaning step
+
+        Missing values are dropped from the classes: LabelEncoder sorts NaN last,
+        so the codes of the remaining classes are unchanged.
+
+        Args:
+            categories (Dict[str, Sequence]): LabelEncoder.classes_ per categorical column
+            scaler: Fitted StandardScaler
+            feature_names (Sequence[str]): Columns the scaler was fitted on
+            fill_values (Optional[Dict[str, list]]): Modes used to fill missing counts
+
+        Returns:
+            Preprocessor: Preprocessor applying the same transformation
+        """
+        classes = {col: [value for value in values if not pd.isna(value)] for col, values in categories.items()}
+        # Counts read as text (e.g. by the chunked reader) give text modes: they are kept as the numbers the
+        # cleaning converts them to, so every training path saves the same fill values
+        fills = {col: [as_number(value) for value in values] for col, values in (fill_values or {}).items()}
+        return cls(feature_names, classes, scaler.mean_, scaler.scale_, fill_values=fills)
+
+    @classmethod
+    def from_legacy(cls, encoders_path: str, scaler_path: str, unknown: str = 'first') -> 'Preprocessor':
+        """
+        Build the preprocessor from the artifacts of models trained before preprocessor.json existed
+
+        Those runs saved the LabelEncoder classes as label_encoders.json and a
+        StandardScaler as scaler.pkl. That scaler was fitted on the already-scaled
+        training features, so it is close to the identity: the scaling the model
+        was trained with was not saved and cannot be recovered.
+
+        Args:
+            encoders_path (str): label_encoders.json, LabelEncoder classes per categorical column
+            scaler_path (str): scaler.pkl, StandardScaler fitted on the training features
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+
+        Returns:
+            Preprocessor: Preprocessor applying the saved encoding and scaling
+
+        Raises:
+            ValueError: If the scaler does not record the training column names
+        """
+        with open(encoders_path, 'r') as f:
+            categories = json.load(f)
+        scaler = joblib.load(scaler_path)
+        if not hasattr(scaler, 'feature_names_in_'):
+            raise ValueError(f'{scaler_path} does not record the training column names')
+        classes = {col: [value for value in values if not pd.isna(value)] for col, values in categories.items()}
+        return cls(scaler.feature_names_in_, classes, scaler.mean_, scaler.scale_, unknown)
+
+    def to_dict(self) -> dict:
+        return {
+            'format_version': FORMAT_VERSION,
+            'feature_names': self.feature_names,
+            'categories': self.categories,
+            'mean': self.mean.tolist(),
+            'scale': self.scale.tolist(),
+            'fill_values': self.fill_values,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict, unknown: str = 'first') -> 'Preprocessor':
+        """
+        Rebuild a preprocessor from to_dict output
+
+        Args:
+            state (dict): Serialized preprocessor
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+
+        Returns:
+            Preprocessor: Preprocessor ready for transform
+        """
+        if state.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported preprocessor format version {state.get('format_version')}")
+        return cls(state['feature_names'], state['categories'], state['mean'], state['scale'], unknown,
+                   state.get('fill_values'))
+
+    def save(self, path: str) -> None:
+        """
+        Write the preprocessor as JSON, atomically
+
+        Floats are written with their shortest exact representation, so the
+        mean and scale read back are the fitted values.
+
+        Args:
+            path (str): Output file, e.g. models/preprocessor.json
+        """
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(path + '.tmp', path)
+
+    @classmethod
+    def load(cls, path: str, unknown: str = 'first') -> 'Preprocessor':
+        """
+        Load a preprocessor written by save
+
+        Args:
+            path (str): Path to the preprocessor JSON file
+            unknown (str): Policy for unseen categories, one of UNKNOWN_POLICIES
+
+        Returns:
+            Preprocessor: Preprocessor ready for transform
+        """
+        with open(path, 'r') as f:
+            return cls.from_dict(json.load(f), unknown)
+
+    def extend_categories(self, columns: Dict[str, Sequence]) -> Dict[str, int]:
+        """
+        Add the categories not seen so far at the end of each column's classes
+
+        Existing categories keep their codes, so a model trained with the
+        previous classes still reads them correctly; new categories get the
+        next codes, in sorted order.
+
+        Args:
+            columns (Dict[str, Sequence]): Raw categories per column (missing values are ignored)
+
+        Returns:
+            Dict[str, int]: Number of categories added per column
+        """
+        added = {}
+        for col, values in columns.items():
+            if col not in self.categories:
+                continue
+            known = set(self.categories[col])
+            new = sorted({value for value in values if not pd.isna(value) and value not in known})
+            self.categories[col].extend(new)
+            added[col] = len(new)
+        self.encoder = CategoryEncoder(self.categories, self.unknown)
+        return added
+
+    def feature_index(self, name: str) -> int:
+        """
+        Position of a feature in the preprocessor output
+
+        Raises:
+            ValueError: If the feature was not part of the training data
+        """
+        try:
+            return self.feature_names.index(name)
+        except ValueError:
+            raise ValueError(f"Feature '{name}' is not produced by the preprocessor") from None
+
+    def transform(self, data: Union[dict, List[dict], pd.DataFrame]) -> np.ndarray:
+        """
+        Encode and scale listings into model features
+
+        Args:
+            data (Union[dict, List[dict], pd.DataFrame]): Validated API input (one dict per
+                listing) or a DataFrame with the training column names
+
+        Returns:
+            np.ndarray: float64 array of shape (n_rows, n_features) in feature_names order
+
+        Raises:
+            UnknownCategoryError: If the encoder policy is "error" and a category is unseen
+        """
+        df = data if isinstance(data, pd.DataFrame) else ingestdata(data)
+        encoded = self.encoder.encode({col: df[col].to_numpy() for col in self.encoder.columns if col in df.columns})
+
+        X = np.empty((len(df), len(self.feature_names)), dtype=np.float64)
+        for j, name in enumerate(self.feature_names):
+            if name in encoded:
+                X[:, j] = encoded[name]
+            elif name in df.columns:
+                X[:, j] = pd.to_numeric(df[name], errors='coerce')
+            else:
+                X[:, j] = np.nan
+        X -= self.mean
+        X /= self.scale
+        return X
@@ -4,19 +4,51 @@
 import logging
 import pandas as pd
 from zenml import step
+from steps.profiling import profiled
+import os
 from Data_analysis.data_cleaning import (
+    CATEGORICAL_COLUMNS,
+    ChunkedPreprocessing,
     DataDivision,
     DataPreprocessing,
+    IncrementalPreprocessing,
+    get_preprocessing,
 )
+from Data_analysis.feature_store import FeatureStore
+from serving.preprocessor import Preprocessor
+from steps.ingest_data import read_cached, read_csv_chunks
 from typing_extensions import Annotated
 from typing import Tuple
 
+
+def divide_data(df: pd.DataFrame, preprocessing, stratify: bool = False) -> tuple:
+    """
+    Split cleaned data into train/test sets and capture the fitted preprocessing
+
+    Args:
+        df (pd.DataFrame): Cleaned dataset
+        preprocessing: Strategy that cleaned it, holding its label encoder classes and fill values
+        stratify (bool): Keep the share of every price band equal in both sets
+
+    Returns:
+        tuple: X_train, X_test, y_train, y_test and the preprocessor as a dictionary
+    """
+    logging.info("Starting data division into train/test sets")
+    division = DataDivision(stratify=stratify)
+    X_train, X_test, y_train, y_test = division.handle_data(df)
+    preprocessor = Preprocessor.from_fitted(preprocessing.categories_, division.scaler_, division.feature_names_,
+                                            preprocessing.modes_)
+    logging.info("Data division completed successfully")
+    return X_train, X_test, y_train, y_test, preprocessor.to_dict()
+
 @step
-def clean_df(df: pd.DataFrame) -> Tuple[
+@profiled
+def clean_df(df: pd.DataFrame, preprocessing: str = 'standard', stratify: bool = False) -> Tuple[
     Annotated[pd.DataFrame,"X_train"],
     Annotated[pd.DataFrame,"X_test"],
     Annotated[pd.Series,"y_train"],
     Annotated[pd.Series,"y_test"],
+    Annotated[dict,"preprocessor"],
 ]:
     """
     ZenML step for cleaning and preprocessing the dataset
@@ -31,6 +63,10 @@ def clean_df(df: pd.DataFrame) -> Tuple[
     
     Args:
         df (pd.DataFrame): Raw dataset loaded from CSV file
+        preprocessing (str): Cleaning strategy, a key of PREPROCESSING_STRATEGIES: "standard"
+            (DataPreprocessing) or "lean" (LeanPreprocessing: compact dtypes, and every missing
+            count filled, so more rows are kept)
+        stratify (bool): Split with the same share of every price band in both sets
     
     Returns:
         Tuple containing:
@@ -38,6 +74,7 @@ def clean_df(df: pd.DataFrame) -> Tuple[
         - X_test (pd.DataFrame): Testing features  
         - y_train (pd.Series): Training target variable (house prices)
         - y_test (pd.Series): Testing target variable (house prices)
+        - preprocessor (dict): Fitted label encoding and scaling, see serving/preprocessor.py
     
     Raises:
         Exception: If there's an error during data cleaning or splitting
@@ -46,16 +83,211 @@ def clean_df(df: pd.DataFrame) -> Tuple[
         # Step 1: Clean and preprocess the raw data
         # This handles missing values, duplicates, categorical encoding, and feature scaling
         logging.info("Starting data cleaning and preprocessing")
-        df = DataPreprocessing().handle_data(df)
+        strategy = get_preprocessing(preprocessing)
+        df = strategy.handle_data(df)
         logging.info("Data cleaning and preprocessing completed successfully")
 
         # Step 2: Split the cleaned data into training and testing sets
-        # This creates the datasets needed for model training and evaluation
-        logging.info("Starting data division into train/test sets")
-        X_train, X_test, y_train, y_test = DataDivision().handle_data(df)
-        logging.info("Data division completed successfully")
+        # This creates the datasets needed for model training and evaluation, and the
+        # preprocessor that lets the API encode and scale its inputs the same way
+        # The outputs are returned as a tuple expression: ZenML counts the step outputs from it
+        X_train, X_test, y_train, y_test, preprocessor = divide_data(df, strategy, stratify)
+        return X_train, X_test, y_train, y_test, preprocessor
+    except Exception as e:
+        logging.error("Error in cleaning data: {}".format(e))
+        raise e
+
+@step
+@profiled
+def clean_csv_in_chunks(data: str, chunksize: int, stratify: bool = False) -> Tuple[
+    Annotated[pd.DataFrame,"X_train"],
+    Annotated[pd.DataFrame,"X_test"],
+    Annotated[pd.Series,"y_train"],
+    Annotated[pd.Series,"y_test"],
+    Annotated[dict,"preprocessor"],
+]:
+    """
+    ZenML step for streaming ingestion and cleaning of a large CSV file
+
+    Replaces ingestdata_step followed by clean_df when the raw dataset does
+    not fit comfortably in memory. The CSV is read in chunks of chunksize
+    rows with an explicit schema and only the columns that are kept, and
+    each chunk is cleaned as soon as it is read, so peak memory is bounded
+    by the chunk size and the size of the cleaned data instead of the raw
+    file. The cleaned data is the same as clean_df would produce.
+
+    Args:
+        data (str): File path to the CSV file containing house price data
+        chunksize (int): Rows read and cleaned at a time
+        stratify (bool): Split with the same share of every price band in both sets
+
+    Returns:
+        Tuple containing:
+        - X_train (pd.DataFrame): Training features
+        - X_test (pd.DataFrame): Testing features
+        - y_train (pd.Series): Training target variable (house prices)
+        - y_test (pd.Series): Testing target variable (house prices)
+        - preprocessor (dict): Fitted label encoding and scaling, see serving/preprocessor.py
+
+    Raises:
+        Exception: If there's an error while reading, cleaning or splitting the data
+    """
+    try:
+        # Step 1: Read and clean the CSV chunk by chunk
+        logging.info(f"Streaming data from CSV file {data} in chunks of {chunksize} rows")
+        preprocessing = ChunkedPreprocessing()
+        df = preprocessing.handle_data(lambda columns: read_csv_chunks(data, chunksize, columns))
+        logging.info(f"Data cleaning and preprocessing completed successfully: {len(df)} rows")
+
+        # Step 2: Split the cleaned data into training and testing sets
+        X_train, X_test, y_train, y_test, preprocessor = divide_data(df, preprocessing, stratify)
+        return X_train, X_test, y_train, y_test, preprocessor
+    except Exception as e:
+        logging.error("Error in cleaning data: {}".format(e))
+        raise e
+
+@step(enable_cache=False)
+@profiled
+def clean_csv_to_feature_store(data: str, chunksize: int, store_dir: str, block_rows: int = 1000000,
+                               test_rows: int = 200000) -> Tuple[
+    Annotated[str,"feature_store"],
+    Annotated[pd.DataFrame,"X_test"],
+    Annotated[pd.Series,"y_test"],
+    Annotated[dict,"preprocessor"],
+]:
+    """
+    ZenML step for streaming a CSV file larger than memory into an out-of-core feature store
+
+    Replaces clean_csv_in_chunks for out-of-core training. The cleaned,
+    encoded and scaled rows are written to float32 blocks in store_dir
+    instead of being returned, so neither this step nor the training step
+    holds the dataset in memory; only the store path, a sample of the test
+    rows and the preprocessor are passed on. The step is never cached, as
+    the files it writes may have been replaced since.
+
+    Args:
+        data (str): File path to the CSV file containing house price data
+        chunksize (int): Rows read and cleaned at a time
+        store_dir (str): Directory of the feature store, overwritten
+        block_rows (int): Most training rows per block; every block gets its own sub-forest
+        test_rows (int): Most test rows returned for evaluation, 0 for all of them
+
+    Returns:
+        Tuple containing:
+        - feature_store (str): Directory of the built store, for trainmodel_out_of_core
+        - X_test (pd.DataFrame): Testing features (a sample of at most test_rows rows)
+        - y_test (pd.Series): Testing target variable (house prices)
+        - preprocessor (dict): Fitted label encoding and scaling, see serving/preprocessor.py
 
-        return X_train, X_test, y_train, y_test
+    Raises:
+        Exception: If there's an error while reading, cleaning or writing the data
+    """
+    try:
+        # Step 1: Stream the CSV into the store, in blocks of at most block_rows training rows
+        logging.info(f"Streaming data from CSV file {data} into the feature store {store_dir}")
+        store = FeatureStore(store_dir).build(lambda columns: read_csv_chunks(data, chunksize, columns),
+                                              block_rows=block_rows, chunk_rows=chunksize)
+
+        # Step 2: Load the rows held out for evaluation
+        X_test, y_test = store.test_sample(test_rows)
+        return store_dir, X_test, y_test, store.manifest['preprocessor']
+    except Exception as e:
+        logging.error("Error in building the feature store: {}".format(e))
+        raise e
+
+@step
+@profiled
+def clean_cached_df(dataset: str, stratify: bool = False) -> Tuple[
+    Annotated[pd.DataFrame,"X_train"],
+    Annotated[pd.DataFrame,"X_test"],
+    Annotated[pd.Series,"y_train"],
+    Annotated[pd.Series,"y_test"],
+    Annotated[dict,"preprocessor"],
+]:
+    """
+    ZenML step for cleaning a dataset from the columnar cache
+
+    Replaces clean_df after cache_data_step. Only the path of the cached
+    Arrow file is passed between the steps, so the raw dataset is neither
+    parsed again nor stored as a ZenML artifact; the columns DataPreprocessing
+    uses are read from the memory-mapped file. The result is the same as
+    clean_df on the CSV file.
+
+    Args:
+        dataset (str): Arrow file returned by cache_data_step
+        stratify (bool): Split with the same share of every price band in both sets
+
+    Returns:
+        Tuple containing:
+        - X_train (pd.DataFrame): Training features
+        - X_test (pd.DataFrame): Testing features
+        - y_train (pd.Series): Training target variable (house prices)
+        - y_test (pd.Series): Testing target variable (house prices)
+        - preprocessor (dict): Fitted label encoding and scaling, see serving/preprocessor.py
+
+    Raises:
+        Exception: If there's an error during data cleaning or splitting
+    """
+    try:
+        # Step 1: Load the projected columns and clean them
+        logging.info(f"Loading cached dataset {dataset}")
+        preprocessing = DataPreprocessing()
+        df = preprocessing.handle_data(read_cached(dataset))
+        logging.info("Data cleaning and preprocessing completed successfully")
+
+        # Step 2: Split the cleaned data into training and testing sets
+        X_train, X_test, y_train, y_test, preprocessor = divide_data(df, preprocessing, stratify)
+        return X_train, X_test, y_train, y_test, preprocessor
     except Exception as e:
         logging.error("Error in cleaning data: {}".format(e))
-        raise e
\ No newline at end of file
+        raise e
+
+@step(enable_cache=False)
+@profiled
+def clean_delta(delta: pd.DataFrame) -> Tuple[
+    Annotated[pd.DataFrame,"X_new"],
+    Annotated[pd.Series,"y_new"],
+    Annotated[dict,"preprocessor"],
+]:
+    """
+    ZenML step for cleaning new listings with the preprocessing of the last training run
+
+    This step performs the following operations:
+    1. Cleans the new rows as DataPreprocessing does, filling missing counts
+       with the modes saved by the last run (see IncrementalPreprocessing)
+    2. Adds the categories not seen before at the end of the saved label
+       encoder classes; existing categories keep their codes
+    3. Encodes and scales the features with the saved preprocessor, so the
+       new rows are on the scale the model was trained on
+
+    Args:
+        delta (pd.DataFrame): New or changed rows returned by ingest_delta_step
+
+    Returns:
+        Tuple containing:
+        - X_new (pd.DataFrame): New training features
+        - y_new (pd.Series): New target values (house prices)
+        - preprocessor (dict): Saved preprocessor with the new categories
+
+    Raises:
+        Exception: If there's an error while loading the preprocessor or cleaning the data
+    """
+    try:
+        # Missing categories become missing features instead of the first class
+        preprocessor = Preprocessor.load(os.path.join("models", "preprocessor.json"), unknown='missing')
+
+        # Step 1: Clean the new rows with the saved fill values
+        df = IncrementalPreprocessing(preprocessor.fill_values).handle_data(delta)
+        logging.info(f"{len(df)} of {len(delta)} new rows left after cleaning")
+
+        # Step 2: Grow the category lists
+        added = preprocessor.extend_categories({col: df[col].unique() for col in CATEGORICAL_COLUMNS})
+        logging.info(f"New categories per column: {added}")
+
+        # Step 3: Encode and scale like the training data
+        X_new = pd.DataFrame(preprocessor.transform(df), columns=preprocessor.feature_names, index=df.index)
+        y_new = df['Amount(in rupees)']
+        return X_new, y_new, preprocessor.to_dict()
+    except Exception as e:
+        logging.error("Error in cleaning the new data: {}".format(e))
+        raise e
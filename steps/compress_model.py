@@ -0,0 +1,110 @@
+# Model Compression Step
+# This module compares compressed variants of the trained forest (depth cap, fewer trees, float32 storage)
+# on size, prediction latency and accuracy, and can write the chosen variant to the models directory for the API
+import logging
+import os
+from typing import List, Optional
+import joblib
+import mlflow
+import pandas as pd
+from sklearn.base import RegressorMixin
+from sklearn.ensemble import RandomForestRegressor
+from typing_extensions import Annotated
+from zenml import step
+from steps.profiling import profiled
+from Data_analysis.model_compression import CompressionVariant, forest_report, parse_variants
+from serving.forest import export_forest
+from steps.evalute_model import regression_metrics
+
+# Variants compared when the pipeline does not list any
+DEFAULT_VARIANTS = ['float32', 'depth=16', 'trees=40', 'depth=16,trees=40,float32', 'depth=12,trees=25,float32']
+
+@step
+@profiled
+def compressmodel(model: RegressorMixin, X_train: pd.DataFrame, X_test: pd.DataFrame, y_test: pd.Series,
+                  variants: Optional[List[str]] = None, serve_variant: str = '',
+                  reference_rows: int = 5000) -> Annotated[RegressorMixin, "served_model"]:
+    """
+    ZenML step for trading forest size and latency against accuracy
+
+    This step performs the following operations:
+    1. Builds every compression variant of the trained forest (see
+       Data_analysis.model_compression.CompressionVariant for the syntax)
+    2. Reports, for each variant, the pickle and flat forest sizes, the
+       single-row and batch prediction latency of the flat forest, and the
+       evaluation metrics of evalutemodel with their change from the full forest
+    3. Writes the variant named by serve_variant to models/model.pkl and
+       models/forest.bin (the API picks it up on its next reload)
+
+    Models that are not random forests are returned unchanged.
+
+    Args:
+        model (RegressorMixin): Model returned by trainmodel
+        X_train (pd.DataFrame): Training features, a sample of which chooses the trees to keep
+        X_test (pd.DataFrame): Test features
+        y_test (pd.Series): Actual house prices of the test set
+        variants (Optional[List[str]]): Variant specifications, DEFAULT_VARIANTS when None
+        serve_variant (str): Variant written to the models directory; empty to keep the trained model
+        reference_rows (int): Training rows used to choose the trees to keep
+
+    Returns:
+        RegressorMixin: The served model (the chosen variant, or the trained model)
+
+    Raises:
+        Exception: If there's an error while compressing, measuring or saving a variant
+    """
+    try:
+        if not isinstance(model, RandomForestRegressor):
+            logging.info(f'{type(model).__name__} is not a random forest, skipping compression')
+            return model
+
+        variants = parse_variants(variants if variants is not None else DEFAULT_VARIANTS)
+        if serve_variant and serve_variant not in [variant.spec for variant in variants]:
+            variants.append(CompressionVariant(serve_variant))
+        X_reference = X_train.sample(min(reference_rows, len(X_train)), random_state=42)
+
+        # Step 1-2: Build and measure every variant; the full forest comes first and is the reference
+        report = {}
+        compressed_models = {}
+        for variant in variants:
+            compressed = variant.apply(model, X_reference)
+            measures = forest_report(compressed, variant.float32, X_test)
+            metrics = regression_metrics(y_test, measures.pop('predictions'))
+            measures.update({name: float(value) for name, value in metrics.items()})
+            if report:
+                full = report['full']
+                measures.update({f'{name}_delta': measures[name] - full[name] for name in metrics})
+            report[variant.spec] = measures
+            compressed_models[variant.spec] = (variant, compressed)
+
+        logging.info(f"{'variant':>28} {'trees':>6} {'nodes':>9} {'pickle MB':>10} {'flat MB':>8} "
+                     f"{'1 row us':>9} {'batch ms':>9} {'R2':>8} {'MAE delta':>12}")
+        for spec, measures in report.items():
+            logging.info(f"{spec:>28} {measures['n_trees']:>6} {measures['n_nodes']:>9} "
+                         f"{measures['pickle_mb']:>10.1f} {measures['flat_mb']:>8.1f} "
+                         f"{measures['single_row_us']:>9.0f} {measures['batch_ms']:>9.1f} "
+                         f"{measures['r2_score']:>8.4f} {measures.get('mae_delta', 0.0):>12.0f}")
+
+        try:
+            with mlflow.start_run(run_name='forest_compression'):
+                mlflow.log_dict(report, 'compression_report.json')
+                if serve_variant:
+                    mlflow.log_param('serve_variant', serve_variant)
+        except Exception as mlflow_error:
+            logging.warning(f"MLflow logging failed: {str(mlflow_error)}")
+
+        if not serve_variant or serve_variant == 'full':
+            return model
+
+        # Step 3: Replace the trained model with the chosen variant, as trainmodel writes it
+        variant, served = compressed_models[serve_variant]
+        os.makedirs("models", exist_ok=True)
+        model_path = os.path.join("models", "model.pkl")
+        joblib.dump(served, model_path + ".tmp")
+        os.replace(model_path + ".tmp", model_path)
+        export_forest(served, os.path.join("models", "forest"), float32=variant.float32)
+        logging.info(f"Compressed forest '{serve_variant}' saved to {model_path} and models/forest.bin")
+        return served
+    except Exception as e:
+        logging.error(f'Error while compressing the model: {str(e)}')
+        raise e
@@ -1,20 +1,43 @@
 # Model Evaluation Step
 # This module evaluates the trained model's performance on test data
-# It calculates multiple regression metrics and logs them to MLflow for tracking
+# It calculates multiple regression metrics with bootstrap confidence intervals and per-segment
+# breakdowns, and logs them to MLflow for tracking
 import logging
-from sklearn.metrics import r2_score
-from sklearn.metrics import mean_absolute_error
-from sklearn.metrics import mean_absolute_percentage_error
-from sklearn.ensemble import RandomForestRegressor
-import numpy as np
+from typing import Optional
+from sklearn.base import RegressorMixin
 import pandas as pd
 import mlflow
+from Data_analysis.model_evaluation import decode_segments, evaluate, forest_predictions
 from zenml import step
+from steps.profiling import profiled
+
+def regression_metrics(y_test, predictions) -> dict:
+    """
+    Regression metrics reported for every evaluated model
+
+    - R² Score: how well the model explains the variance of the prices (1 is a perfect prediction)
+    - RMSE: square root of the mean squared error, penalizes larger errors more heavily (rupees)
+    - MAE: average absolute difference between predicted and actual prices (rupees)
+    - MAPE: mean absolute error as a share of the actual prices
+
+    All four come from one pass over contiguous arrays (see Data_analysis/model_evaluation.py).
+
+    Args:
+        y_test: Actual house prices
+        predictions: Predicted house prices
+
+    Returns:
+        dict: r2_score, rmse, mae and mape
+    """
+    return evaluate(y_test, predictions, n_bootstrap=0)['metrics']
 
 @step(enable_cache=False)
-def evalutemodel(model: RandomForestRegressor,
+@profiled
+def evalutemodel(model: RegressorMixin,
     X_test: pd.DataFrame,
-    y_test: pd.Series) -> None:
+    y_test: pd.Series,
+    preprocessor: Optional[dict] = None,
+    n_bootstrap: int = 1000) -> None:
     """
     ZenML step for evaluating model performance on test data
     
@@ -24,14 +47,22 @@ def evalutemodel(model: RandomForestRegressor,
     - RMSE: Root Mean Square Error (penalizes larger errors more heavily)
     - MAPE: Mean Absolute Percentage Error (error as a percentage of actual values)
     
+    Each metric gets a 95% bootstrap confidence interval, and the metrics are
+    also broken down by location, furnishing and price band. For forests the
+    per-tree predictions are computed once: their mean is the prediction and
+    their spread gives the coverage of the tree prediction band.
+    
     All metrics are logged to MLflow for experiment tracking and comparison.
     The step is decorated with @step(enable_cache=False) to ensure evaluation
     always runs, even if the model hasn't changed.
     
     Args:
-        model (RandomForestRegressor): Trained Random Forest model
+        model (RegressorMixin): Trained model (Random Forest by default)
         X_test (pd.DataFrame): Test features for evaluation
         y_test (pd.Series): Actual house prices for comparison
+        preprocessor (Optional[dict]): Fitted preprocessor, used to name the location and
+            furnishing of the test rows; without it only price bands are reported
+        n_bootstrap (int): Bootstrap replicates of the confidence intervals, 0 to skip them
     
     Returns:
         None: Metrics are logged to MLflow instead of being returned
@@ -43,32 +74,30 @@ def evalutemodel(model: RandomForestRegressor,
         logging.info('Starting model evaluation on test data')
 
         # Generate predictions on test data using the trained model
-        rf_model_preditctions = model.predict(X_test)
+        # Forests predict every tree once; the mean is the prediction and the spread is reported too
+        forest = forest_predictions(model, X_test)
+        if forest is not None:
+            rf_model_preditctions, lower, upper = forest
+        else:
+            rf_model_preditctions = model.predict(X_test)
 
-        # Calculate various regression metrics to assess model performance
-        # R² Score: Measures how well the model explains the variance in the target variable
-        # Values range from 0 to 1, where 1 indicates perfect prediction
-        r2_score_rf = r2_score(y_test, rf_model_preditctions)
-        
-        # MAE: Average absolute difference between predicted and actual values
-        # This metric is in the same units as the target variable (rupees)
-        mae = mean_absolute_error(y_test, rf_model_preditctions)
-        
-        # RMSE: Square root of the mean squared error
-        # This metric penalizes larger errors more heavily than MAE
-        rmse = np.sqrt(((y_test - rf_model_preditctions) ** 2).mean())
-        
-        # MAPE: Mean absolute percentage error
-        # This metric expresses error as a percentage of actual values
-        # Useful for understanding relative prediction accuracy
-        mape = mean_absolute_percentage_error(y_test, rf_model_preditctions)
+        # Calculate R², RMSE, MAE and MAPE with their confidence intervals and per-segment values
+        # in one pass over the test set (see Data_analysis/model_evaluation.py)
+        segments = decode_segments(X_test, y_test, preprocessor)
+        report = evaluate(y_test, rf_model_preditctions, segments, n_bootstrap=n_bootstrap)
 
         # Log all metrics to MLflow for experiment tracking
         # This enables comparison of model performance across different runs
-        mlflow.log_metric("r2_score", r2_score_rf)
-        mlflow.log_metric("rmse", rmse)
-        mlflow.log_metric("mae", mae)
-        mlflow.log_metric("mape", mape)
+        metrics = dict(report['metrics'])
+        for name, (low, high) in report.get('intervals', {}).items():
+            metrics[f'{name}_ci_low'] = low
+            metrics[f'{name}_ci_high'] = high
+        if forest is not None:
+            y = y_test.to_numpy(dtype=float)
+            metrics['tree_band_coverage'] = float(((y >= lower) & (y <= upper)).mean())
+            metrics['tree_band_width'] = float(((upper - lower) / rf_model_preditctions).mean())
+        mlflow.log_metrics(metrics)
+        mlflow.log_dict(report, 'evaluation_report.json')
 
         logging.info("Model evaluation completed - metrics logged to MLflow successfully")
     except Exception as e:
@@ -1,54 +1,185 @@
 # Data Ingestion Module
 # This module handles loading data from different sources (CSV files and API requests)
 # It provides two interfaces: one for the ZenML pipeline and one for the FastAPI application
+# The API interface lives in serving.api_input, free of ZenML, and is re-exported here
+import hashlib
+import os
+import numpy as np
 import pandas as pd
+from pandas.util import hash_pandas_object
+import pyarrow as pa
+from pyarrow import feather
 import logging
+from typing import Iterator, List, Optional, Tuple
+from typing_extensions import Annotated
 from zenml import step
+from serving.api_input import API_COLUMN_NAMES, REQUIRED_COLUMNS, IngestData, ingestdata
+from steps.profiling import profiled
 
+# Explicit schema for streaming the training CSV: only the columns DataPreprocessing keeps are read.
+# Repetitive text columns become categoricals; prices, areas and counts stay text until cleaning
+# parses them, exactly as DataPreprocessing does
+CSV_SCHEMA = {
+    'Title': 'category',
+    'Amount(in rupees)': 'string[pyarrow]',
+    'Price (in rupees)': 'float64',
+    'location': 'category',
+    'Carpet Area': 'string[pyarrow]',
+    'Status': 'category',
+    'Floor': 'category',
+    'Transaction': 'category',
+    'Furnishing': 'category',
+    'facing': 'category',
+    'Society': 'category',
+    'Bathroom': 'string[pyarrow]',
+    'Balcony': 'string[pyarrow]',
+}
 
-class IngestData:
+
+def read_csv_chunks(path: str, chunksize: int, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
     """
-    Data ingestion class for handling dictionary input from API requests
-    
-    This class converts API input data (dictionary format) into a pandas DataFrame
-    that matches the structure expected by the model training pipeline.
-    """
-    def __init__(self, data: dict):
-        """
-        Initialize with input data dictionary
-        
-        Args:
-            data (dict): Dictionary containing house features from API request
-        """
-        self.data = data
-    
-    def getData(self):
-        """
-        Convert dictionary input to DataFrame format
-        
-        This method ensures all required columns are present in the DataFrame,
-        even if they're not provided in the input dictionary. This maintains
-        consistency with the training data structure.
-        
-        Returns:
-            pd.DataFrame: DataFrame with all required columns for model prediction
-        """
-        logging.info('Converting API input dictionary to DataFrame')
-        # Convert dictionary to DataFrame with single row
-        df = pd.DataFrame([self.data])
-        
-        # Ensure all required columns are present (same as training data)
-        # If a column is missing, it will be filled with None
-        required_columns = ['Title', 'Bathroom', 'Carpet Area', 'location', 'Transaction', 
-                          'Furnishing', 'Balcony', 'facing', 'Price (in rupees)',
-                          'Status', 'Society', 'Floor']
-        for col in required_columns:
-            if col not in df.columns:
-                df[col] = None
-        return df
+    Read the training CSV in chunks with the explicit CSV_SCHEMA
+
+    Args:
+        path (str): File path to the CSV file containing house price data
+        chunksize (int): Rows per chunk
+        columns (Optional[List[str]]): Columns to read; defaults to every column in CSV_SCHEMA
+
+    Returns:
+        Iterator[pd.DataFrame]: Chunks indexed by their row number in the file
+    """
+    columns = list(CSV_SCHEMA) if columns is None else columns
+    dtype = {col: CSV_SCHEMA[col] for col in columns}
+    return pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunksize)
+
+# Columnar dataset cache: the raw CSV converted once to an uncompressed Arrow IPC file,
+# named after the hash of the CSV content, so that later runs memory-map it and read
+# only the columns they need. Bump the version when the conversion changes
+DATASET_CACHE_VERSION = 1
+
+# Text columns with few distinct values, stored dictionary-encoded in the cache
+DICTIONARY_COLUMNS = [col for col, dtype in CSV_SCHEMA.items() if dtype == 'category']
+
+
+def content_hash(path: str, block_size: int = 1 << 20) -> str:
+    """
+    Hash of a file's content, used to name its cached columnar copy
+
+    Args:
+        path (str): File to hash
+        block_size (int): Bytes read at a time
+
+    Returns:
+        str: Hexadecimal BLAKE2b digest
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_csv(path: str, cache_dir: str) -> str:
+    """
+    Convert a CSV file to the columnar cache, unless a copy of the same content exists
+
+    The CSV is parsed once with the same pd.read_csv call as ingestdata_step,
+    so cached columns have the dtypes the pipeline has always seen; repetitive
+    text columns are stored dictionary-encoded.
+
+    Args:
+        path (str): File path to the CSV file containing house price data
+        cache_dir (str): Directory holding the cached Arrow files
+
+    Returns:
+        str: Path of the Arrow file for this CSV content
+    """
+    cached = os.path.join(cache_dir, f'{content_hash(path)}.v{DATASET_CACHE_VERSION}.arrow')
+    if os.path.exists(cached):
+        logging.info(f'Using cached columnar copy of {path}: {cached}')
+        return cached
+
+    logging.info(f'Converting {path} to columnar cache {cached}')
+    os.makedirs(cache_dir, exist_ok=True)
+    df = pd.read_csv(path)
+    for col in DICTIONARY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+
+    # Write next to the final name and rename, so an interrupted conversion never leaves a truncated cache
+    with pa.OSFile(cached + '.tmp', 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(cached + '.tmp', cached)
+    return cached
+
+
+def read_cached(cached: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load columns from the columnar cache
+
+    The file is memory-mapped and Arrow reads it without copying, so only the
+    pages of the requested columns are ever read from disk.
+
+    Args:
+        cached (str): Path returned by cache_csv
+        columns (Optional[List[str]]): Columns to load; defaults to every column in CSV_SCHEMA,
+            the ones DataPreprocessing keeps
+
+    Returns:
+        pd.DataFrame: Requested columns, dictionary-encoded ones as categoricals
+    """
+    columns = list(CSV_SCHEMA) if columns is None else columns
+    with pa.memory_map(cached, 'r') as source:
+        names = pa.ipc.open_file(source).schema.names
+    # Only the requested columns are read; the footer read above lists the ones the file has
+    table = feather.read_table(cached, columns=[col for col in names if col in columns], memory_map=True)
+    return table.to_pandas()
+
+# Snapshot of the rows the served model was trained on, for incremental retraining:
+# one 64-bit hash per row of the CSV, over the columns in CSV_SCHEMA read as text,
+# so a row hashes the same whatever dtypes the rest of the file makes pandas infer
+ROW_SNAPSHOT_FILE = os.path.join('models', 'row_hashes.npy')
+
+
+def read_row_hashes(path: str, chunksize: int = 100000,
+                    known: Optional[np.ndarray] = None) -> Tuple[np.ndarray, pd.DataFrame]:
+    """
+    Hash every row of the training CSV and collect the rows not seen before
+
+    The file is read in chunks, so only the new rows are kept in memory.
+
+    Args:
+        path (str): File path to the CSV file containing house price data
+        chunksize (int): Rows read at a time
+        known (Optional[np.ndarray]): Hashes of the rows seen before; None collects no rows
+
+    Returns:
+        Tuple[np.ndarray, pd.DataFrame]: Hashes of all rows, and the new or changed rows
+            (text columns, indexed by their row number in the file)
+    """
+    hashes, new_rows = [], []
+    for chunk in pd.read_csv(path, usecols=list(CSV_SCHEMA), dtype=str, chunksize=chunksize):
+        chunk_hashes = hash_pandas_object(chunk[list(CSV_SCHEMA)], index=False).to_numpy()
+        hashes.append(chunk_hashes)
+        if known is not None:
+            new_rows.append(chunk[~np.isin(chunk_hashes, known)])
+    all_hashes = np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+    delta = pd.concat(new_rows) if new_rows else pd.DataFrame(columns=list(CSV_SCHEMA))
+    return all_hashes, delta
+
+
+def save_row_snapshot(hashes: np.ndarray, snapshot: str = ROW_SNAPSHOT_FILE) -> None:
+    # Unique, sorted hashes, written next to the final name and renamed
+    os.makedirs(os.path.dirname(snapshot) or '.', exist_ok=True)
+    with open(snapshot + '.tmp', 'wb') as f:
+        np.save(f, np.unique(hashes))
+    os.replace(snapshot + '.tmp', snapshot)
+
 
 # ZenML Step for Pipeline Data Ingestion
 @step
+@profiled
 def ingestdata_step(data: str) -> pd.DataFrame:
     """
     ZenML step for ingesting data from CSV file during training pipeline
@@ -72,26 +203,78 @@ def ingestdata_step(data: str) -> pd.DataFrame:
         logging.error(f'Error while ingesting the data: {e}')
         raise e
 
-# API Data Ingestion Function
-def ingestdata(data: dict) -> pd.DataFrame:
+@step(enable_cache=False)
+@profiled
+def cache_data_step(data: str, cache_dir: str) -> str:
     """
-    Function for ingesting API request data during prediction
-    
-    This function is used by the FastAPI application to convert incoming
-    JSON requests into the DataFrame format expected by the trained model.
-    
+    ZenML step for converting the training CSV to the columnar cache
+
+    Never cached by ZenML: the CSV content is hashed on every run, so a
+    changed file produces a new cache path and the downstream steps run again,
+    while an unchanged file lets ZenML reuse their previous outputs.
+
     Args:
-        data (dict): Dictionary containing house features from API request
-    
+        data (str): File path to the CSV file containing house price data
+        cache_dir (str): Directory holding the cached Arrow files
+
     Returns:
-        pd.DataFrame: DataFrame formatted for model prediction
-    
+        str: Path of the Arrow file for this CSV content
+
     Raises:
-        Exception: If there's an error processing the input data
+        Exception: If there's an error reading or converting the CSV file
     """
     try:
-        logging.info('Processing API input data for prediction')
-        return IngestData(data).getData()
+        return cache_csv(data, cache_dir)
     except Exception as e:
-        logging.error(f'Error while ingesting the data: {e}')
-        raise e
\ No newline at end of file
+        logging.error(f'Error while caching the data: {e}')
+        raise e
+
+@step(enable_cache=False)
+@profiled
+def ingest_delta_step(data: str) -> Annotated[pd.DataFrame, "delta"]:
+    """
+    ZenML step for loading only the listings added or changed since the last run
+
+    The rows of the CSV are compared with the snapshot written by
+    snapshot_data_step at the end of the previous training run. Rows
+    removed from the CSV are not reported: the model cannot forget them.
+
+    Args:
+        data (str): File path to the CSV file containing house price data
+
+    Returns:
+        pd.DataFrame: New or changed rows, with the columns of CSV_SCHEMA as text
+
+    Raises:
+        FileNotFoundError: If no previous run left a snapshot; run trianingpipeline first
+    """
+    try:
+        if not os.path.exists(ROW_SNAPSHOT_FILE):
+            raise FileNotFoundError(f'No row snapshot at {ROW_SNAPSHOT_FILE}: run the full training pipeline first')
+        known = np.load(ROW_SNAPSHOT_FILE)
+        hashes, delta = read_row_hashes(data, known=known)
+        logging.info(f'{len(delta)} new or changed rows out of {len(hashes)} in {data}')
+        return delta
+    except Exception as e:
+        logging.error(f'Error while ingesting the new data: {e}')
+        raise e
+
+@step(enable_cache=False)
+@profiled
+def snapshot_data_step(data: str) -> None:
+    """
+    ZenML step recording the rows of the CSV the model has now been trained on
+
+    Runs last in both training pipelines, so a failed run leaves the
+    previous snapshot and its rows are picked up again next time.
+
+    Args:
+        data (str): File path to the CSV file containing house price data
+    """
+    try:
+        hashes, _ = read_row_hashes(data)
+        save_row_snapshot(hashes)
+        logging.info(f'Row snapshot of {len(hashes)} rows saved to {ROW_SNAPSHOT_FILE}')
+    except Exception as e:
+        logging.error(f'Error while saving the row snapshot: {e}')
+        raise e
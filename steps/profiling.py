@@ -0,0 +1,250 @@
+# Step Profiling Module
+# This module measures each pipeline step when STEP_PROFILING=1: wall and CPU time, peak resident memory,
+# rows in and out and the size of the artifacts it returns, with optional cProfile dumps
+# Profiles are written to STEP_PROFILE_DIR and logged to MLflow next to the evaluation metrics
+import cProfile
+import functools
+import json
+import logging
+import os
+import pickle
+import sys
+import time
+from typing import Callable, Optional
+import mlflow
+import numpy as np
+import pandas as pd
+
+# resource is Unix only; without it CPU time falls back to time.process_time()
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Profiling is opt-in and read when a step runs, so it can be switched per pipeline run
+# STEP_PROFILING=1 records the measurements, STEP_PROFILING=cprofile also dumps a cProfile file per step
+# STEP_PROFILE_DIR is where step_profiles.json and the .prof files are written, one folder per pipeline run
+PROFILING_MODES = ('1', 'cprofile')
+
+
+def profiling_mode() -> Optional[str]:
+    mode = os.getenv('STEP_PROFILING', '0')
+    return mode if mode in PROFILING_MODES else None
+
+
+def profile_dir() -> str:
+    # One directory per pipeline run; steps called outside a pipeline share "local"
+    try:
+        from zenml import get_step_context
+        run_name = get_step_context().pipeline_run.name
+    except Exception:
+        run_name = 'local'
+    return os.path.join(os.getenv('STEP_PROFILE_DIR', 'profiles'), run_name)
+
+
+# Profiles of the steps run by this process that are not yet in MLflow
+_pending = []
+
+
+def _status_mb(field: str) -> Optional[float]:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    # VmHWM where /proc exists, else the peak getrusage reports (KiB, bytes on macOS), else unknown
+    peak = _status_mb('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss / 2 ** 20 if sys.platform == 'darwin' else maxrss / 1024
+
+
+def _reset_peak_rss() -> bool:
+    # Writing 5 to clear_refs resets VmHWM to the current RSS (Linux), so the peak is the step's own
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class _CountingFile:
+    # Write-only file that only counts bytes, to size a pickle without holding it in memory
+    def __init__(self):
+        self.size = 0
+
+    def write(self, data) -> int:
+        size = memoryview(data).nbytes
+        self.size += size
+        return size
+
+
+def rows_of(value) -> Optional[int]:
+    """
+    Number of rows of a data artifact
+
+    Args:
+        value: Step input or output
+
+    Returns:
+        Optional[int]: Rows of DataFrames, Series and arrays, None for anything else
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    return None
+
+
+def artifact_bytes(value) -> int:
+    """
+    Size of a step output: memory of DataFrames, Series and arrays, size of the file a
+    path points to, and pickled size of anything else (models, dictionaries)
+
+    Args:
+        value: Step output
+
+    Returns:
+        int: Size in bytes
+    """
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, str) and os.path.isfile(value):
+        return os.path.getsize(value)
+    sink = _CountingFile()
+    try:
+        pickle.Pickler(sink, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    except Exception:
+        return 0
+    return sink.size
+
+
+def _cpu_seconds() -> float:
+    # CPU of every thread of this process plus the child processes it waited for (e.g. process pools)
+    if resource is None:
+        return time.process_time()
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def profiled(func: Callable) -> Callable:
+    """
+    Decorator measuring a step function, placed under @step
+
+    Does nothing unless STEP_PROFILING is set. The wrapper keeps the
+    signature and source of the function, so ZenML sees the same inputs,
+    outputs and cache key.
+
+    Args:
+        func (Callable): Step entrypoint
+
+    Returns:
+        Callable: Entrypoint recording a profile of every call
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        mode = profiling_mode()
+        if mode is None:
+            return func(*args, **kwargs)
+
+        name = func.__name__
+        inputs = {key: rows_of(value) for key, value in zip(func.__code__.co_varnames, args)}
+        inputs.update({key: rows_of(value) for key, value in kwargs.items()})
+        rss_before = _status_mb('VmRSS')
+        step_peak = _reset_peak_rss()
+        profiler = cProfile.Profile() if mode == 'cprofile' else None
+
+        cpu_start = _cpu_seconds()
+        wall_start = time.perf_counter()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = _cpu_seconds() - cpu_start
+
+        outputs = result if isinstance(result, tuple) else (result,)
+        profile = {
+            'step': name,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'rss_before_mb': rss_before,
+            'peak_rss_mb': _peak_rss_mb(),
+            # False when the peak could not be reset: it is then the peak of the whole process so far
+            'peak_is_step_peak': step_peak,
+            'rows_in': {key: rows for key, rows in inputs.items() if rows is not None},
+            'rows_out': [rows_of(value) for value in outputs],
+            'output_bytes': [artifact_bytes(value) for value in outputs if value is not None],
+        }
+        if profiler is not None:
+            directory = profile_dir()
+            os.makedirs(directory, exist_ok=True)
+            profile['cprofile'] = os.path.join(directory, f'{name}.prof')
+            profiler.dump_stats(profile['cprofile'])
+        logging.info(f"Step {name}: {wall:.2f} s wall, {cpu:.2f} s CPU, peak RSS {profile['peak_rss_mb']} MB, "
+                     f"rows in {profile['rows_in']}, rows out {profile['rows_out']}")
+        record_profile(profile)
+        return result
+
+    return wrapper
+
+
+def record_profile(profile: dict) -> None:
+    """
+    Save a step profile and log the profiles so far to MLflow
+
+    Profiles are appended to step_profiles.json in the folder of the
+    pipeline run under STEP_PROFILE_DIR. They are logged to the active
+    MLflow run, the one evalutemodel writes its metrics to; steps that run
+    before it keep their profiles until then.
+
+    Args:
+        profile (dict): Measurements of one step
+    """
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, 'step_profiles.json')
+    try:
+        with open(path) as f:
+            profiles = json.load(f)
+    except (OSError, ValueError):
+        profiles = []
+    profiles.append(profile)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+    _pending.append(profile)
+    try:
+        if mlflow.active_run() is None:
+            return
+        for pending in _pending:
+            step = pending['step']
+            mlflow.log_metrics({
+                f'profile.{step}.wall_seconds': pending['wall_seconds'],
+                f'profile.{step}.cpu_seconds': pending['cpu_seconds'],
+                f'profile.{step}.peak_rss_mb': pending['peak_rss_mb'] or 0.0,
+                f'profile.{step}.rows_in': sum(pending['rows_in'].values()),
+                f'profile.{step}.rows_out': sum(rows for rows in pending['rows_out'] if rows is not None),
+                f'profile.{step}.output_mb': sum(pending['output_bytes']) / 2 ** 20,
+            })
+            if 'cprofile' in pending:
+                mlflow.log_artifact(pending['cprofile'], 'profiles')
+        mlflow.log_artifact(path, 'profiles')
+        _pending.clear()
+    except Exception as mlflow_error:
+        logging.warning(f"MLflow logging of the step profiles failed: {str(mlflow_error)}")
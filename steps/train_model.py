@@ -1,25 +1,100 @@
 # Model Training Step
-# This module handles the training of the Random Forest model and saves it for later use
+# This module handles the training of the configured model (Random Forest by default) and saves it for later use
 # It also integrates with MLflow for experiment tracking and model versioning
 from abc import abstractmethod
 import logging
 from zenml import step
-from Data_analysis.model_dev import RandomForestModel
+from steps.profiling import profiled
+from Data_analysis.feature_store import train_forest
+from Data_analysis.model_dev import get_model, update_model
+from serving.forest import FlatForest, export_forest
+from serving.preprocessor import Preprocessor
 import pandas as pd
 import mlflow
 import joblib
 import os
-from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import RandomForestRegressor
+from typing import List, Optional
+from typing_extensions import Annotated
+from sklearn.base import RegressorMixin
+
+
+def save_model(model, preprocessor: dict) -> List[str]:
+    """
+    Write the model and its preprocessor to the models directory for the API
+
+    Every file is written next to the old one and renamed, so a running API
+    never reads a half-written file.
+
+    Args:
+        model: Trained scikit-learn model
+        preprocessor (dict): Fitted preprocessor, as returned by the cleaning step
+
+    Returns:
+        List[str]: Paths of the files written
+
+    Raises:
+        Exception: If a file was not created
+    """
+    os.makedirs("models", exist_ok=True)
+
+    # This file will be loaded by the FastAPI application
+    model_path = os.path.join("models", "model.pkl")
+    # Models fitted on every core (n_jobs=-1) are stored single-threaded: each API request predicts
+    # one or a few rows, and the API already runs requests in parallel (see INFERENCE_WORKERS)
+    n_jobs = model.get_params().get('n_jobs')
+    if n_jobs is not None:
+        model.set_params(n_jobs=1)
+    try:
+        joblib.dump(model, model_path + ".tmp")
+    finally:
+        if n_jobs is not None:
+            model.set_params(n_jobs=n_jobs)
+    os.replace(model_path + ".tmp", model_path)
+    logging.info(f'Model saved successfully to {model_path}')
+
+    # Export the forest as flat arrays (models/forest.bin + models/forest.json)
+    # The API memory-maps this file instead of unpickling model.pkl in every worker
+    # Other models are served from model.pkl: a flat forest left by a previous run is removed,
+    # otherwise the API would keep serving it
+    forest_path = os.path.join("models", "forest")
+    is_forest = isinstance(model, RandomForestRegressor)
+    if is_forest:
+        export_forest(model, forest_path)
+        logging.info(f'Flat forest exported successfully to {forest_path}.bin')
+    elif FlatForest.exists(forest_path):
+        os.remove(forest_path + '.json')
+        os.remove(forest_path + '.bin')
+        logging.info(f'Removed the flat forest of a previous run from {forest_path}.bin')
+
+    # Save the preprocessor for consistent encoding and scaling
+    preprocessor_path = os.path.join("models", "preprocessor.json")
+    Preprocessor.from_dict(preprocessor).save(preprocessor_path)
+    logging.info(f'Preprocessor saved successfully to {preprocessor_path}')
+
+    # Verify that model files were created successfully
+    # This prevents issues where the API tries to load non-existent files
+    files = [model_path, preprocessor_path] + ([forest_path + '.bin', forest_path + '.json'] if is_forest else [])
+    for path in files:
+        if not os.path.exists(path):
+            raise Exception(f"Model file was not created at {path}")
+    return files
 
 @step
-def trainmodel(X_train: pd.DataFrame, Y_train: pd.DataFrame):
+@profiled
+def trainmodel(X_train: pd.DataFrame, Y_train: pd.DataFrame, preprocessor: dict,
+               model_name: str = 'random_forest', model_params: Optional[dict] = None):
     """
-    ZenML step for training the Random Forest model
+    ZenML step for training the house price model
     
     This step performs the following operations:
-    1. Trains a Random Forest Regressor on the prepared training data
-    2. Saves the trained model locally for API inference
-    3. Saves a StandardScaler for feature scaling during inference
+    1. Trains the model selected by model_name (a Random Forest Regressor by
+       default) with the hyperparameters of model_params on the prepared training data
+    2. Saves the trained model locally for API inference, as a joblib pickle
+       and, for random forests, as flat node arrays that the API can memory-map
+    3. Saves the preprocessor fitted by the cleaning step (label encoding and
+       feature scaling) next to the model, so inference transforms its inputs
+       exactly as the training data was transformed
     4. Logs the model and artifacts to MLflow for experiment tracking
     
     The step is decorated with @step to enable caching and automatic tracking
@@ -28,9 +103,13 @@ def trainmodel(X_train: pd.DataFrame, Y_train: pd.DataFrame):
     Args:
         X_train (pd.DataFrame): Training features (scaled and encoded)
         Y_train (pd.DataFrame): Training target variable (house prices)
+        preprocessor (dict): Fitted preprocessor returned by the cleaning step
+        model_name (str): Key of the model in Data_analysis.model_dev.MODELS
+        model_params (Optional[dict]): Hyperparameters overriding the model defaults,
+            e.g. {"n_estimators": 300, "n_jobs": 8}
     
     Returns:
-        RandomForestRegressor: Trained model object
+        RegressorMixin: Trained model object
     
     Raises:
         Exception: If there's an error during model training or saving
@@ -42,31 +121,15 @@ def trainmodel(X_train: pd.DataFrame, Y_train: pd.DataFrame):
         # This ensures the directory structure is ready for saving model files
         os.makedirs("models", exist_ok=True)
         
-        # Step 1: Train the Random Forest model
-        # The RandomForestModel class handles the actual training process
-        object = RandomForestModel()
+        # Step 1: Train the configured model
+        # The model class registered under model_name handles the actual training process
+        object = get_model(model_name, model_params)
+        logging.info(f'Training {model_name} with {object.params}')
         model = object.train(X_train, Y_train)
         
-        # Step 2: Save the trained model locally for API inference
-        # This file will be loaded by the FastAPI application
-        model_path = os.path.join("models", "model.pkl")
-        joblib.dump(model, model_path)
-        logging.info(f'Model saved successfully to {model_path}')
-        
-        # Step 3: Save the StandardScaler for consistent feature scaling
-        # This ensures the same scaling is applied during inference as during training
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X_train)
-        scaler_path = os.path.join("models", "scaler.pkl")
-        joblib.dump(scaler, scaler_path)
-        logging.info(f'StandardScaler saved successfully to {scaler_path}')
-        
-        # Step 4: Verify that model files were created successfully
-        # This prevents issues where the API tries to load non-existent files
-        if not os.path.exists(model_path):
-            raise Exception(f"Model file was not created at {model_path}")
-        if not os.path.exists(scaler_path):
-            raise Exception(f"Scaler file was not created at {scaler_path}")
+        # Steps 2-4: Save the model, its flat forest and the preprocessor for the API, and check them
+        # X_train is already encoded and scaled by the preprocessor; the API applies it to every input
+        saved_files = save_model(model, preprocessor)
             
         # Step 5: Log model and artifacts to MLflow for experiment tracking
         # This enables model versioning and performance comparison across runs
@@ -74,13 +137,13 @@ def trainmodel(X_train: pd.DataFrame, Y_train: pd.DataFrame):
             with mlflow.start_run():
                 # Log training parameters for reproducibility
                 mlflow.log_params({
-                    "model_type": "RandomForestRegressor",
-                    "random_state": 42
+                    "model_type": type(model).__name__,
+                    **object.params
                 })
                 
                 # Log model files as artifacts
-                mlflow.log_artifact(model_path)
-                mlflow.log_artifact(scaler_path)
+                for path in saved_files:
+                    mlflow.log_artifact(path)
                 
                 # Register the model in MLflow model registry
                 mlflow.sklearn.log_model(
@@ -98,4 +161,106 @@ def trainmodel(X_train: pd.DataFrame, Y_train: pd.DataFrame):
         return model
     except Exception as e:
         logging.error(f'Error in the training process: {str(e)}')
-        raise e
\ No newline at end of file
+        raise e
+
+@step(enable_cache=False)
+@profiled
+def trainmodel_out_of_core(feature_store: str, preprocessor: dict,
+                           model_params: Optional[dict] = None) -> Annotated[RegressorMixin, "trained_model"]:
+    """
+    ZenML step for training the Random Forest on an out-of-core feature store
+
+    This step performs the following operations:
+    1. Fits one sub-forest per block of the store, in parallel workers that
+       memory-map their block, and merges them into one forest (see
+       Data_analysis.feature_store.train_forest)
+    2. Saves the forest and the preprocessor for the API and logs them to
+       MLflow, as trainmodel does
+
+    Args:
+        feature_store (str): Directory returned by clean_csv_to_feature_store
+        preprocessor (dict): Fitted preprocessor returned with it
+        model_params (Optional[dict]): Random Forest hyperparameters overriding the defaults;
+            n_estimators trees are shared out between the blocks and n_jobs sets the workers
+
+    Returns:
+        RegressorMixin: Trained Random Forest
+
+    Raises:
+        Exception: If there's an error during model training or saving
+    """
+    try:
+        # Step 1: Fit and merge the sub-forests
+        params = get_model('random_forest', model_params).params
+        logging.info(f'Training random_forest out of core on {feature_store} with {params}')
+        model = train_forest(feature_store, params)
+
+        # Step 2: Save and log the model
+        saved_files = save_model(model, preprocessor)
+        try:
+            with mlflow.start_run():
+                mlflow.log_params({"model_type": type(model).__name__, "out_of_core": True, **params})
+                for path in saved_files:
+                    mlflow.log_artifact(path)
+                mlflow.sklearn.log_model(model, "house_price_model", registered_model_name="house_price_model")
+        except Exception as mlflow_error:
+            logging.warning(f"MLflow logging failed: {str(mlflow_error)}")
+            logging.info("Continuing with local model only")
+        return model
+    except Exception as e:
+        logging.error(f'Error in the out-of-core training process: {str(e)}')
+        raise e
+
+@step(enable_cache=False)
+@profiled
+def updatemodel(X_new: pd.DataFrame, y_new: pd.Series, preprocessor: dict,
+                new_trees: int = 10) -> Annotated[RegressorMixin, "updated_model"]:
+    """
+    ZenML step for updating the served model with new listings
+
+    This step performs the following operations:
+    1. Loads the model saved by the last training run (models/model.pkl)
+    2. Adds new_trees trees (boosting iterations for gradient boosting)
+       fitted on the new listings only, keeping the existing ones
+    3. Saves the model, its flat forest and the extended preprocessor as
+       trainmodel does, and logs them to MLflow
+
+    Args:
+        X_new (pd.DataFrame): New training features returned by clean_delta
+        y_new (pd.Series): New target values
+        preprocessor (dict): Preprocessor returned by clean_delta, with the new categories
+        new_trees (int): Trees (or boosting iterations) to add
+
+    Returns:
+        RegressorMixin: Updated model (the saved model unchanged when there is no new data)
+
+    Raises:
+        Exception: If there's an error while loading, updating or saving the model
+    """
+    try:
+        model_path = os.path.join("models", "model.pkl")
+        model = joblib.load(model_path)
+        if len(X_new) == 0:
+            logging.info('No new listings, the model is unchanged')
+            return model
+
+        # Step 1-2: Fit the new estimators, on the columns in the order the model was trained with
+        n_before = len(model.estimators_) if isinstance(model, RandomForestRegressor) else model.n_iter_
+        model = update_model(model, X_new[list(model.feature_names_in_)], y_new, new_trees)
+        logging.info(f'{type(model).__name__} updated on {len(X_new)} new listings: '
+                     f'{n_before} -> {n_before + new_trees} estimators')
+
+        # Step 3: Save and log the updated model
+        saved_files = save_model(model, preprocessor)
+        try:
+            with mlflow.start_run(run_name='incremental_update'):
+                mlflow.log_params({"model_type": type(model).__name__, "new_rows": len(X_new),
+                                   "new_trees": new_trees})
+                for path in saved_files:
+                    mlflow.log_artifact(path)
+        except Exception as mlflow_error:
+            logging.warning(f"MLflow logging failed: {str(mlflow_error)}")
+        return model
+    except Exception as e:
+        logging.error(f'Error while updating the model: {str(e)}')
+        raise e
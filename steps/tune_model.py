@@ -0,0 +1,92 @@
+# Hyperparameter Tuning Step
+# This module searches the hyperparameters of the selected model before training
+# Every trial is logged to MLflow as a nested run, and the best configuration is handed to trainmodel
+import logging
+from typing import Dict, List, Optional
+import mlflow
+import pandas as pd
+from typing_extensions import Annotated
+from zenml import step
+from steps.profiling import profiled
+from Data_analysis.model_tuning import HyperparameterSearch
+
+@step
+@profiled
+def tunemodel(X_train: pd.DataFrame, y_train: pd.Series, model_name: str = 'random_forest',
+              model_params: Optional[dict] = None, search_space: Optional[Dict[str, List]] = None,
+              n_trials: int = 20, strategy: str = 'halving', n_folds: int = 3,
+              n_jobs: Optional[int] = None) -> Annotated[dict, "model_params"]:
+    """
+    ZenML step for searching the hyperparameters of the model
+
+    This step performs the following operations:
+    1. Samples n_trials configurations from the search space of the model
+    2. Evaluates them with cross-validation on the training data, in a
+       process pool that reads the folds from shared memory; with the
+       "halving" strategy, configurations that score badly on a small
+       sample of the rows are dropped before the larger fits
+    3. Logs every trial and the best configuration to MLflow
+
+    Args:
+        X_train (pd.DataFrame): Training features (scaled and encoded)
+        y_train (pd.Series): Training target variable (house prices)
+        model_name (str): Key of the model in Data_analysis.model_dev.MODELS
+        model_params (Optional[dict]): Fixed hyperparameters, kept in every trial
+        search_space (Optional[Dict[str, List]]): Candidate values per hyperparameter,
+            Data_analysis.model_tuning.SEARCH_SPACES[model_name] by default
+        n_trials (int): Configurations to sample
+        strategy (str): "halving" (successive halving) or "random"
+        n_folds (int): Cross-validation folds
+        n_jobs (Optional[int]): Worker processes, all cores by default
+
+    Returns:
+        dict: Best hyperparameters, to pass to trainmodel as model_params
+
+    Raises:
+        Exception: If there's an error during the search
+    """
+    try:
+        logging.info(f'Starting hyperparameter search for {model_name}: {n_trials} configurations, '
+                     f'{strategy} strategy, {n_folds} folds')
+        search = HyperparameterSearch(model_name, search_space, n_trials, strategy, n_folds, n_jobs=n_jobs)
+
+        # MLflow is optional here as in trainmodel: the search still runs if logging fails
+        try:
+            run = mlflow.start_run(run_name=f'{model_name}_search')
+        except Exception as mlflow_error:
+            logging.warning(f"MLflow logging failed: {str(mlflow_error)}")
+            run = None
+
+        def log_trial(trial: dict) -> None:
+            if run is None:
+                return
+            try:
+                with mlflow.start_run(run_name=f"rung {trial['rung']}", nested=True):
+                    mlflow.log_params({**trial['params'], 'rung': trial['rung'], 'n_rows': trial['n_rows']})
+                    mlflow.log_metric('cv_r2', trial['score'])
+                    mlflow.log_metric('fit_seconds', trial['seconds'])
+                    for fold, score in enumerate(trial['fold_scores']):
+                        mlflow.log_metric('fold_r2', score, step=fold)
+            except Exception as mlflow_error:
+                logging.warning(f"MLflow logging failed: {str(mlflow_error)}")
+
+        try:
+            best_params, trials = search.run(X_train, y_train, model_params, on_trial=log_trial)
+            # The last trial of the best configuration is its evaluation on all training rows
+            best_score = [trial['score'] for trial in trials if trial['params'] == best_params][-1]
+            if run is not None:
+                try:
+                    mlflow.log_params({'model_type': model_name, 'strategy': strategy, 'n_trials': n_trials,
+                                       **{f'best_{key}': value for key, value in best_params.items()}})
+                    mlflow.log_metric('best_cv_r2', best_score)
+                except Exception as mlflow_error:
+                    logging.warning(f"MLflow logging failed: {str(mlflow_error)}")
+        finally:
+            if run is not None:
+                mlflow.end_run()
+
+        logging.info(f'Best configuration after {len(trials)} trials: {best_params} (CV R2 {best_score:.4f})')
+        return best_params
+    except Exception as e:
+        logging.error(f'Error during hyperparameter search: {str(e)}')
+        raise e
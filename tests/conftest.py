@@ -0,0 +1,58 @@
+# Shared Test Fixtures
+# A small forest and preprocessor trained on synthetic listings, the models directory the API
+# serves them from, and a loader that imports app.py against that directory with a given configuration
+import importlib
+import os
+import sys
+import joblib
+import pytest
+from benchmarks.synthetic import make_listings, to_api_rows, train_artifacts
+
+
+@pytest.fixture(scope='session')
+def artifacts():
+    # Raw listings with the model and preprocessor trained on them, as the pipeline would
+    listings = make_listings(3000, seed=5)
+    model, preprocessor = train_artifacts(listings)
+    return listings, model, preprocessor
+
+
+@pytest.fixture
+def api_rows(artifacts):
+    listings, _, _ = artifacts
+    return to_api_rows(listings.head(20))
+
+
+@pytest.fixture
+def models_dir(tmp_path, artifacts):
+    # Working directory holding models/ as written by the training step
+    _, model, preprocessor = artifacts
+    os.makedirs(tmp_path / 'models')
+    joblib.dump(model, tmp_path / 'models' / 'model.pkl')
+    preprocessor.save(str(tmp_path / 'models' / 'preprocessor.json'))
+    return tmp_path
+
+
+@pytest.fixture
+def load_app(models_dir, monkeypatch):
+    """
+    Import app.py serving models_dir, with environment variables overriding its configuration
+
+    app.py reads its configuration and loads the model at import time, so every
+    call imports a fresh module.
+    """
+    loaded = []
+
+    def load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, str(value))
+        monkeypatch.chdir(models_dir)
+        sys.modules.pop('app', None)
+        module = importlib.import_module('app')
+        loaded.append(module)
+        return module
+
+    yield load
+    for module in loaded:
+        module.executor.shutdown()
+    sys.modules.pop('app', None)
@@ -0,0 +1,55 @@
+# Model Reload Endpoint Tests
+# /admin/reload must be disabled without MODEL_RELOAD_TOKEN and check the token otherwise; a reload
+# swaps in the model on disk, and predictions cached for the old artifacts are not served again
+# Run with: python -m pytest tests
+import joblib
+import numpy as np
+import pandas as pd
+from fastapi.testclient import TestClient
+from sklearn.dummy import DummyRegressor
+
+
+def constant_model(preprocessor, price: float) -> DummyRegressor:
+    # Model predicting one known price, so the response shows which model served it
+    X = pd.DataFrame(np.zeros((2, len(preprocessor.feature_names))), columns=preprocessor.feature_names)
+    return DummyRegressor(strategy='constant', constant=price).fit(X, [price, price])
+
+
+def test_reload_disabled_without_token(load_app, monkeypatch):
+    monkeypatch.delenv('MODEL_RELOAD_TOKEN', raising=False)
+    client = TestClient(load_app().app)
+    assert client.post('/admin/reload').status_code == 403
+    assert client.post('/admin/reload', headers={'X-Admin-Token': ''}).status_code == 403
+
+
+def test_reload_checks_token(load_app):
+    client = TestClient(load_app(MODEL_RELOAD_TOKEN='secret').app)
+    assert client.post('/admin/reload').status_code == 403
+    assert client.post('/admin/reload', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+    response = client.post('/admin/reload', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    # The files did not change: nothing to reload
+    assert response.json()['reloaded'] is False
+
+
+def test_reload_swaps_model_and_invalidates_cache(load_app, models_dir, artifacts, api_rows):
+    _, _, preprocessor = artifacts
+    app = load_app(MODEL_RELOAD_TOKEN='secret', PREDICTION_CACHE_SIZE=100)
+    client = TestClient(app.app)
+    old_version = app.model_store.current.version
+    old_price = client.post('/predict', json=api_rows[0]).json()['predicted_price']
+    assert client.post('/predict', json=api_rows[0]).json()['predicted_price'] == old_price
+    assert app.prediction_cache.hits == 1
+
+    # A new training run writes another model; its size and modification time change the artifact version
+    joblib.dump(constant_model(preprocessor, 1234567.0), models_dir / 'models' / 'model.pkl')
+    response = client.post('/admin/reload', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert response.json()['reloaded'] is True
+    assert app.model_store.current.version != old_version
+    assert response.json()['model']['version'] == app.model_store.current.version
+
+    # The cached prediction of the old model is a miss under the new version
+    hits = app.prediction_cache.hits
+    assert client.post('/predict', json=api_rows[0]).json()['predicted_price'] == 1234567.0
+    assert app.prediction_cache.hits == hits
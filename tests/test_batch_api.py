@@ -0,0 +1,49 @@
+# Batch Prediction Endpoint Tests
+# Every item of /predict/batch gets its own result, in input order: items that are not objects,
+# fail validation or carry unknown categories are reported without failing the rest of the batch
+# Run with: python -m pytest tests
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(load_app):
+    return TestClient(load_app(PREDICTION_CACHE_SIZE=0).app)
+
+
+def test_batch_reports_invalid_items_individually(client, api_rows):
+    items = [api_rows[0], None, 'listing', 5, [api_rows[1]],
+             dict(api_rows[2], Bathroom=-1), {k: v for k, v in api_rows[3].items() if k != 'Society'}, api_rows[4]]
+    response = client.post('/predict/batch', json=items)
+    assert response.status_code == 200
+    body = response.json()
+    assert [result['index'] for result in body['results']] == list(range(len(items)))
+    assert [result['status'] for result in body['results']] == ['success'] + ['error'] * 6 + ['success']
+    assert (body['succeeded'], body['failed']) == (2, 6)
+    assert 'Bathroom' in body['results'][5]['error'] and 'Society' in body['results'][6]['error']
+
+    # Valid items get the price /predict gives them
+    for index in (0, 7):
+        single = client.post('/predict', json=items[index]).json()
+        assert body['results'][index]['predicted_price'] == pytest.approx(single['predicted_price'], rel=1e-12)
+        assert body['results'][index]['error'] is None
+
+
+def test_batch_unknown_categories_under_error_policy(load_app, api_rows):
+    client = TestClient(load_app(UNKNOWN_CATEGORY_POLICY='error', PREDICTION_CACHE_SIZE=0).app)
+    items = [api_rows[0], dict(api_rows[1], location='Unseen location'), api_rows[2]]
+    body = client.post('/predict/batch', json=items).json()
+    assert [result['status'] for result in body['results']] == ['success', 'error', 'success']
+    assert 'Unseen location' in body['results'][1]['error']
+    assert body['results'][1]['predicted_price'] is None
+    assert (body['succeeded'], body['failed']) == (2, 1)
+
+
+def test_batch_unknown_categories_under_default_policy(client, api_rows):
+    body = client.post('/predict/batch', json=[dict(api_rows[0], location='Unseen location')]).json()
+    assert body['results'][0]['status'] == 'success'
+
+
+@pytest.mark.parametrize('payload', [[], {'items': []}, 'listing'])
+def test_batch_rejects_empty_or_non_list_body(client, payload):
+    assert client.post('/predict/batch', json=payload).status_code == 422
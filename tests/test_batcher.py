@@ -0,0 +1,53 @@
+# Micro-Batcher Tests
+# Concurrent submissions are scored together, and every caller gets its own result
+# or its own error back, in whatever order the batch was assembled
+# Run with: python -m pytest tests
+import asyncio
+from serving.batcher import MicroBatcher
+
+
+async def run_inline(func, *args):
+    # Stands in for InferenceExecutor.run: scores the batch on the event loop
+    return func(*args)
+
+
+def test_results_and_errors_reach_their_own_callers():
+    batches = []
+
+    def predict_many(items):
+        batches.append(list(items))
+        return [ValueError(f'bad item {item}') if item % 3 == 0 else item * 10 for item in items]
+
+    batcher = MicroBatcher(predict_many, run_inline, max_batch_size=4, max_wait_ms=5)
+
+    async def scenario():
+        return await asyncio.gather(*[batcher.submit(item) for item in range(1, 11)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    for item, result in zip(range(1, 11), results):
+        if item % 3 == 0:
+            assert isinstance(result, ValueError) and str(result) == f'bad item {item}'
+        else:
+            assert result == item * 10
+    # Full batches are flushed right away, the remainder when the timer fires
+    assert batches == [[1, 2, 3, 4], [5, 6, 7, 8], [9, 10]]
+    assert batcher.metrics()['by_batch_size'][4]['batches'] == 2
+
+
+def test_failed_batch_fails_every_caller():
+    async def failing_run(func, *args):
+        raise RuntimeError('executor saturated')
+
+    batcher = MicroBatcher(lambda items: items, failing_run, max_batch_size=8, max_wait_ms=1)
+
+    async def scenario():
+        return await asyncio.gather(*[batcher.submit(item) for item in range(3)], return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.metrics()['pending'] == 0
+
+
+def test_lone_item_is_flushed_by_the_timer():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items], run_inline, max_batch_size=32, max_wait_ms=1)
+    assert asyncio.run(batcher.submit(41)) == 42
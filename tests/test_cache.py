@@ -0,0 +1,53 @@
+# Prediction Cache Tests
+# Identical inputs scored by the same artifacts must hit, and rewriting an artifact
+# (new size or modification time) must change the version and so miss
+# Run with: python -m pytest tests
+import os
+from serving.cache import PredictionCache, artifact_version
+
+
+def test_identical_inputs_hit():
+    cache = PredictionCache(max_entries=10, ttl_seconds=0)
+    row = {'Title': '2 BHK', 'Bathroom': 2, 'Carpet_Area': 950.0}
+    cache.put(PredictionCache.key(row, 'v1'), 123.0)
+    # Key order does not matter, equal inputs are one entry
+    assert cache.get(PredictionCache.key(dict(reversed(list(row.items()))), 'v1')) == 123.0
+    assert cache.get(PredictionCache.key(dict(row, Bathroom=3), 'v1')) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_miss_after_artifact_changes(tmp_path):
+    model = tmp_path / 'model.pkl'
+    model.write_bytes(b'a' * 100)
+    os.utime(model, ns=(1_000_000_000, 1_000_000_000))
+    version = artifact_version(str(model))
+    assert artifact_version(str(model)) == version
+
+    cache = PredictionCache(max_entries=10, ttl_seconds=0)
+    row = {'Title': '2 BHK'}
+    cache.put(PredictionCache.key(row, version), 123.0)
+    assert cache.get(PredictionCache.key(row, version)) == 123.0
+
+    # Same size, new modification time
+    os.utime(model, ns=(2_000_000_000, 2_000_000_000))
+    touched = artifact_version(str(model))
+    assert touched != version
+    assert cache.get(PredictionCache.key(row, touched)) is None
+
+    # New size, modification time put back
+    model.write_bytes(b'a' * 101)
+    os.utime(model, ns=(2_000_000_000, 2_000_000_000))
+    resized = artifact_version(str(model))
+    assert resized not in (version, touched)
+    assert cache.get(PredictionCache.key(row, resized)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=0)
+    keys = [PredictionCache.key({'Title': title}, 'v1') for title in 'abc']
+    cache.put(keys[0], 0)
+    cache.put(keys[1], 1)
+    assert cache.get(keys[0]) == 0
+    cache.put(keys[2], 2)
+    assert cache.get(keys[1]) is None and cache.get(keys[0]) == 0 and cache.get(keys[2]) == 2
+    assert cache.evictions == 1
@@ -0,0 +1,55 @@
+# Chunked and Cached Cleaning Tests
+# Cleaning a CSV chunk by chunk (ChunkedPreprocessing) or from its columnar cache (cache_csv/read_cached)
+# must give the frame, label classes and fill values DataPreprocessing gives on pd.read_csv
+# Run with: python -m pytest tests
+import pandas as pd
+import pytest
+from benchmarks.synthetic import make_listings
+from Data_analysis.data_cleaning import ChunkedPreprocessing, DataPreprocessing
+from serving.preprocessor import as_number
+from steps.ingest_data import cache_csv, read_cached, read_csv_chunks
+
+
+@pytest.fixture(scope='module')
+def listings_csv(tmp_path_factory):
+    # Synthetic listings with missing counts and categories, and repeated rows
+    listings = make_listings(3000, seed=8)
+    listings = pd.concat([listings, listings.sample(200, random_state=1)], ignore_index=True)
+    path = tmp_path_factory.mktemp('data') / 'listings.csv'
+    listings.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='module')
+def reference(listings_csv):
+    preprocessing = DataPreprocessing()
+    return preprocessing, preprocessing.handle_data(pd.read_csv(listings_csv))
+
+
+def known_classes(categories: dict) -> dict:
+    # LabelEncoder classes without the missing-value class it sorts last
+    return {col: [value for value in values if not pd.isna(value)] for col, values in categories.items()}
+
+
+def test_chunked_cleaning_matches_data_preprocessing(listings_csv, reference):
+    preprocessing, expected = reference
+    chunked = ChunkedPreprocessing()
+    # Chunks much smaller than the file, so modes, duplicates and classes span chunks
+    cleaned = chunked.handle_data(lambda columns: read_csv_chunks(listings_csv, 700, columns))
+    pd.testing.assert_frame_equal(cleaned, expected, check_exact=True)
+    assert chunked.categories_ == known_classes(preprocessing.categories_)
+    # The chunked reader keeps counts as text, so its modes are the text of the same numbers
+    assert {col: [as_number(value) for value in mode] for col, mode in chunked.modes_.items()} == preprocessing.modes_
+
+
+def test_cached_cleaning_matches_data_preprocessing(listings_csv, reference, tmp_path):
+    preprocessing, expected = reference
+    cached = cache_csv(listings_csv, str(tmp_path))
+    assert cache_csv(listings_csv, str(tmp_path)) == cached
+    # Only the requested columns that the file has are read
+    assert list(read_cached(cached, ['Bathroom', 'Missing column']).columns) == ['Bathroom']
+    from_cache = DataPreprocessing()
+    cleaned = from_cache.handle_data(read_cached(cached))
+    pd.testing.assert_frame_equal(cleaned, expected, check_exact=True)
+    assert known_classes(from_cache.categories_) == known_classes(preprocessing.categories_)
+    assert from_cache.modes_ == preprocessing.modes_
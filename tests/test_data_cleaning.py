@@ -0,0 +1,104 @@
+# Data Cleaning Tests
+# The vectorized price and area parsers of DataPreprocessing must give exactly what the
+# row-by-row parsing they replaced gave, including on units, ranges and malformed strings,
+# and DataDivision must scale with training rows only and keep price bands balanced when stratifying
+# Run with: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.preprocessing import StandardScaler
+from benchmarks.synthetic import make_listings
+from Data_analysis.data_cleaning import FEATURE_COLUMNS, PRICE_BAND_EDGES, DataDivision, DataPreprocessing
+
+# Strings chosen to exercise every branch of the parsing and of the unit stripping
+PRICE_EDGE_CASES = [
+    '34.01 Lac', '1.2 Cr', '500000', '85 Lac', '1 Cr', ' 12.5 Lac ', '1.2Cr', '.5 Cr', '5.', '+5', '-3 Lac',
+    '50 - 60 Lac', '1.2-1.5 Cr', '45 Lac - 1 Cr', '3 Lac Cr', 'Cr 4', 'Lac', 'Call for Price', '', 'nan',
+    'inf', '1e5', '1_000', '1,00,000', '2 lac', '1.2 Crore',
+]
+AREA_EDGE_CASES = [
+    '873 sqft', '946 sqm', '1938 sqyrd', '1200', ' 12.5sqm ', '800-900 sqft', '800 - 900 sqm', 'sqft',
+    '5 sq ft', '1,200 sqft', '1e3 sqft', '-5 sqm', '12 sqftsqm', 'abc', None, 1200, 1200.5, np.nan,
+]
+
+
+def baseline_price(amount):
+    # Row-by-row parsing as done before vectorization
+    try:
+        if 'Lac' in amount:
+            return float(amount.replace('Lac', '').strip()) * 100000
+        elif 'Cr' in amount:
+            return float(amount.replace('Cr', '').strip()) * 10000000
+        else:
+            return float(amount)
+    except ValueError:
+        return None
+
+
+def baseline_areas(areas: pd.Series) -> pd.Series:
+    # Unit stripping as done before vectorization: one pass per unit, then pd.to_numeric
+    areas = areas.astype(str)
+    for unit in ('sqft', 'sqm', 'sqyrd'):
+        areas = areas.str.replace(unit, '', regex=True)
+    return pd.to_numeric(areas, errors='coerce')
+
+
+@pytest.mark.parametrize('dtype', ['str', object])
+def test_convert_prices_matches_row_by_row_parsing(dtype):
+    amounts = pd.Series(PRICE_EDGE_CASES, dtype=dtype, name='Amount(in rupees)')
+    expected = amounts.apply(baseline_price).astype('float64')
+    pd.testing.assert_series_equal(DataPreprocessing().convert_prices(amounts), expected, check_exact=True)
+
+
+def test_convert_prices_keeps_index_and_gives_nan_for_missing_values():
+    # The row-by-row parsing raised TypeError on missing values; they now give NaN
+    amounts = pd.Series(['2.5 Lac', None, np.nan, '1.2 Cr'], index=[10, 3, 7, 4], dtype=object)
+    prices = DataPreprocessing().convert_prices(amounts)
+    expected = pd.Series([250000.0, np.nan, np.nan, 12000000.0], index=[10, 3, 7, 4])
+    pd.testing.assert_series_equal(prices, expected, check_exact=True)
+
+
+def test_convert_areas_matches_unit_stripping():
+    areas = pd.Series(AREA_EDGE_CASES, dtype=object, name='Carpet Area')
+    pd.testing.assert_series_equal(DataPreprocessing().convert_areas(areas), baseline_areas(areas), check_exact=True)
+
+
+def test_convert_areas_keeps_integer_dtype():
+    # pd.to_numeric gave int64 when every area was a whole number, and so must the vectorized parsing
+    areas = pd.Series(['873 sqft', '946 sqm', '1938 sqyrd', '1200'], index=[5, 1, 8, 2])
+    converted = DataPreprocessing().convert_areas(areas)
+    pd.testing.assert_series_equal(converted, baseline_areas(areas), check_exact=True)
+    assert converted.dtype == np.int64
+
+
+@pytest.fixture(scope='module')
+def cleaned():
+    return DataPreprocessing().handle_data(make_listings(3000, seed=21))
+
+
+def test_division_scales_with_training_rows_only(cleaned):
+    # Chunks smaller than the data, so the scaler is fitted over several partial fits
+    division = DataDivision(chunk_rows=500)
+    X_train, X_test, y_train, y_test = division.handle_data(cleaned)
+    assert len(X_train) + len(X_test) == len(cleaned)
+    assert not set(y_train.index) & set(y_test.index)
+
+    expected = StandardScaler().fit(cleaned.loc[y_train.index, FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+    np.testing.assert_allclose(division.scaler_.mean_, expected.mean_, rtol=1e-9)
+    np.testing.assert_allclose(division.scaler_.var_, expected.var_, rtol=1e-9)
+    # Fitting on every row would give other statistics
+    everything = StandardScaler().fit(cleaned[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+    assert not np.allclose(division.scaler_.mean_, everything.mean_, rtol=1e-6)
+
+    # Both sets are scaled with it, row for row
+    raw = cleaned.loc[y_test.index, FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    np.testing.assert_allclose(X_test.to_numpy(), expected.transform(raw).astype(np.float32), rtol=1e-6, atol=1e-6)
+
+
+def test_stratified_division_keeps_price_band_shares(cleaned):
+    _, _, y_train, y_test = DataDivision(stratify=True).handle_data(cleaned)
+    bands = len(PRICE_BAND_EDGES) + 1
+    train_shares = np.bincount(np.digitize(y_train, PRICE_BAND_EDGES), minlength=bands) / len(y_train)
+    test_shares = np.bincount(np.digitize(y_test, PRICE_BAND_EDGES), minlength=bands) / len(y_test)
+    # Up to the rounding of each band's split
+    np.testing.assert_allclose(train_shares, test_shares, atol=2 / len(y_test))
@@ -0,0 +1,148 @@
+# Inference Executor Tests
+# Errors raised in worker processes must reach the caller without breaking the pool,
+# a pool that does break must be replaced instead of failing every later request,
+# and a full pool must reject requests (429) while a slow one times them out (503)
+# Run with: python -m pytest tests
+import asyncio
+import os
+import pickle
+import threading
+import time
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from serving.encoding import CategoryEncoder, UnknownCategoryError
+from serving.executor import ExecutorRestarted, ExecutorSaturated, InferenceExecutor
+
+
+def encode_unknown():
+    # Runs in a worker process: the "error" policy rejects the unseen category
+    return CategoryEncoder({'location': ['a', 'b']}, 'error').encode({'location': np.array(['b', 'z'])})
+
+
+def exit_worker():
+    # Runs in a worker process and kills it, which breaks the pool
+    os._exit(1)
+
+
+def test_unknown_category_error_survives_pickling():
+    error = pickle.loads(pickle.dumps(UnknownCategoryError('location', np.array([1, 3]), ['z', 'y'])))
+    assert isinstance(error, UnknownCategoryError)
+    assert error.column == 'location' and error.rows.tolist() == [1, 3] and error.values == ['z', 'y']
+    assert str(error) == "Unknown category 'z' for column 'location'"
+
+
+def test_process_pool_reports_unknown_categories_and_keeps_serving():
+    executor = InferenceExecutor('process', max_workers=1, max_queue=4, timeout=30)
+
+    async def scenario():
+        for _ in range(2):
+            with pytest.raises(UnknownCategoryError) as raised:
+                await executor.run(encode_unknown)
+            assert raised.value.column == 'location' and raised.value.rows.tolist() == [1]
+        assert await executor.run(abs, -3) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_broken_process_pool_is_restarted():
+    executor = InferenceExecutor('process', max_workers=1, max_queue=4, timeout=30)
+
+    async def scenario():
+        broken = executor.pool
+        with pytest.raises(ExecutorRestarted):
+            await executor.run(exit_worker)
+        assert executor.pool is not broken
+        assert await executor.run(abs, -3) == 3
+        assert executor.in_flight == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+
+
+def test_api_process_pool_under_error_policy(load_app, api_rows):
+    app = load_app(INFERENCE_EXECUTOR='process', INFERENCE_WORKERS=1, UNKNOWN_CATEGORY_POLICY='error',
+                   PREDICTION_CACHE_SIZE=0)
+    client = TestClient(app.app)
+    unknown = dict(api_rows[0], location='Unseen location')
+    for _ in range(2):
+        response = client.post('/predict', json=unknown)
+        assert response.status_code == 422
+        assert 'Unseen location' in response.json()['detail']
+    assert client.post('/predict', json=api_rows[1]).status_code == 200
+
+
+def test_full_executor_rejects_jobs():
+    executor = InferenceExecutor('thread', max_workers=1, max_queue=1, timeout=30)
+    release = threading.Event()
+
+    async def scenario():
+        # One job running and one waiting fill the pool
+        jobs = [asyncio.ensure_future(executor.run(release.wait)) for _ in range(executor.capacity)]
+        await asyncio.sleep(0)
+        assert executor.in_flight == executor.capacity
+        with pytest.raises(ExecutorSaturated):
+            await executor.run(abs, -3)
+        release.set()
+        assert await asyncio.gather(*jobs) == [True, True]
+        assert await executor.run(abs, -3) == 3
+
+    try:
+        asyncio.run(scenario())
+        assert executor.rejected == 1 and executor.in_flight == 0
+    finally:
+        release.set()
+        executor.shutdown()
+
+
+def blocking_scoring(app, monkeypatch):
+    # Make /predict wait until the returned event is set, holding its executor slot
+    release = threading.Event()
+    score_one = app.score_one
+
+    def blocked(input_dict):
+        release.wait(10)
+        return score_one(input_dict)
+
+    monkeypatch.setattr(app, 'score_one', blocked)
+    return release
+
+
+def test_api_returns_429_when_executor_is_full(load_app, api_rows, monkeypatch):
+    app = load_app(INFERENCE_WORKERS=1, INFERENCE_QUEUE_DEPTH=0, PREDICTION_CACHE_SIZE=0, MICRO_BATCHING=0)
+    client = TestClient(app.app)
+    release = blocking_scoring(app, monkeypatch)
+    first = []
+    request = threading.Thread(target=lambda: first.append(client.post('/predict', json=api_rows[0])))
+    request.start()
+    try:
+        for _ in range(1000):
+            if app.executor.in_flight == app.executor.capacity:
+                break
+            time.sleep(0.01)
+        response = client.post('/predict', json=api_rows[1])
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        release.set()
+        request.join()
+    assert first[0].status_code == 200
+    assert app.executor.rejected == 1
+
+
+def test_api_returns_503_when_inference_times_out(load_app, api_rows, monkeypatch):
+    app = load_app(INFERENCE_TIMEOUT=0.2, PREDICTION_CACHE_SIZE=0, MICRO_BATCHING=0)
+    client = TestClient(app.app)
+    release = blocking_scoring(app, monkeypatch)
+    try:
+        response = client.post('/predict', json=api_rows[0])
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '1'
+    finally:
+        release.set()
+    assert app.executor.timed_out == 1
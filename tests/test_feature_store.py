@@ -0,0 +1,42 @@
+# Out-of-Core Training Tests
+# Training from the feature store (FeatureStore.build + merged sub-forests) must give the accuracy and
+# the preprocessor of the in-memory pipeline (clean_df + trainmodel) on the same CSV file
+# Run with: python -m pytest tests
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import r2_score
+from benchmarks.synthetic import make_listings
+from Data_analysis.feature_store import FeatureStore, train_forest
+from steps.clean_data import clean_df
+from steps.ingest_data import read_csv_chunks
+from steps.train_model import trainmodel
+
+PARAMS = {'n_estimators': 24, 'n_jobs': 1}
+
+
+def test_out_of_core_training_matches_in_memory_training(tmp_path, monkeypatch):
+    # trainmodel writes models/ and MLflow runs to the working directory
+    monkeypatch.chdir(tmp_path)
+    make_listings(6000, seed=3).to_csv('listings.csv', index=False)
+
+    # Out of core: chunks smaller than the file, several blocks and so several sub-forests
+    store = FeatureStore('store').build(lambda columns: read_csv_chunks('listings.csv', 1000, columns),
+                                        block_rows=1500, chunk_rows=1000)
+    assert store.n_blocks > 1
+    forest = train_forest('store', PARAMS)
+    X_store, y_store = store.test_sample()
+    assert len(forest.estimators_) == PARAMS['n_estimators']
+
+    # In memory, through the ZenML step functions
+    X_train, X_test, y_train, y_test, preprocessor = clean_df.entrypoint(pd.read_csv('listings.csv'))
+    model = trainmodel.entrypoint(X_train, y_train, preprocessor, model_params=PARAMS)
+
+    assert r2_score(y_store, forest.predict(X_store)) == pytest.approx(r2_score(y_test, model.predict(X_test)), abs=0.05)
+
+    # Same classes, fill values and features; each scaler is fitted on its own random training rows
+    stored = store.manifest['preprocessor']
+    for key in ('format_version', 'feature_names', 'categories', 'fill_values'):
+        assert stored[key] == preprocessor[key], key
+    np.testing.assert_allclose(stored['mean'], preprocessor['mean'], rtol=0.05)
+    np.testing.assert_allclose(stored['scale'], preprocessor['scale'], rtol=0.05)
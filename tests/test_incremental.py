@@ -0,0 +1,49 @@
+# Incremental Retraining Tests
+# New listings extend the label classes without renumbering the known ones, and
+# update_model adds trees to the served model while keeping the trees it has
+# Run with: python -m pytest tests
+import numpy as np
+import pandas as pd
+from Data_analysis.model_dev import get_model, update_model
+from serving.preprocessor import Preprocessor
+
+
+def test_extend_categories_keeps_old_codes(artifacts):
+    _, _, fitted = artifacts
+    preprocessor = Preprocessor.from_dict(fitted.to_dict())
+    old = {col: list(values) for col, values in preprocessor.categories.items()}
+    known = old['location'][:3]
+    before = preprocessor.encoder.encode({'location': np.array(known, dtype=object)})['location']
+
+    added = preprocessor.extend_categories({'location': ['New B', known[0], np.nan, 'New A', 'New B'],
+                                            'Not a category column': ['x']})
+    assert added == {'location': 2}
+    # Known classes keep their position; new ones follow, sorted
+    assert preprocessor.categories['location'] == old['location'] + ['New A', 'New B']
+    assert all(preprocessor.categories[col] == values for col, values in old.items() if col != 'location')
+
+    codes = preprocessor.encoder.encode({'location': np.array(known + ['New A', 'New B'], dtype=object)})['location']
+    np.testing.assert_array_equal(codes[:3], before)
+    np.testing.assert_array_equal(codes[3:], [len(old['location']), len(old['location']) + 1])
+    # The fitted preprocessor itself is untouched
+    assert fitted.categories['location'] == old['location']
+
+
+def test_update_model_adds_trees(artifacts):
+    _, _, preprocessor = artifacts
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(3000, len(preprocessor.feature_names))), columns=preprocessor.feature_names)
+    y = pd.Series(X.sum(axis=1) + rng.normal(size=3000))
+    model = get_model('random_forest', {'n_estimators': 10, 'n_jobs': 1}).train(X[:2000], y[:2000])
+    old_trees = list(model.estimators_)
+
+    updated = update_model(model, X[2000:], y[2000:], 5)
+    assert updated is model
+    assert len(updated.estimators_) == 15 and updated.n_estimators == 15
+    assert all(tree is old for tree, old in zip(updated.estimators_, old_trees))
+    # warm_start is switched off again, so a later full fit starts from scratch
+    assert updated.warm_start is False
+
+    boosted = get_model('hist_gradient_boosting', {'max_iter': 10}).train(X[:2000], y[:2000])
+    assert boosted.n_iter_ == 10
+    assert update_model(boosted, X[2000:], y[2000:], 5).n_iter_ == 15
@@ -0,0 +1,86 @@
+# Inference Path Tests
+# The pandas-free fast path used by /predict must predict exactly what the DataFrame path does,
+# for forests fitted with sklearn, for exported flat forests and for models without trees
+# Run with: python -m pytest tests
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+from benchmarks.synthetic import make_listings, to_api_rows
+from Data_analysis.data_cleaning import DataDivision, DataPreprocessing
+from Data_analysis.model_dev import get_model
+from serving.forest import FlatForest, export_forest
+from serving.inference import FastPredictor, predict_frame, predict_frame_intervals, uncertainty_forest
+from serving.preprocessor import Preprocessor
+
+
+@pytest.fixture(scope='module')
+def training():
+    # Small forest and preprocessor trained on synthetic listings, as the pipeline would
+    listings = make_listings(4000, seed=11)
+    preprocessing = DataPreprocessing()
+    dataset = preprocessing.handle_data(listings.copy())
+    division = DataDivision()
+    X_train, _, y_train, _ = division.handle_data(dataset)
+    preprocessor = Preprocessor.from_fitted(preprocessing.categories_, division.scaler_, division.feature_names_)
+    rows = to_api_rows(listings.sample(300, random_state=0))
+    # Categories never seen during training go through the unknown-category fallback
+    rows[0] = dict(rows[0], Society='Unseen Society', location='Unseen location')
+    return X_train, y_train, preprocessor, rows
+
+
+@pytest.fixture(scope='module')
+def forest(training):
+    X_train, y_train, _, _ = training
+    return get_model('random_forest', {'n_estimators': 20, 'n_jobs': 1}).train(X_train, y_train)
+
+
+def fast_predictions(predictor: FastPredictor, rows: list) -> np.ndarray:
+    return np.array([predictor.predict(row) for row in rows])
+
+
+def test_fast_path_matches_dataframe_path_for_sklearn_forest(training, forest):
+    _, _, preprocessor, rows = training
+    expected = predict_frame(forest, preprocessor, rows)
+    np.testing.assert_allclose(fast_predictions(FastPredictor(forest, preprocessor), rows), expected, rtol=1e-9, atol=0)
+
+
+def test_fast_path_matches_dataframe_path_for_flat_forest(training, forest, tmp_path):
+    _, _, preprocessor, rows = training
+    path = os.path.join(tmp_path, 'forest')
+    export_forest(forest, path)
+    flat = FlatForest.load(path)
+    expected = predict_frame(forest, preprocessor, rows)
+    np.testing.assert_allclose(predict_frame(flat, preprocessor, rows), expected, rtol=1e-9, atol=0)
+    np.testing.assert_allclose(fast_predictions(FastPredictor(flat, preprocessor, flat), rows), expected,
+                               rtol=1e-9, atol=0)
+
+
+def test_interval_price_matches_prediction(training, forest):
+    _, _, preprocessor, rows = training
+    predictor = FastPredictor(forest, preprocessor, uncertainty_forest(forest))
+    expected = predict_frame(forest, preprocessor, rows)
+    intervals = [predictor.predict_interval(row) for row in rows]
+    np.testing.assert_allclose([interval.price for interval in intervals], expected, rtol=1e-9, atol=0)
+    assert all(interval.lower <= interval.price <= interval.upper for interval in intervals)
+    frame = predict_frame_intervals(forest, preprocessor, rows, uncertainty_forest(forest))
+    np.testing.assert_allclose([prediction.price for prediction in frame], expected, rtol=1e-9, atol=0)
+
+
+def test_fast_path_matches_dataframe_path_without_trees(training):
+    X_train, y_train, preprocessor, rows = training
+    model = get_model('hist_gradient_boosting', {'max_iter': 20}).train(X_train, y_train)
+    predictor = FastPredictor(model, preprocessor)
+    assert predictor.flat is None
+    np.testing.assert_allclose(fast_predictions(predictor, rows), predict_frame(model, preprocessor, rows),
+                               rtol=1e-9, atol=0)
+
+
+def test_serving_does_not_import_the_pipeline():
+    # The API only ships the serving packages: importing them must not pull in ZenML or the steps
+    code = ('import sys, serving.inference, serving.model_store; '
+            'print(sorted(m for m in sys.modules if m == "zenml" or m.startswith("steps")))')
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == '[]'
@@ -0,0 +1,32 @@
+# Hyperparameter Search Tests
+# Every fold is fitted with native thread pools (OpenMP, BLAS) limited to one thread, since
+# the parallelism comes from the process pool of the search
+# Run with: python -m pytest tests
+import numpy as np
+from threadpoolctl import threadpool_info, threadpool_limits
+from Data_analysis import model_tuning
+from Data_analysis.model_dev import get_model
+
+
+def test_folds_fit_with_single_threaded_native_pools(monkeypatch):
+    rng = np.random.default_rng(0)
+    monkeypatch.setattr(model_tuning, '_folds', {'X': rng.normal(size=(300, 4)), 'y': rng.normal(size=300),
+                                                  'bounds': [0, 100, 200, 300]})
+    threads = []
+
+    class RecordingModel:
+        # Wraps the registered model and records the native thread pools it is fitted with
+        def __init__(self, name, params):
+            self.model = get_model(name, params)
+            self.params = self.model.params
+
+        def train(self, X, y):
+            threads.extend(pool['num_threads'] for pool in threadpool_info())
+            return self.model.train(X, y)
+
+    monkeypatch.setattr(model_tuning, 'get_model', RecordingModel)
+    # Whatever the process allows, e.g. OMP_NUM_THREADS or every core of a large machine
+    with threadpool_limits(limits=4):
+        score, seconds = model_tuning._run_fold('hist_gradient_boosting', {'max_iter': 5}, 0, None)
+    assert np.isfinite(score) and seconds > 0
+    assert threads and set(threads) == {1}
@@ -0,0 +1,32 @@
+# Step Profiling Tests
+# The profiler must still measure a step where the resource module and /proc are missing
+# Run with: python -m pytest tests
+import builtins
+import pandas as pd
+from steps import profiling
+
+
+def test_profiled_without_resource_or_proc(monkeypatch):
+    real_open = builtins.open
+
+    def open_without_proc(path, *args, **kwargs):
+        if str(path).startswith('/proc/'):
+            raise FileNotFoundError(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(profiling, 'resource', None)
+    monkeypatch.setattr(builtins, 'open', open_without_proc)
+    monkeypatch.setenv('STEP_PROFILING', '1')
+    recorded = []
+    monkeypatch.setattr(profiling, 'record_profile', recorded.append)
+
+    def double(df: pd.DataFrame) -> pd.DataFrame:
+        return pd.concat([df, df])
+
+    result = profiling.profiled(double)(pd.DataFrame({'a': range(5)}))
+    assert len(result) == 10
+    profile, = recorded
+    assert profile['cpu_seconds'] >= 0
+    assert profile['peak_rss_mb'] is None and profile['rss_before_mb'] is None
+    assert profile['peak_is_step_peak'] is False
+    assert profile['rows_in'] == {'df': 5} and profile['rows_out'] == [10]
@@ -0,0 +1,50 @@
+# Server Launcher Tests
+# The default number of workers must follow the CPUs the process may use (affinity and
+# cgroup quota), not every core of the host
+# Run with: python -m pytest tests
+import builtins
+import io
+import math
+import pytest
+import serve
+
+
+def fake_files(monkeypatch, files: dict):
+    # Serve the given paths from memory; every other /sys path is missing
+    real_open = builtins.open
+
+    def fake_open(path, *args, **kwargs):
+        if path in files:
+            return io.StringIO(files[path])
+        if str(path).startswith('/sys/'):
+            raise FileNotFoundError(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, 'open', fake_open)
+
+
+@pytest.mark.parametrize('files, limit', [
+    ({'/sys/fs/cgroup/cpu.max': '250000 100000\n'}, 2.5),
+    ({'/sys/fs/cgroup/cpu.max': 'max 100000\n'}, math.inf),
+    ({'/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '100000\n', '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '50000\n'}, 2.0),
+    ({'/sys/fs/cgroup/cpu/cpu.cfs_quota_us': '-1\n', '/sys/fs/cgroup/cpu/cpu.cfs_period_us': '100000\n'}, math.inf),
+    ({}, math.inf),
+])
+def test_cgroup_cpu_limit(monkeypatch, files, limit):
+    fake_files(monkeypatch, files)
+    assert serve.cgroup_cpu_limit() == limit
+
+
+def test_available_cpus_uses_affinity_and_quota(monkeypatch):
+    monkeypatch.setattr(serve.os, 'cpu_count', lambda: 64)
+    monkeypatch.setattr(serve.os, 'sched_getaffinity', lambda pid: {0, 1, 2, 3, 4, 5}, raising=False)
+    monkeypatch.setattr(serve, 'cgroup_cpu_limit', lambda: math.inf)
+    assert serve.available_cpus() == 6
+    monkeypatch.setattr(serve, 'cgroup_cpu_limit', lambda: 2.5)
+    assert serve.available_cpus() == 3
+    monkeypatch.setattr(serve, 'cgroup_cpu_limit', lambda: 0.2)
+    assert serve.available_cpus() == 1
+    # Platforms without sched_getaffinity fall back to the CPU count
+    monkeypatch.delattr(serve.os, 'sched_getaffinity')
+    monkeypatch.setattr(serve, 'cgroup_cpu_limit', lambda: math.inf)
+    assert serve.available_cpus() == 64
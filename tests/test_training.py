@@ -0,0 +1,29 @@
+# Model Training Tests
+# Saved models must predict single-threaded in the API whatever n_jobs they were trained with
+# Run with: python -m pytest tests
+import joblib
+import numpy as np
+import pandas as pd
+from Data_analysis.model_dev import get_model
+from steps.train_model import save_model
+
+
+def test_saved_forest_predicts_single_threaded(artifacts, tmp_path, monkeypatch):
+    _, trained, preprocessor = artifacts
+    monkeypatch.chdir(tmp_path)
+    assert trained.n_jobs == -1
+    save_model(trained, preprocessor.to_dict())
+    assert joblib.load(tmp_path / 'models' / 'model.pkl').n_jobs == 1
+    # The trained model itself keeps training and evaluating on every core
+    assert trained.n_jobs == -1
+
+
+def test_saved_model_without_n_jobs(artifacts, tmp_path, monkeypatch):
+    # Histogram gradient boosting has no n_jobs: it is saved as trained
+    _, _, preprocessor = artifacts
+    monkeypatch.chdir(tmp_path)
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(300, len(preprocessor.feature_names))), columns=preprocessor.feature_names)
+    model = get_model('hist_gradient_boosting', {'max_iter': 5}).train(X, rng.normal(size=300))
+    save_model(model, preprocessor.to_dict())
+    assert 'n_jobs' not in joblib.load(tmp_path / 'models' / 'model.pkl').get_params()